@@ -0,0 +1,197 @@
+"""
+Order Hot-Path Benchmarks
+Measures our own overhead on the order path against a local simulator server:
+signing, param building, make_request round trips, grid arming and TWAP slice scheduling.
+
+    python -m benchmarks.hot_path                   # run and compare with the baseline
+    python -m benchmarks.hot_path --save-baseline   # record this run as the new baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+# Benchmarks measure the client, not the exchange's or our position limits; logs go nowhere unless asked
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("RISK_CHECKS_ENABLED", "false")  # resting orders from earlier cases would otherwise push later ones over a configured MAX_POSITION_SIZE
+os.environ.setdefault("LOG_FILE", os.devnull)
+os.environ.setdefault("BINANCE_API_SECRET", "benchmark-secret")
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SYMBOL = "BTCUSDT"
+START_PRICE = 50000.0
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _stats(name: str, latencies_ns: List[int], elapsed: float, ops: Optional[int] = None) -> Dict:
+    ordered = sorted(latencies_ns)
+    n = len(ordered)
+
+    def pct(p: float) -> float:
+        return ordered[min(n - 1, int(p * n))] / 1e3 if n else 0.0
+
+    return {
+        "name": name,
+        "ops": ops if ops is not None else n,
+        "throughput": (ops if ops is not None else n) / elapsed if elapsed else 0.0,
+        "p50_us": pct(0.50),
+        "p99_us": pct(0.99),
+        "p999_us": pct(0.999),
+    }
+
+def _timed(name: str, fn: Callable[[], object], iterations: int, ops_per_call: int = 1) -> Dict:
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter_ns()
+        fn()
+        latencies.append(time.perf_counter_ns() - t0)
+    return _stats(name, latencies, time.perf_counter() - start, iterations * ops_per_call)
+
+def _start_server(port: int) -> subprocess.Popen:
+    """Simulator in its own process, so it does not compete with the client for the GIL"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "src.simulator.server", "--port", str(port), "--start-price", str(START_PRICE)],
+        cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.05)
+    server.terminate()
+    raise RuntimeError("Simulator server did not start")
+
+# -------- Cases --------
+def bench_sign(iterations: int) -> Dict:
+    from src.utils import _sign
+
+    params = {"symbol": SYMBOL, "side": "BUY", "type": "LIMIT", "quantity": 0.01, "price": 49000.0, "timeInForce": "GTC", "positionSide": "BOTH"}
+    return _timed("sign", lambda: _sign(params), iterations)
+
+def bench_params(iterations: int) -> Dict:
+    from src.limit_orders import _limit_order_params
+
+    return _timed("params", lambda: _limit_order_params(SYMBOL, "BUY", 0.01, 49000.0), iterations)
+
+def bench_round_trip(iterations: int) -> List[Dict]:
+    from src.utils import make_request
+    from src.limit_orders import _limit_order_params
+
+    params = _limit_order_params(SYMBOL, "BUY", 0.01, 40000.0)
+    return [
+        _timed("make_request GET", lambda: make_request("GET", "/fapi/v1/ticker/price", {"symbol": SYMBOL}), iterations),
+        _timed("make_request POST signed", lambda: make_request("POST", "/fapi/v1/order", params, signed=True), iterations),
+    ]
+
+def bench_grid(levels: int, repeats: int) -> Dict:
+    from src.advanced.grid_orders import place_grid_orders
+
+    # ±40% range, min-size legs, so every level is valid at any level count
+    profit_percent = 40 / levels
+    quantity = 0.001 * levels * 2
+    return _timed(f"grid {levels} levels", lambda: place_grid_orders(SYMBOL, quantity, levels, profit_percent), repeats, levels * 2)
+
+def bench_twap(jobs: int, slices: int, interval: float) -> Dict:
+    from src.advanced.twap_engine import TWAPEngine
+
+    async def run() -> List:
+        engine = TWAPEngine(asyncio.get_running_loop())
+        submitted = [engine.submit(SYMBOL, "BUY", 0.001 * slices, slices, interval * slices) for _ in range(jobs)]
+        submitted = [job for job in submitted if job is not None]  # rejected at submit
+        while any(job.state not in ("DONE", "CANCELLED") for job in submitted):
+            await asyncio.sleep(interval)
+        return submitted
+
+    start = time.perf_counter()
+    done = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    if len(done) < jobs:
+        print(f"⚠️  {jobs - len(done)} of {jobs} TWAP jobs were rejected at submit", file=sys.stderr)
+    lags = [int(lag * 1e9) for job in done for lag in job.lags]
+    return _stats(f"twap {jobs}x{slices} slice lag", lags, elapsed)
+
+# -------- Baseline --------
+def compare(results: List[Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Names of cases whose p50 or throughput got worse than the baseline by more than threshold"""
+    regressions = []
+    for r in results:
+        base = baseline.get(r["name"])
+        if not base:
+            continue
+        slower = base["p50_us"] and r["p50_us"] > base["p50_us"] * (1 + threshold)
+        fewer = base["throughput"] and r["throughput"] < base["throughput"] * (1 - threshold)
+        if slower or fewer:
+            regressions.append(r["name"])
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the order hot path against a local simulator")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--grid-levels", default="10,100,500")
+    parser.add_argument("--grid-repeats", type=int, default=5)
+    parser.add_argument("--twap-jobs", type=int, default=20)
+    parser.add_argument("--twap-slices", type=int, default=20)
+    parser.add_argument("--twap-interval", type=float, default=0.2)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = _start_server(port)
+    from src import utils
+
+    utils.API_BASE_URL = base_url
+    utils.prewarm_sessions([base_url], connections=4)
+    # Pay one-off costs (server time sync, exchangeInfo load) before anything is timed
+    from src import exchange_info, time_sync
+
+    time_sync.start()
+    exchange_info.refresh()
+
+    results = [bench_sign(args.iterations), bench_params(args.iterations)]
+    results += bench_round_trip(args.iterations // 4)
+    for levels in (int(x) for x in args.grid_levels.split(",") if x):
+        results.append(bench_grid(levels, args.grid_repeats))
+    results.append(bench_twap(args.twap_jobs, args.twap_slices, args.twap_interval))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.json:
+        print(json.dumps({"results": results, "regressions": regressions}, indent=2))
+    else:
+        print(f"{'case':<28}{'ops':>8}{'ops/s':>12}{'p50 us':>11}{'p99 us':>11}{'p999 us':>11}")
+        for r in results:
+            flag = "  REGRESSION" if r["name"] in regressions else ""
+            print(f"{r['name']:<28}{r['ops']:>8}{r['throughput']:>12.0f}{r['p50_us']:>11.1f}{r['p99_us']:>11.1f}{r['p999_us']:>11.1f}{flag}")
+        if not baseline:
+            print("\nNo baseline yet; run with --save-baseline to record one.")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({r["name"]: r for r in results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    server.terminate()
+    sys.exit(1 if regressions and not args.save_baseline else 0)
+
+if __name__ == "__main__":
+    main()
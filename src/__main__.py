@@ -0,0 +1,5 @@
+"""Entry point for python -m src"""
+
+from .cli import main
+
+main()
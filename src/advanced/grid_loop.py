@@ -0,0 +1,331 @@
+"""
+Grid Loop
+Keeps grids alive: when a level fills, the opposite leg is re-armed one level away
+(BUY fill at p -> SELL at the next level up, SELL fill -> BUY at the next level down).
+Per-level state lives in parallel NumPy arrays, fills are routed by clientOrderId,
+and realized profit is updated as each round trip closes.
+"""
+
+import argparse
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+import numpy as np
+
+from .. import metrics
+from ..utils import get_current_price, make_request_async, setup_logger, validate_symbol, validate_quantity
+from ..order_store import FINAL_STATUSES, Fill, OrderState, store
+from ..exchange_info import quantize_price, quantize_quantity, validate_order
+from .grid_model import BUY, SELL, quantize_prices, symbol_grid, symbol_tick
+from .grid_orders import BATCH_ENDPOINT, ORDER_ENDPOINT, _batch_params, _check_grid_exposure, _chunks, _leg_result, _limit_params, cancel_grid_orders_async
+from ..config import GRID_LEVELS, GRID_PROFIT_PERCENTAGE
+
+logger = setup_logger("grid_loop")
+IDLE = 0
+REARM_RETRIES = 3
+RETRY_DELAY = 1.0
+LATENCY_WINDOW = 1000  # re-arm latencies kept per grid for the status percentiles
+
+class GridState:
+    """
+    One symbol's live grid. Arrays are indexed by level in ascending price order;
+    the level at the starting price begins idle so the first fill has somewhere to re-arm.
+    """
+
+    def __init__(self, grid_id: int, symbol: str, prices: np.ndarray, quantity: float):
+        n = len(prices)
+        self.grid_id = grid_id
+        self.symbol = symbol
+        self.quantity = quantity
+        self.prices = prices
+        self.sides = np.zeros(n, np.int8)        # BUY / SELL / IDLE
+        self.order_ids = np.zeros(n, np.int64)   # 0 until the placement is acked
+        self.seqs = np.zeros(n, np.int32)        # bumped on every arm; events for older orders are ignored
+        self.entries = np.full(n, np.nan)        # fill price of the leg that armed this level
+        self.deferred = np.zeros(n, np.int8)     # re-arm waiting for this level's current order to finish
+        self.deferred_entries = np.full(n, np.nan)
+        self.retries = np.zeros(n, np.int8)
+        self.fills = 0
+        self.round_trips = 0
+        self.realized_profit = 0.0
+        self.commission = 0.0
+        self.running = True
+        self.rearm_latency = deque(maxlen=LATENCY_WINDOW)
+        self._pending: List[int] = []
+        self._armed_at: Dict[int, float] = {}
+
+    def status(self) -> Dict:
+        latency_ms = np.array(self.rearm_latency) * 1000
+        return {
+            "grid_id": self.grid_id,
+            "symbol": self.symbol,
+            "levels": len(self.prices),
+            "buys": int((self.sides == BUY).sum()),
+            "sells": int((self.sides == SELL).sum()),
+            "fills": self.fills,
+            "round_trips": self.round_trips,
+            "realized_profit": float(self.realized_profit),
+            "commission": self.commission,
+            "net_profit": float(self.realized_profit - self.commission),
+            "rearm_p50_ms": float(np.percentile(latency_ms, 50)) if len(latency_ms) else 0.0,
+            "rearm_p99_ms": float(np.percentile(latency_ms, 99)) if len(latency_ms) else 0.0,
+        }
+
+class GridLoop:
+    """
+    Hosts live grids for any number of symbols on one event loop. Pass a running
+    loop, or call start() to run one in a background thread. Fills arrive through
+    the order store, so either the user data stream or a simulator must feed it.
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self._loop = loop
+        self._thread: Optional[threading.Thread] = None
+        self._ids = itertools.count(1)
+        # clientOrderIds are "<prefix><grid>_<level>_<seq>"; the prefix keeps restarts apart
+        self._prefix = f"gl{int(time.time() * 1000) % 16 ** 7:x}_"
+        self.grids: Dict[int, GridState] = {}
+
+    def start(self, user_stream: bool = True) -> "GridLoop":
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="grid-loop", daemon=True)
+            self._thread.start()
+        store.add_listener(self._on_order)
+        if user_stream:
+            from ..user_stream import start_user_stream
+            start_user_stream()
+        return self
+
+    def stop(self, cancel_orders: bool = True) -> None:
+        for grid_id in list(self.grids):
+            self.remove_grid(grid_id, cancel_orders)
+        store.remove_listener(self._on_order)
+        if self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._thread = None
+            self._loop = None
+
+    def _call(self, fn, *args) -> None:
+        if self._loop is None:
+            self.start()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            fn(*args)
+        else:
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    # -------- Grid control --------
+    def add_grid(self, symbol: str, total_quantity: float, grid_levels: int = GRID_LEVELS, step_percent: float = GRID_PROFIT_PERCENTAGE, spacing: str = "arithmetic", center: Optional[float] = None) -> Optional[GridState]:
+        """Arm grid_levels BUYs below and SELLs above center (default: current price) and keep them re-armed"""
+        symbol = symbol.upper()
+        if not (validate_symbol(symbol) and validate_quantity(total_quantity)):
+            return None
+        if grid_levels <= 1:
+            logger.error("Grid levels must be > 1")
+            return None
+        center = center or get_current_price(symbol)
+        if not center:
+            logger.error("Unable to fetch current price")
+            return None
+        quantity = quantize_quantity(symbol, total_quantity / (grid_levels * 2))
+        if not (validate_quantity(quantity) and validate_order(symbol, quantity, quantize_price(symbol, center))):
+            logger.error(f"Grid order size {quantity} is not tradable for {symbol}; use fewer levels")
+            return None
+        if not _check_grid_exposure(symbol, quantity, grid_levels, center):
+            return None  # re-arms after fills keep the same worst case, so only the launch is checked
+
+        grid = symbol_grid(symbol, center, grid_levels, step_percent, spacing)
+        start, _ = quantize_prices(np.array([center]), symbol_tick(symbol))
+        state = GridState(next(self._ids), symbol, np.unique(np.concatenate([grid.prices, start])), quantity)
+        self.grids[state.grid_id] = state
+        self._call(self._launch, state, float(start[0]))
+        return state
+
+    def remove_grid(self, grid_id: int, cancel_orders: bool = True) -> None:
+        """Stop re-arming a grid and (by default) cancel its resting orders; blocks until done"""
+        grid = self.grids.pop(grid_id, None)
+        if grid is None:
+            return
+        grid.running = False
+        order_ids = grid.order_ids[grid.order_ids > 0].tolist()
+        if cancel_orders and order_ids and self._loop:
+            future = asyncio.run_coroutine_threadsafe(cancel_grid_orders_async(grid.symbol, order_ids), self._loop)
+            failed = [res for res in future.result(timeout=30) if isinstance(res, BaseException)]
+            if failed:
+                logger.error(f"Grid {grid_id}: {len(failed)} of {len(order_ids)} cancels failed, first: {failed[0]}")
+        s = grid.status()
+        logger.info(f"Grid {grid_id} {grid.symbol} stopped: {s['fills']} fills, {s['round_trips']} round trips, net profit {s['net_profit']:.8f}")
+
+    def status(self, grid_id: Optional[int] = None):
+        if grid_id is not None:
+            return self.grids[grid_id].status()
+        return [grid.status() for grid in self.grids.values()]
+
+    def _launch(self, grid: GridState, start: float) -> None:
+        for level in np.flatnonzero(grid.prices < start):
+            self._arm(grid, int(level), BUY)
+        for level in np.flatnonzero(grid.prices > start):
+            self._arm(grid, int(level), SELL)
+        logger.info(f"Grid {grid.grid_id} {grid.symbol}: {len(grid.prices)} levels around {start}, {grid.quantity} per level")
+
+    # -------- Fill handling --------
+    def _on_order(self, state: OrderState, fill: Optional[Fill]) -> None:
+        """Order store listener; runs on whichever thread delivered the update"""
+        if not state.client_order_id.startswith(self._prefix) or self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._apply, state.client_order_id, state.status, state.avg_price or state.price, fill.commission if fill else 0.0, time.monotonic())
+
+    def _apply(self, client_order_id: str, status: str, price: float, commission: float, received: float) -> None:
+        grid_id, level, seq = (int(x) for x in client_order_id[len(self._prefix):].split("_"))
+        grid = self.grids.get(grid_id)
+        if grid is None:
+            return
+        grid.commission += commission
+        if seq != grid.seqs[level] or grid.sides[level] == IDLE:
+            return  # stale or duplicate (REST ack and stream event both report a fill)
+        if status == "FILLED":
+            self._filled(grid, level, price, received)
+        elif status in FINAL_STATUSES:
+            grid.sides[level] = IDLE
+            grid.order_ids[level] = 0
+            logger.warning(f"Grid {grid_id} {grid.symbol} level {level} order {status.lower()} outside the grid loop")
+            self._release(grid, level, received)
+
+    def _filled(self, grid: GridState, level: int, price: float, received: float) -> None:
+        side = int(grid.sides[level])
+        grid.sides[level] = IDLE
+        grid.order_ids[level] = 0
+        grid.fills += 1
+        entry = grid.entries[level]
+        if not np.isnan(entry):
+            # SELL closes a BUY entry (price - entry); BUY closes a SELL entry (entry - price)
+            grid.realized_profit += (entry - price) * side * grid.quantity
+            grid.round_trips += 1
+            grid.entries[level] = np.nan
+        target = level + 1 if side == BUY else level - 1
+        logger.debug(f"Grid {grid.grid_id} {grid.symbol} {'BUY' if side == BUY else 'SELL'} filled at {price} (level {level})")
+        self._release(grid, level, received)
+        if not grid.running or not 0 <= target < len(grid.prices):
+            return
+        if grid.sides[target] == IDLE:
+            grid.entries[target] = price
+            self._arm(grid, target, -side, received)
+        elif not grid.deferred[target]:
+            # A gap moved price past legs that are still in flight; the target's
+            # current order is about to fill, so re-arm it once that happens
+            grid.deferred[target] = -side
+            grid.deferred_entries[target] = price
+        else:
+            logger.warning(f"Grid {grid.grid_id} {grid.symbol} level {target} already has a pending re-arm; dropping one")
+
+    def _release(self, grid: GridState, level: int, received: float) -> None:
+        """Arm a re-arm that was waiting for this level to go idle"""
+        side = int(grid.deferred[level])
+        if not side:
+            return
+        grid.deferred[level] = IDLE
+        if grid.running:
+            grid.entries[level] = grid.deferred_entries[level]
+            self._arm(grid, level, side, received)
+
+    # -------- Order placement --------
+    def _arm(self, grid: GridState, level: int, side: int, armed_at: Optional[float] = None) -> None:
+        grid.sides[level] = side
+        grid.seqs[level] += 1
+        grid.order_ids[level] = 0
+        if armed_at is not None:
+            grid._armed_at[level] = armed_at
+        grid._pending.append(level)
+        if len(grid._pending) == 1:
+            # Everything armed during this loop iteration goes out together
+            self._loop.call_soon(self._flush, grid)
+
+    def _flush(self, grid: GridState) -> None:
+        levels, grid._pending = grid._pending, []
+        for chunk in _chunks(levels):
+            asyncio.ensure_future(self._send(grid, chunk))
+
+    def _order_params(self, grid: GridState, level: int) -> Dict:
+        side = "BUY" if grid.sides[level] == BUY else "SELL"
+        params = _limit_params(grid.symbol, side, grid.quantity, float(grid.prices[level]))
+        params["newClientOrderId"] = f"{self._prefix}{grid.grid_id}_{level}_{grid.seqs[level]}"
+        return params
+
+    async def _send(self, grid: GridState, levels: List[int]) -> None:
+        levels = [k for k in levels if grid.sides[k] != IDLE]
+        if not levels or not grid.running:
+            return
+        seqs = [int(grid.seqs[k]) for k in levels]
+        orders = [self._order_params(grid, k) for k in levels]
+        try:
+            if len(orders) == 1:
+                responses = [await make_request_async("POST", ORDER_ENDPOINT, orders[0], signed=True)]
+            else:
+                responses = [_leg_result(r) for r in await make_request_async("POST", BATCH_ENDPOINT, _batch_params(orders), signed=True)]
+        except Exception as e:
+            responses = [e] * len(orders)
+        acked = time.monotonic()
+        for level, seq, res in zip(levels, seqs, responses):
+            armed_at = grid._armed_at.pop(level, None)
+            if isinstance(res, BaseException):
+                self._failed(grid, level, seq, res)
+                continue
+            if armed_at is not None:
+                grid.rearm_latency.append(acked - armed_at)
+            grid.retries[level] = 0
+            if grid.seqs[level] == seq and grid.sides[level] != IDLE:
+                grid.order_ids[level] = int(res["orderId"])
+
+    def _failed(self, grid: GridState, level: int, seq: int, error: BaseException) -> None:
+        if grid.seqs[level] != seq:
+            return
+        grid.retries[level] += 1
+        if grid.running and grid.retries[level] <= REARM_RETRIES:
+            logger.warning(f"Grid {grid.grid_id} {grid.symbol} level {level} placement failed ({error}); retrying")
+            metrics.count_retry("grid", type(error).__name__)
+            self._loop.call_later(RETRY_DELAY, self._retry, grid, level, seq)
+            return
+        grid.sides[level] = IDLE
+        logger.error(f"Grid {grid.grid_id} {grid.symbol} level {level} left idle after {grid.retries[level]} failures: {error}")
+
+    def _retry(self, grid: GridState, level: int, seq: int) -> None:
+        if grid.running and grid.seqs[level] == seq and grid.sides[level] != IDLE:
+            self._arm(grid, level, int(grid.sides[level]))  # new seq, so a new clientOrderId
+
+def main():
+    parser = argparse.ArgumentParser(description="Run self-re-arming grids on Binance Futures")
+    parser.add_argument("grids", nargs="+", help="SYMBOL:TOTAL_QUANTITY, e.g. BTCUSDT:0.1")
+    parser.add_argument("--levels", type=int, default=GRID_LEVELS)
+    parser.add_argument("--profit-percent", type=float, default=GRID_PROFIT_PERCENTAGE)
+    parser.add_argument("--spacing", default="arithmetic", choices=["arithmetic", "geometric"])
+    parser.add_argument("--report-every", type=float, default=30, help="seconds between status lines")
+    args = parser.parse_args()
+
+    metrics.serve_from_config()
+    loop = GridLoop().start()
+    for spec in args.grids:
+        symbol, quantity = spec.split(":")
+        if loop.add_grid(symbol, float(quantity), args.levels, args.profit_percent, args.spacing) is None:
+            print(f"❌ Rejected {spec}. Check bot.log for details.")
+    if not loop.grids:
+        loop.stop()
+        return
+    try:
+        while True:
+            time.sleep(args.report_every)
+            for s in loop.status():
+                print(f"{s['symbol']}: {s['buys']} buys / {s['sells']} sells, {s['fills']} fills, {s['round_trips']} round trips, net {s['net_profit']:.8f}, re-arm p99 {s['rearm_p99_ms']:.2f}ms")
+    except KeyboardInterrupt:
+        print("Stopping and cancelling grid orders...")
+        loop.stop()
+
+if __name__ == "__main__":
+    main()
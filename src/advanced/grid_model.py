@@ -0,0 +1,112 @@
+"""
+Grid Model
+NumPy-backed grid levels: arithmetic or geometric spacing, tick/step quantization
+in one vector pass, and diffs between grids so a rebalance only touches the levels
+that actually moved.
+"""
+
+from typing import NamedTuple, Optional, Tuple
+import numpy as np
+
+from ..exchange_info import _decimals, get_symbol_filters
+
+BUY, SELL = 1, -1
+SPACINGS = ("arithmetic", "geometric")
+
+class Grid(NamedTuple):
+    prices: np.ndarray  # float64, tick-aligned
+    ticks: np.ndarray   # int64 price in ticks, the exact key used for diffs
+    sides: np.ndarray   # int8, BUY=1 / SELL=-1
+    levels: np.ndarray  # int32, distance from the center in levels (1 = nearest)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def keys(self) -> np.ndarray:
+        # Same price on opposite sides are different orders
+        return self.ticks * 2 + (self.sides == BUY)
+
+    def take(self, mask_or_index) -> "Grid":
+        return Grid(self.prices[mask_or_index], self.ticks[mask_or_index], self.sides[mask_or_index], self.levels[mask_or_index])
+
+    def legs(self):
+        """(side, level, price) tuples in the shape grid_orders.place_grid_legs takes"""
+        return [("BUY" if s == BUY else "SELL", int(l), float(p)) for s, l, p in zip(self.sides, self.levels, self.prices)]
+
+def quantize_prices(prices: np.ndarray, tick_size: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Nearest tick for every price; returns (prices, ticks)"""
+    ticks = np.rint(np.asarray(prices, dtype=np.float64) / tick_size).astype(np.int64)
+    return np.round(ticks * tick_size, _decimals(tick_size)), ticks
+
+def quantize_quantities(quantities: np.ndarray, step_size: float) -> np.ndarray:
+    """Round every quantity down to the lot step"""
+    steps = np.floor(np.asarray(quantities, dtype=np.float64) / step_size + 1e-9)
+    return np.round(steps * step_size, _decimals(step_size))
+
+def _offsets(center: float, count: int, step_percent: float, spacing: str, anchor: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Level prices on a lattice through anchor (default: center) with the step sized from
+    anchor. Keeping the anchor fixed while the center moves keeps levels on the same
+    prices, so diffs stay small.
+    """
+    anchor = center if anchor is None else anchor
+    if spacing == "geometric":
+        ratio = 1 + step_percent / 100
+        k0 = np.log(center / anchor) / np.log(ratio)
+        at = lambda k: anchor * ratio ** k
+    else:
+        step = anchor * step_percent / 100
+        k0 = (center - anchor) / step
+        at = lambda k: anchor + k * step
+    if abs(k0 - round(k0)) < 1e-9:
+        k0 = round(k0)
+    i = np.arange(count, dtype=np.float64)
+    return at(np.ceil(k0) - 1 - i), at(np.floor(k0) + 1 + i)
+
+def _assemble(buy_prices: np.ndarray, sell_prices: np.ndarray, tick_size: float) -> Grid:
+    prices = np.concatenate([buy_prices, sell_prices])
+    sides = np.concatenate([np.full(len(buy_prices), BUY, np.int8), np.full(len(sell_prices), SELL, np.int8)])
+    levels = np.concatenate([np.arange(1, len(buy_prices) + 1, dtype=np.int32), np.arange(1, len(sell_prices) + 1, dtype=np.int32)])
+    prices, ticks = quantize_prices(prices, tick_size)
+    keep = ticks > 0
+    grid = Grid(prices[keep], ticks[keep], sides[keep], levels[keep])
+    # Levels closer together than a tick collapse onto one price; keep the nearest
+    _, first = np.unique(grid.keys(), return_index=True)
+    return grid.take(np.sort(first))
+
+def build_grid(center: float, levels: int, step_percent: float, spacing: str = "arithmetic", tick_size: float = 0.01, anchor: Optional[float] = None) -> Grid:
+    """levels BUYs below and levels SELLs above center, step_percent apart (of anchor, or compounding)"""
+    if spacing not in SPACINGS:
+        raise ValueError(f"spacing must be one of {SPACINGS}")
+    buys, sells = _offsets(center, levels, step_percent, spacing, anchor)
+    return _assemble(buys, sells, tick_size)
+
+def build_range_grid(lower: float, upper: float, count: int, center: float, spacing: str = "arithmetic", tick_size: float = 0.01) -> Grid:
+    """count levels spread over [lower, upper]; BUY below center, SELL above, none at center"""
+    if spacing not in SPACINGS:
+        raise ValueError(f"spacing must be one of {SPACINGS}")
+    points = np.geomspace(lower, upper, count) if spacing == "geometric" else np.linspace(lower, upper, count)
+    buys = points[points < center][::-1]
+    sells = points[points > center]
+    return _assemble(buys, sells, tick_size)
+
+def diff_grids(current: Grid, target: Grid) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Indices into current that are not in target (to cancel) and indices into
+    target that are not in current (to place). Unchanged levels appear in neither.
+    """
+    current_keys, target_keys = current.keys(), target.keys()
+    cancel = np.flatnonzero(~np.isin(current_keys, target_keys))
+    add = np.flatnonzero(~np.isin(target_keys, current_keys))
+    return cancel, add
+
+def symbol_tick(symbol: str) -> float:
+    filters = get_symbol_filters(symbol)
+    return filters.tick_size if filters and filters.tick_size else 0.01
+
+def symbol_grid(symbol: str, center: float, levels: int, step_percent: float, spacing: str = "arithmetic", lower: Optional[float] = None, upper: Optional[float] = None, anchor: Optional[float] = None) -> Grid:
+    """Grid quantized to the symbol's tick size (0.01 if exchange info is unavailable)"""
+    tick = symbol_tick(symbol)
+    if lower is not None and upper is not None:
+        return build_range_grid(lower, upper, levels * 2, center, spacing, tick)
+    return build_grid(center, levels, step_percent, spacing, tick, anchor)
@@ -4,26 +4,35 @@ Automatically places multiple buy/sell limit orders across price levels to profi
 """
 
 import argparse
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+import numpy as np
 
 from ..utils import (
     make_request,
+    make_request_async,
     validate_symbol,
-    validate_side,
     validate_quantity,
-    validate_price,
     get_current_price,
+    get_current_price_async,
     setup_logger,
 )
-from ..config import GRID_LEVELS, GRID_PROFIT_PERCENTAGE
+from .grid_model import Grid, diff_grids, symbol_grid
+from ..exchange_info import preload_async, quantize_price, quantize_quantity, validate_order
+from ..logger import order_fields
+from ..positions import check_order, seed_async
+from ..config import GRID_LEVELS, GRID_PROFIT_PERCENTAGE, HTTP_POOL_SIZE
 
 logger = setup_logger("grid_orders")
 ORDER_ENDPOINT = "/fapi/v1/order"
+BATCH_ENDPOINT = "/fapi/v1/batchOrders"
+MAX_BATCH_SIZE = 5  # exchange limit per batchOrders call
+MAX_CANCEL_BATCH_SIZE = 10  # exchange limit per batch cancel
 
-def place_limit_order(symbol, side, quantity, price, time_in_force="GTC"):
-    params = {
+def _limit_params(symbol, side, quantity, price, time_in_force="GTC"):
+    return {
         "symbol": symbol.upper(),
         "side": side.upper(),
         "type": "LIMIT",
@@ -31,17 +40,93 @@ def place_limit_order(symbol, side, quantity, price, time_in_force="GTC"):
         "price": price,
         "timeInForce": time_in_force,
     }
-    return make_request("POST", ORDER_ENDPOINT, params, signed=True)
 
-def place_grid_orders(symbol: str, total_quantity: float, grid_levels: int = GRID_LEVELS, profit_percent: float = GRID_PROFIT_PERCENTAGE):
-    """
-    Create a symmetric grid of buy and sell limit orders.
-    Example: 10 levels at ±0.5% intervals.
-    """
+def place_limit_order(symbol, side, quantity, price, time_in_force="GTC"):
+    return make_request("POST", ORDER_ENDPOINT, _limit_params(symbol, side, quantity, price, time_in_force), signed=True)
+
+async def place_limit_order_async(symbol, side, quantity, price, time_in_force="GTC"):
+    return await make_request_async("POST", ORDER_ENDPOINT, _limit_params(symbol, side, quantity, price, time_in_force), signed=True)
+
+def _validate_grid(symbol: str, total_quantity: float, grid_levels: int) -> bool:
     if not (validate_symbol(symbol) and validate_quantity(total_quantity)):
-        return None
+        return False
     if grid_levels <= 1:
         logger.error("Grid levels must be > 1")
+        return False
+    return True
+
+def _check_grid_exposure(symbol: str, quantity: float, grid_levels: int, price: float) -> bool:
+    """Every BUY level filling, or every SELL level filling, must stay within the position limits"""
+    return all(check_order(symbol, side, quantity, price, total=quantity * grid_levels) for side in ("BUY", "SELL"))
+
+def _grid_legs(symbol: str, current_price: float, grid_levels: int, profit_percent: float, spacing: str = "arithmetic") -> List[Tuple[str, int, float]]:
+    """(side, level, price) for every leg: BUYs below the current price, then SELLs above"""
+    return symbol_grid(symbol, current_price, grid_levels, profit_percent, spacing).legs()
+
+def _batch_params(orders: List[Dict]) -> Dict:
+    # batchOrders expects every field as a string
+    batch = [{k: str(v) for k, v in order.items()} for order in orders]
+    return {"batchOrders": json.dumps(batch, separators=(",", ":"))}
+
+def _chunks(items: List, size: int = MAX_BATCH_SIZE) -> List[List]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _leg_result(res: Any) -> Any:
+    """Turn a batch entry into an order dict, or an exception for {"code", "msg"} rejections"""
+    if isinstance(res, dict) and "code" in res and "orderId" not in res:
+        return RuntimeError(f"{res.get('code')}: {res.get('msg')}")
+    return res
+
+def _place_batch(orders: List[Dict]) -> List[Any]:
+    try:
+        res = make_request("POST", BATCH_ENDPOINT, _batch_params(orders), signed=True)
+        return [_leg_result(r) for r in res]
+    except Exception as e:
+        return [e] * len(orders)
+
+async def _place_batch_async(orders: List[Dict]) -> List[Any]:
+    try:
+        res = await make_request_async("POST", BATCH_ENDPOINT, _batch_params(orders), signed=True)
+        return [_leg_result(r) for r in res]
+    except Exception as e:
+        return [e] * len(orders)
+
+def _leg_orders(symbol: str, legs: List[Tuple[str, int, float]], quantity: float) -> List[Dict]:
+    return [_limit_params(symbol, side, quantity, quantize_price(symbol, price)) for side, _, price in legs]
+
+def place_grid_legs(symbol: str, legs: List[Tuple[str, int, float]], quantity: float) -> List[Any]:
+    """
+    Place (side, level, price) legs through batchOrders, with all batches in flight at once.
+    Returns one entry per leg, in the same order: the order dict, or the exception it failed with.
+    """
+    batches = _chunks(_leg_orders(symbol, legs, quantity))
+    if not batches:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(batches), HTTP_POOL_SIZE)) as pool:
+        return [res for batch in pool.map(_place_batch, batches) for res in batch]
+
+async def place_grid_legs_async(symbol: str, legs: List[Tuple[str, int, float]], quantity: float) -> List[Any]:
+    """Async variant of place_grid_legs"""
+    batches = _chunks(_leg_orders(symbol, legs, quantity))
+    responses = await asyncio.gather(*(_place_batch_async(batch) for batch in batches))
+    return [res for batch in responses for res in batch]
+
+def _collect(legs: List[Tuple[str, int, float]], responses: List[Any]) -> List[Dict]:
+    results = []
+    for (side, i, price), res in zip(legs, responses):
+        if isinstance(res, BaseException):
+            logger.error("Failed to place %s grid %d: %s", side, i, res, extra={"side": side, "level": i})
+            continue
+        results.append(res)
+        logger.info("%s Grid %d: %s", side, i, price, extra=order_fields(res, level=i))
+    return results
+
+def place_grid_orders(symbol: str, total_quantity: float, grid_levels: int = GRID_LEVELS, profit_percent: float = GRID_PROFIT_PERCENTAGE, spacing: str = "arithmetic"):
+    """
+    Create a symmetric grid of buy and sell limit orders.
+    Example: 10 levels at ±0.5% intervals (geometric spacing compounds the 0.5%).
+    """
+    if not _validate_grid(symbol, total_quantity, grid_levels):
         return None
 
     current_price = get_current_price(symbol)
@@ -49,35 +134,92 @@ def place_grid_orders(symbol: str, total_quantity: float, grid_levels: int = GRI
         logger.error("Unable to fetch current price")
         return None
 
-    qty_per_order = total_quantity / (grid_levels * 2)
-    price_step = current_price * (profit_percent / 100)
+    qty_per_order = quantize_quantity(symbol, total_quantity / (grid_levels * 2))
+    if not (validate_quantity(qty_per_order) and validate_order(symbol, qty_per_order, quantize_price(symbol, current_price))):
+        logger.error(f"Grid order size {qty_per_order} is not tradable for {symbol}; use fewer levels")
+        return None
+    if not _check_grid_exposure(symbol, qty_per_order, grid_levels, current_price):
+        return None
 
     logger.info(f"Placing {grid_levels} BUY and {grid_levels} SELL grid orders around {current_price}")
-    results = []
+    legs = _grid_legs(symbol, current_price, grid_levels, profit_percent, spacing)
+    return _collect(legs, place_grid_legs(symbol, legs, qty_per_order))
 
-    # Buy Orders (below current price)
-    for i in range(1, grid_levels + 1):
-        price = current_price - i * price_step
-        if price <= 0:
-            continue
+async def place_grid_orders_async(symbol: str, total_quantity: float, grid_levels: int = GRID_LEVELS, profit_percent: float = GRID_PROFIT_PERCENTAGE, spacing: str = "arithmetic"):
+    """
+    Async variant of place_grid_orders.
+    """
+    if not _validate_grid(symbol, total_quantity, grid_levels):
+        return None
+
+    await preload_async(symbol)
+    await seed_async()
+    current_price = await get_current_price_async(symbol)
+    if not current_price:
+        logger.error("Unable to fetch current price")
+        return None
+
+    qty_per_order = quantize_quantity(symbol, total_quantity / (grid_levels * 2))
+    if not (validate_quantity(qty_per_order) and validate_order(symbol, qty_per_order, quantize_price(symbol, current_price))):
+        logger.error(f"Grid order size {qty_per_order} is not tradable for {symbol}; use fewer levels")
+        return None
+    if not _check_grid_exposure(symbol, qty_per_order, grid_levels, current_price):
+        return None
+
+    logger.info(f"Placing {grid_levels} BUY and {grid_levels} SELL grid orders around {current_price}")
+    legs = _grid_legs(symbol, current_price, grid_levels, profit_percent, spacing)
+    return _collect(legs, await place_grid_legs_async(symbol, legs, qty_per_order))
+
+def cancel_grid_orders(symbol: str, order_ids: List[int]) -> List[Any]:
+    """Cancel orders through batch cancels (10 ids per call), all batches in flight at once"""
+    batches = _chunks([int(i) for i in order_ids], MAX_CANCEL_BATCH_SIZE)
+    if not batches:
+        return []
+
+    def cancel(ids: List[int]) -> List[Any]:
         try:
-            res = place_limit_order(symbol, "BUY", qty_per_order, round(price, 2))
-            results.append(res)
-            logger.info(f"BUY Grid {i}: {price}")
-        except Exception:
-            logger.exception(f"Failed to place BUY grid {i}")
-
-    # Sell Orders (above current price)
-    for i in range(1, grid_levels + 1):
-        price = current_price + i * price_step
+            res = make_request("DELETE", BATCH_ENDPOINT, {"symbol": symbol.upper(), "orderIdList": json.dumps(ids, separators=(",", ":"))}, signed=True)
+            return [_leg_result(r) for r in res]
+        except Exception as e:
+            return [e] * len(ids)
+
+    with ThreadPoolExecutor(max_workers=min(len(batches), HTTP_POOL_SIZE)) as pool:
+        return [res for batch in pool.map(cancel, batches) for res in batch]
+
+async def cancel_grid_orders_async(symbol: str, order_ids: List[int]) -> List[Any]:
+    """Async variant of cancel_grid_orders"""
+    async def cancel(ids: List[int]) -> List[Any]:
         try:
-            res = place_limit_order(symbol, "SELL", qty_per_order, round(price, 2))
-            results.append(res)
-            logger.info(f"SELL Grid {i}: {price}")
-        except Exception:
-            logger.exception(f"Failed to place SELL grid {i}")
+            res = await make_request_async("DELETE", BATCH_ENDPOINT, {"symbol": symbol.upper(), "orderIdList": json.dumps(ids, separators=(",", ":"))}, signed=True)
+            return [_leg_result(r) for r in res]
+        except Exception as e:
+            return [e] * len(ids)
 
-    return results
+    responses = await asyncio.gather(*(cancel(ids) for ids in _chunks([int(i) for i in order_ids], MAX_CANCEL_BATCH_SIZE)))
+    return [res for batch in responses for res in batch]
+
+def rebalance_grid(symbol: str, current: Grid, order_ids: np.ndarray, target: Grid, quantity: float) -> Tuple[Grid, np.ndarray]:
+    """
+    Move a live grid to target by cancelling only the levels target drops and
+    placing only the ones it adds. order_ids is aligned with current (0 = no live order).
+    Returns the resulting grid and its aligned order ids.
+    """
+    cancel, add = diff_grids(current, target)
+    logger.info(f"Rebalancing {symbol} grid: {len(cancel)} cancels, {len(add)} new orders, {len(current) - len(cancel)} kept")
+    live_cancels = order_ids[cancel][order_ids[cancel] > 0]
+    for oid, res in zip(live_cancels, cancel_grid_orders(symbol, live_cancels.tolist())):
+        if isinstance(res, BaseException):
+            logger.error(f"Failed to cancel grid order {oid}: {res}")
+
+    added = target.take(add)
+    responses = place_grid_legs(symbol, added.legs(), quantity)
+    _collect(added.legs(), responses)
+    added_ids = np.array([0 if isinstance(r, BaseException) else int(r.get("orderId", 0)) for r in responses], dtype=np.int64)
+
+    kept = np.ones(len(current), dtype=bool)
+    kept[cancel] = False
+    grid = Grid(*(np.concatenate([a[kept], b]) for a, b in zip(current, added)))
+    return grid, np.concatenate([order_ids[kept], added_ids])
 
 def main():
     parser = argparse.ArgumentParser(description="Execute Grid Trading Strategy on Binance Futures")
@@ -85,10 +227,11 @@ def main():
     parser.add_argument("total_quantity", type=float)
     parser.add_argument("--levels", type=int, default=GRID_LEVELS)
     parser.add_argument("--profit-percent", type=float, default=GRID_PROFIT_PERCENTAGE)
+    parser.add_argument("--spacing", default="arithmetic", choices=["arithmetic", "geometric"])
     args = parser.parse_args()
 
     print(f"\nCreating {args.levels}x2 grid orders for {args.symbol}...")
-    results = place_grid_orders(args.symbol, args.total_quantity, args.levels, args.profit_percent)
+    results = place_grid_orders(args.symbol, args.total_quantity, args.levels, args.profit_percent, args.spacing)
     if results:
         print(f"✅ {len(results)} grid orders placed successfully. Check bot.log for details.")
     else:
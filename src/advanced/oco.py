@@ -1,53 +1,478 @@
 """
 OCO (One-Cancels-the-Other) Order Module
-Places a take-profit and stop-loss pair — when one executes, the other cancels.
+USDT-M futures has no OCO endpoint, so the take-profit (LIMIT) and stop-loss (STOP)
+legs are placed as two orders and linked in an in-process registry. When a leg
+fills or the stop triggers, the sibling is cancelled; a partial take-profit fill
+resizes the stop to what is left. Events are routed by clientOrderId, cancels
+raised in the same loop iteration go out batched per symbol, and the delay from
+event to cancel is recorded.
 """
 
 import argparse
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
 
+from .. import metrics
 from ..utils import (
-    make_request,
+    make_request_async,
     validate_symbol,
     validate_side,
     validate_quantity,
     validate_price,
-    get_current_price,
     setup_logger,
 )
+from ..exchange_info import preload_async, quantize_quantity, validate_order
+from ..order_store import FINAL_STATUSES, Fill, OrderState, store
+from ..positions import check_order, seed_async
+from .grid_orders import BATCH_ENDPOINT, MAX_CANCEL_BATCH_SIZE, _batch_params, _chunks, _leg_result
+from .twap_engine import _percentile
 
 logger = setup_logger("oco")
-ORDER_ENDPOINT = "/fapi/v1/order/oco"
+ORDER_ENDPOINT = "/fapi/v1/order"
+TP, SL = 0, 1
+LEG_NAMES = ("tp", "sl")
+PENDING, ACTIVE, DONE, CANCELLED, FAILED = "PENDING", "ACTIVE", "DONE", "CANCELLED", "FAILED"
+PLACE_TIMEOUT = 30  # seconds the blocking helpers wait for both legs to be acked
+LATENCY_WINDOW = 10000  # reactions kept for the status percentiles
+EPSILON = 1e-12
 
-def place_oco_order(symbol: str, side: str, quantity: float, take_profit_price: float, stop_price: float, stop_limit_price: float, time_in_force: str = "GTC"):
-    """
-    Create an OCO order with take-profit and stop-limit legs.
-    """
+def _validate_oco(symbol: str, side: str, quantity: float, take_profit_price: float, stop_price: float, stop_limit_price: float, position_side: str = "BOTH", reduce_only: bool = True) -> bool:
     if not (validate_symbol(symbol) and validate_side(side) and validate_quantity(quantity)):
-        return None
-    if not (validate_price(take_profit_price) and validate_price(stop_price) and validate_price(stop_limit_price)):
+        return False
+    if not (validate_price(take_profit_price) and validate_price(stop_price) and validate_price(stop_limit_price)
+            and all(validate_order(symbol, quantity, p) for p in (take_profit_price, stop_price, stop_limit_price))):
         logger.error("Invalid prices for OCO order.")
+        return False
+    # at most one leg's quantity ever fills, so the pair counts once
+    return check_order(symbol, side, quantity, take_profit_price, position_side, reduce_only and position_side.upper() == "BOTH")
+
+class OCOPair:
+    """
+    One take-profit/stop-loss pair. The stop leg may be replaced (cancel, then place
+    the smaller quantity), so each leg carries a seq that is part of its clientOrderId;
+    fills are kept per (leg, seq) so a replaced order's late fills still count.
+    """
+
+    __slots__ = ("pair_id", "symbol", "side", "quantity", "prices", "time_in_force", "position_side", "reduce_only",
+                 "state", "seqs", "qtys", "order_ids", "statuses", "executed", "triggered", "cancelled", "ours",
+                 "busy", "reaction_ms", "created_at", "finished_at", "placed", "done")
+
+    def __init__(self, pair_id: int, symbol: str, side: str, quantity: float, take_profit_price: float, stop_price: float, stop_limit_price: float, time_in_force: str = "GTC", position_side: str = "BOTH", reduce_only: bool = True):
+        self.pair_id = pair_id
+        self.symbol = symbol.upper()
+        self.side = side.upper()
+        self.quantity = quantity
+        self.prices = (take_profit_price, stop_price, stop_limit_price)
+        self.time_in_force = time_in_force  # of the stop leg's limit once triggered; the take-profit rests GTC
+        self.position_side = position_side.upper()
+        self.reduce_only = reduce_only and self.position_side == "BOTH"  # hedge mode closes by positionSide and rejects reduceOnly
+        self.state = PENDING
+        self.seqs = [1, 1]
+        self.qtys = [quantity, quantity]          # orig quantity of each leg's current order
+        self.order_ids = [0, 0]                   # 0 until acked
+        self.statuses = ["", ""]                  # "" until the exchange reports the current order
+        self.executed: Dict[Tuple[int, int], float] = {}
+        self.triggered = False                    # stop leg converted to its limit/market order
+        self.cancelled = False                    # cancelled by us, or a leg was cancelled outside the registry
+        self.ours: set = set()                    # (leg, seq) cancels we sent
+        self.busy = [False, False]                # cancel/replace in flight; re-evaluated when it settles
+        self.reaction_ms: Optional[float] = None  # first event -> sibling cancel sent
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.placed = threading.Event()
+        self.done = threading.Event()
+
+    def client_order_id(self, prefix: str, leg: int) -> str:
+        return f"{prefix}{self.pair_id}_{LEG_NAMES[leg]}_{self.seqs[leg]}"
+
+    def filled(self, leg: Optional[int] = None) -> float:
+        return sum(qty for (l, _), qty in self.executed.items() if leg is None or l == leg)
+
+    def is_open(self, leg: int) -> bool:
+        return self.statuses[leg] not in FINAL_STATUSES
+
+    def open_qty(self, leg: int) -> float:
+        if not self.is_open(leg):
+            return 0.0
+        return max(0.0, self.qtys[leg] - self.executed.get((leg, self.seqs[leg]), 0.0))
+
+    @property
+    def outcome(self) -> Optional[str]:
+        tp, sl = self.filled(TP) > EPSILON, self.filled(SL) > EPSILON
+        return "BOTH" if tp and sl else "TAKE_PROFIT" if tp else "STOP_LOSS" if sl else None
+
+    def status(self) -> Dict:
+        return {
+            "pair_id": self.pair_id,
+            "symbol": self.symbol,
+            "side": self.side,
+            "quantity": self.quantity,
+            "take_profit_price": self.prices[0],
+            "stop_price": self.prices[1],
+            "stop_limit_price": self.prices[2],
+            "state": self.state,
+            "outcome": self.outcome,
+            "filled": self.filled(),
+            "take_profit_order": self.order_ids[TP],
+            "stop_order": self.order_ids[SL],
+            "legs": {LEG_NAMES[leg]: {"status": self.statuses[leg], "quantity": self.qtys[leg], "filled": self.filled(leg)} for leg in (TP, SL)},
+            "triggered": self.triggered,
+            "reaction_ms": self.reaction_ms,
+        }
+
+class OCOEngine:
+    """
+    Registry of live OCO pairs on one event loop. Pass a running loop, or call
+    start() to run one in a background thread. Fills and triggers arrive through
+    the order store, so either the user data stream or a simulator must feed it.
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self._loop = loop
+        self._thread: Optional[threading.Thread] = None
+        self._ids = itertools.count(1)
+        # clientOrderIds are "<prefix><pair>_<tp|sl>_<seq>"; the prefix keeps restarts apart
+        self._prefix = f"oc{int(time.time() * 1000) % 16 ** 7:x}_"
+        self.pairs: Dict[int, OCOPair] = {}
+        self.reaction_latency = deque(maxlen=LATENCY_WINDOW)  # event received -> sibling cancel sent
+        self.cancel_latency = deque(maxlen=LATENCY_WINDOW)    # event received -> sibling cancel acked
+        self._cancels: Dict[str, List[Tuple[OCOPair, int, int, float]]] = {}  # symbol -> (pair, leg, seq, event received)
+        self._on_done: List[Callable[[OCOPair], None]] = []
+        self._listening = False
+
+    def start(self, user_stream: bool = True) -> "OCOEngine":
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="oco-engine", daemon=True)
+            self._thread.start()
+        if not self._listening:
+            store.add_listener(self._on_order)
+            self._listening = True
+        if user_stream:
+            from ..user_stream import start_user_stream
+            start_user_stream()
+        return self
+
+    def stop(self, cancel_orders: bool = True) -> None:
+        if cancel_orders and self._loop:
+            for pair_id in list(self.pairs):
+                self.cancel(pair_id)
+            deadline = time.monotonic() + PLACE_TIMEOUT
+            for pair in list(self.pairs.values()):
+                pair.done.wait(max(0.0, deadline - time.monotonic()))
+        store.remove_listener(self._on_order)
+        self._listening = False
+        if self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._thread = None
+            self._loop = None
+
+    def add_done_callback(self, callback: Callable[[OCOPair], None]) -> None:
+        self._on_done.append(callback)
+
+    def _call(self, fn, *args) -> None:
+        if self._loop is None:
+            self.start()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            fn(*args)
+        else:
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    # -------- Pair control --------
+    def add_pair(self, symbol: str, side: str, quantity: float, take_profit_price: float, stop_price: float, stop_limit_price: float, time_in_force: str = "GTC", position_side: str = "BOTH", reduce_only: bool = True) -> Optional[OCOPair]:
+        """Validate and place both legs; returns at once, pair.placed is set when both are acked (or placement failed)"""
+        if not _validate_oco(symbol, side, quantity, take_profit_price, stop_price, stop_limit_price, position_side, reduce_only):
+            return None
+        pair = OCOPair(next(self._ids), symbol, side, quantity, take_profit_price, stop_price, stop_limit_price, time_in_force, position_side, reduce_only)
+        self.pairs[pair.pair_id] = pair
+        self._call(self._launch, pair)
+        return pair
+
+    async def add_pair_async(self, symbol: str, side: str, quantity: float, take_profit_price: float, stop_price: float, stop_limit_price: float, time_in_force: str = "GTC", position_side: str = "BOTH", reduce_only: bool = True) -> Optional[OCOPair]:
+        """add_pair from a coroutine on the engine's loop; returns once both legs are acked (or placement failed)"""
+        await preload_async(symbol)
+        await seed_async()
+        if not _validate_oco(symbol, side, quantity, take_profit_price, stop_price, stop_limit_price, position_side, reduce_only):
+            return None
+        pair = OCOPair(next(self._ids), symbol, side, quantity, take_profit_price, stop_price, stop_limit_price, time_in_force, position_side, reduce_only)
+        self.pairs[pair.pair_id] = pair
+        pair.state = ACTIVE
+        await self._place(pair)
+        return pair
+
+    def cancel(self, pair_id: int) -> None:
+        """Cancel both legs; the pair finishes (and done callbacks run) once the exchange confirms"""
+        self._call(self._cancel_pair, pair_id)
+
+    def status(self, pair_id: Optional[int] = None):
+        if pair_id is not None:
+            return self.pairs[pair_id].status()
+        return [pair.status() for pair in self.pairs.values()]
+
+    def latency(self) -> Dict:
+        reaction_ms = [s * 1000 for s in self.reaction_latency]
+        ack_ms = [s * 1000 for s in self.cancel_latency]
+        return {
+            "pairs": len(self.pairs),
+            "reactions": len(reaction_ms),
+            "reaction_p50_ms": _percentile(reaction_ms, 50),
+            "reaction_p99_ms": _percentile(reaction_ms, 99),
+            "reaction_max_ms": max(reaction_ms, default=0.0),
+            "cancel_ack_p50_ms": _percentile(ack_ms, 50),
+            "cancel_ack_p99_ms": _percentile(ack_ms, 99),
+        }
+
+    def _launch(self, pair: OCOPair) -> None:
+        pair.state = ACTIVE
+        asyncio.ensure_future(self._place(pair))
+
+    def _cancel_pair(self, pair_id: int) -> None:
+        pair = self.pairs.get(pair_id)
+        if pair is None or pair.state not in (PENDING, ACTIVE):
+            return
+        pair.cancelled = True
+        self._react(pair, time.monotonic())
+
+    # -------- Event handling --------
+    def _on_order(self, state: OrderState, fill: Optional[Fill]) -> None:
+        """Order store listener; runs on whichever thread delivered the update"""
+        if not state.client_order_id.startswith(self._prefix) or self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._apply, state.client_order_id, state.status, state.type, state.executed_qty, state.order_id, time.monotonic())
+
+    def _apply(self, client_order_id: str, status: str, order_type: str, executed: float, order_id: int, received: float) -> None:
+        pair_id, leg_name, seq = client_order_id[len(self._prefix):].split("_")
+        pair = self.pairs.get(int(pair_id))
+        if pair is None or pair.state not in (PENDING, ACTIVE):
+            return
+        leg, seq = LEG_NAMES.index(leg_name), int(seq)
+        key = (leg, seq)
+        pair.executed[key] = max(pair.executed.get(key, 0.0), executed)  # a replaced order's late fills still count
+        if seq != pair.seqs[leg]:
+            self._react(pair, received)
+            return
+        pair.order_ids[leg] = order_id or pair.order_ids[leg]
+        if pair.statuses[leg] not in FINAL_STATUSES:
+            pair.statuses[leg] = status  # a late NEW/PARTIALLY_FILLED must not reopen a finished order
+        if leg == SL and (order_type in ("LIMIT", "MARKET") or executed > EPSILON):
+            pair.triggered = True
+        if status in FINAL_STATUSES and status != "FILLED" and key not in pair.ours and not (leg == SL and pair.triggered):
+            logger.warning(f"OCO {pair.pair_id} {pair.symbol} {LEG_NAMES[leg]} order {status.lower()} outside the registry; cancelling the pair")
+            pair.cancelled = True
+        self._react(pair, received)
+
+    def _target(self, pair: OCOPair, leg: int) -> Optional[float]:
+        """Quantity this leg should rest with, or None to leave it as it is"""
+        if pair.cancelled:
+            return 0.0
+        if leg == TP and (pair.triggered or pair.statuses[SL] == "FILLED"):
+            return 0.0
+        if leg == SL:
+            if pair.statuses[TP] == "FILLED":
+                return 0.0
+            if pair.filled(TP) > EPSILON:
+                return quantize_quantity(pair.symbol, pair.quantity - pair.filled())
         return None
 
-    params = {
-        "symbol": symbol.upper(),
-        "side": side.upper(),
-        "quantity": quantity,
-        "price": take_profit_price,
-        "stopPrice": stop_price,
-        "stopLimitPrice": stop_limit_price,
-        "stopLimitTimeInForce": time_in_force,
-    }
+    def _react(self, pair: OCOPair, received: float) -> None:
+        for leg in (TP, SL):
+            if pair.busy[leg]:
+                continue
+            target = self._target(pair, leg)
+            if target is None or not pair.is_open(leg) or pair.open_qty(leg) <= target + EPSILON:
+                continue
+            if leg == SL and pair.triggered and target:
+                continue  # a triggered stop is already closing; never shrink it mid-execution
+            pair.busy[leg] = True
+            pair.ours.add((leg, pair.seqs[leg]))
+            if pair.reaction_ms is None and pair.state == ACTIVE and not pair.cancelled:
+                pair.reaction_ms = (time.monotonic() - received) * 1000
+            self._queue_cancel(pair, leg, received)
+        self._check_done(pair)
 
-    try:
-        res = make_request("POST", ORDER_ENDPOINT, params, signed=True)
-        logger.info(f"OCO order placed successfully: {res}")
-        return res
-    except Exception:
-        logger.exception("Failed to place OCO order.")
+    def _check_done(self, pair: OCOPair) -> None:
+        if pair.state != ACTIVE or not pair.placed.is_set() or any(pair.busy) or pair.is_open(TP) or pair.is_open(SL):
+            return
+        filled = pair.filled()
+        self._finish(pair, DONE if not pair.cancelled or filled >= pair.quantity - EPSILON else CANCELLED)
+        logger.info(f"OCO {pair.pair_id} {pair.symbol} {pair.state.lower()}: {pair.outcome or 'nothing'} filled {filled}/{pair.quantity}, reaction {pair.reaction_ms or 0:.3f}ms")
+
+    def _finish(self, pair: OCOPair, state: str) -> None:
+        pair.state = state
+        pair.finished_at = time.time()
+        self.pairs.pop(pair.pair_id, None)
+        pair.placed.set()
+        pair.done.set()
+        for callback in list(self._on_done):
+            try:
+                callback(pair)
+            except Exception:
+                logger.exception(f"OCO done callback failed for pair {pair.pair_id}")
+
+    # -------- Order placement --------
+    def _leg_params(self, pair: OCOPair, leg: int) -> Dict:
+        params = {
+            "symbol": pair.symbol,
+            "side": pair.side,
+            "positionSide": pair.position_side,
+            "quantity": pair.qtys[leg],
+            "newClientOrderId": pair.client_order_id(self._prefix, leg),
+        }
+        if leg == TP:
+            params.update(type="LIMIT", price=pair.prices[0], timeInForce="GTC")
+        else:
+            params.update(type="STOP", stopPrice=pair.prices[1], price=pair.prices[2], timeInForce=pair.time_in_force)
+        if pair.reduce_only:
+            params["reduceOnly"] = "true"
+        return params
+
+    async def _place(self, pair: OCOPair) -> None:
+        """Both legs in one batchOrders call; if only one is accepted it is cancelled"""
+        orders = [self._leg_params(pair, TP), self._leg_params(pair, SL)]
+        try:
+            responses = [_leg_result(r) for r in await make_request_async("POST", BATCH_ENDPOINT, _batch_params(orders), signed=True)]
+        except Exception as e:
+            responses = [e, e]
+        errors = [res for res in responses if isinstance(res, BaseException)]
+        for leg, res in zip((TP, SL), responses):
+            if isinstance(res, BaseException):
+                pair.statuses[leg] = "REJECTED"
+            else:
+                pair.order_ids[leg] = int(res["orderId"])
+                if pair.statuses[leg] not in FINAL_STATUSES:
+                    pair.statuses[leg] = res.get("status", "NEW")
+        if errors:
+            logger.error(f"OCO {pair.pair_id} {pair.symbol} placement failed: {errors[0]}")
+            pair.cancelled = True
+            for leg in (TP, SL):
+                if pair.is_open(leg):
+                    pair.ours.add((leg, pair.seqs[leg]))
+                    self._queue_cancel(pair, leg, time.monotonic())
+            self._finish(pair, FAILED)
+            return
+        logger.info(f"OCO {pair.pair_id} {pair.symbol} {pair.side} {pair.quantity}: TP {pair.prices[0]} (order {pair.order_ids[TP]}), SL {pair.prices[1]}/{pair.prices[2]} (order {pair.order_ids[SL]})")
+        pair.placed.set()
+        self._react(pair, time.monotonic())  # a leg may already have filled while the batch was in flight
+
+    def _queue_cancel(self, pair: OCOPair, leg: int, received: float) -> None:
+        pending = self._cancels.setdefault(pair.symbol, [])
+        pending.append((pair, leg, pair.seqs[leg], received))
+        if len(pending) == 1:
+            # Every cancel raised during this loop iteration goes out together
+            self._loop.call_soon(self._flush, pair.symbol)
+
+    def _flush(self, symbol: str) -> None:
+        pending = self._cancels.pop(symbol, [])
+        for chunk in _chunks(pending, MAX_CANCEL_BATCH_SIZE):
+            asyncio.ensure_future(self._send_cancels(symbol, chunk))
+
+    async def _send_cancels(self, symbol: str, chunk: List[Tuple[OCOPair, int, int, float]]) -> None:
+        # by clientOrderId: the leg may not be acked yet
+        ids = [f"{self._prefix}{pair.pair_id}_{LEG_NAMES[leg]}_{seq}" for pair, leg, seq, _ in chunk]
+        sent = time.monotonic()
+        for _, _, _, received in chunk:
+            self.reaction_latency.append(sent - received)
+        try:
+            if len(ids) == 1:
+                responses = [await make_request_async("DELETE", ORDER_ENDPOINT, {"symbol": symbol, "origClientOrderId": ids[0]}, signed=True)]
+            else:
+                params = {"symbol": symbol, "origClientOrderIdList": json.dumps(ids, separators=(",", ":"))}
+                responses = [_leg_result(r) for r in await make_request_async("DELETE", BATCH_ENDPOINT, params, signed=True)]
+        except Exception as e:
+            responses = [e] * len(ids)
+        acked = time.monotonic()
+        for (pair, leg, seq, received), res in zip(chunk, responses):
+            if isinstance(res, BaseException):
+                # usually already filled or cancelled; the order's own event settles it
+                logger.warning(f"OCO {pair.pair_id} {pair.symbol} {LEG_NAMES[leg]} cancel failed: {res}")
+                metrics.count_retry("oco", type(res).__name__)
+            else:
+                self.cancel_latency.append(acked - received)
+                key = (leg, seq)
+                pair.executed[key] = max(pair.executed.get(key, 0.0), float(res.get("executedQty", 0) or 0))
+                if seq == pair.seqs[leg]:
+                    pair.statuses[leg] = res.get("status", "CANCELED")
+            if isinstance(res, BaseException) or seq != pair.seqs[leg]:
+                pair.busy[leg] = False
+                self._react(pair, received)
+                continue
+            target = self._target(pair, leg)
+            if target and not pair.cancelled:
+                asyncio.ensure_future(self._replace(pair, leg, target, received))
+            else:
+                pair.busy[leg] = False
+                self._react(pair, received)
+
+    async def _replace(self, pair: OCOPair, leg: int, quantity: float, received: float) -> None:
+        """Place the smaller leg that replaces a cancelled one (the exchange has no in-place modify)"""
+        pair.seqs[leg] += 1
+        pair.qtys[leg] = quantity
+        pair.statuses[leg] = ""
+        pair.order_ids[leg] = 0
+        try:
+            res = await make_request_async("POST", ORDER_ENDPOINT, self._leg_params(pair, leg), signed=True)
+            pair.order_ids[leg] = int(res["orderId"])
+            if pair.statuses[leg] not in FINAL_STATUSES:
+                pair.statuses[leg] = res.get("status", "NEW")
+            logger.info(f"OCO {pair.pair_id} {pair.symbol} {LEG_NAMES[leg]} resized to {quantity}")
+        except Exception as e:
+            pair.statuses[leg] = "REJECTED"
+            logger.error(f"OCO {pair.pair_id} {pair.symbol} {LEG_NAMES[leg]} replacement for {quantity} failed, leaving it unprotected: {e}")
+        pair.busy[leg] = False
+        self._react(pair, received)
+
+_engine: Optional[OCOEngine] = None
+_engine_lock = threading.Lock()
+_loop_engines: Dict[int, OCOEngine] = {}
+
+def default_engine() -> OCOEngine:
+    """Shared engine on a background thread, fed by the user data stream"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = OCOEngine().start()
+    return _engine
+
+def loop_engine() -> OCOEngine:
+    """Engine on the running event loop, fed by the user data stream; pairs placed from it never leave the loop"""
+    loop = asyncio.get_running_loop()
+    engine = _loop_engines.get(id(loop))
+    if engine is None or engine._loop is not loop:
+        engine = _loop_engines[id(loop)] = OCOEngine(loop).start()
+    return engine
+
+def place_oco_order(symbol: str, side: str, quantity: float, take_profit_price: float, stop_price: float, stop_limit_price: float, time_in_force: str = "GTC", position_side: str = "BOTH", reduce_only: bool = True, wait: bool = False) -> Optional[Dict]:
+    """
+    Place a take-profit/stop-limit pair on the shared engine. Returns the pair's
+    status once both legs are acked; with wait=True, blocks until the pair finishes.
+    The sibling is only cancelled while this process runs.
+    """
+    pair = default_engine().add_pair(symbol, side, quantity, take_profit_price, stop_price, stop_limit_price, time_in_force, position_side, reduce_only)
+    if pair is None or not pair.placed.wait(PLACE_TIMEOUT) or pair.state == FAILED:
         return None
+    if wait:
+        pair.done.wait()
+    return pair.status()
+
+async def place_oco_order_async(symbol: str, side: str, quantity: float, take_profit_price: float, stop_price: float, stop_limit_price: float, time_in_force: str = "GTC", position_side: str = "BOTH", reduce_only: bool = True) -> Optional[Dict]:
+    """
+    Async variant of place_oco_order (without wait): both legs go out in one batchOrders
+    call on the running loop and stay linked by that loop's engine while it runs.
+    """
+    pair = await loop_engine().add_pair_async(symbol, side, quantity, take_profit_price, stop_price, stop_limit_price, time_in_force, position_side, reduce_only)
+    if pair is None or pair.state == FAILED:
+        return None
+    return pair.status()
 
 def main():
     parser = argparse.ArgumentParser(description="Place OCO (One-Cancels-the-Other) order on Binance Futures")
@@ -57,16 +482,27 @@ def main():
     parser.add_argument("take_profit_price", type=float, help="Take-profit limit price")
     parser.add_argument("stop_price", type=float, help="Stop trigger price")
     parser.add_argument("stop_limit_price", type=float, help="Stop-limit execution price")
-    parser.add_argument("--time-in-force", default="GTC", choices=["GTC", "IOC", "FOK"])
+    parser.add_argument("--time-in-force", default="GTC", choices=["GTC", "IOC", "FOK"], help="of the stop leg once triggered")
+    parser.add_argument("--position-side", default="BOTH", choices=["BOTH", "LONG", "SHORT"])
+    parser.add_argument("--reduce-only", action="store_true", default=True, help="the default: the legs only close a position")
+    parser.add_argument("--no-reduce-only", dest="reduce_only", action="store_false", help="let the legs open or add to a position")
     args = parser.parse_args()
 
     print(f"\nPlacing OCO for {args.symbol}: side={args.side}, qty={args.quantity}, TP={args.take_profit_price}, SL={args.stop_price}")
-    result = place_oco_order(args.symbol, args.side, args.quantity, args.take_profit_price, args.stop_price, args.stop_limit_price, args.time_in_force)
-
-    if result:
-        print("✅ OCO order placed successfully.")
-    else:
+    metrics.serve_from_config()
+    engine = default_engine()
+    pair = engine.add_pair(args.symbol, args.side, args.quantity, args.take_profit_price, args.stop_price, args.stop_limit_price, args.time_in_force, args.position_side, args.reduce_only)
+    if pair is None or not pair.placed.wait(PLACE_TIMEOUT) or pair.state == FAILED:
         print("❌ OCO order failed. Check bot.log for details.")
+        return
+    print(f"✅ OCO placed: TP order {pair.order_ids[TP]}, SL order {pair.order_ids[SL]}. Watching for fills (Ctrl-C cancels both legs)...")
+    try:
+        pair.done.wait()
+    except KeyboardInterrupt:
+        print("Cancelling both legs...")
+        engine.stop()
+    s = pair.status()
+    print(f"{s['symbol']}: {s['state']}, {s['outcome'] or 'nothing'} filled {s['filled']}/{s['quantity']}, reaction {s['reaction_ms'] or 0:.3f}ms")
 
 if __name__ == "__main__":
     main()
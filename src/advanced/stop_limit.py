@@ -5,30 +5,32 @@ Triggers a limit order once the stop price is reached.
 
 import argparse
 import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from typing import Dict
 
 from ..utils import (
     make_request,
+    make_request_async,
     validate_symbol,
     validate_side,
     validate_quantity,
     validate_price,
     get_current_price,
+    get_current_price_async,
     setup_logger,
 )
+from ..logger import order_fields
+from ..exchange_info import preload_async, validate_order
+from ..positions import check_order, seed_async
 
 logger = setup_logger("stop_limit")
 ORDER_ENDPOINT = "/fapi/v1/order"
 
-def place_stop_limit_order(symbol: str, side: str, quantity: float, price: float, stop_price: float, time_in_force: str = "GTC", position_side: str = "BOTH", reduce_only: bool = False, working_type: str = "CONTRACT_PRICE"):
-    if not (validate_symbol(symbol) and validate_side(side) and validate_quantity(quantity) and validate_price(price) and validate_price(stop_price)):
-        return None
-
-    current = get_current_price(symbol)
-    if current:
-        logger.info(f"Current price: {current}")
+def _validate_stop_limit(symbol: str, side: str, quantity: float, price: float, stop_price: float, position_side: str = "BOTH", reduce_only: bool = False) -> bool:
+    return (validate_symbol(symbol) and validate_side(side) and validate_quantity(quantity) and validate_price(price) and validate_price(stop_price)
+            and validate_order(symbol, quantity, price) and validate_order(symbol, quantity, stop_price)
+            and check_order(symbol, side, quantity, price, position_side, reduce_only))
 
+def _stop_limit_params(symbol: str, side: str, quantity: float, price: float, stop_price: float, time_in_force: str = "GTC", position_side: str = "BOTH", reduce_only: bool = False, working_type: str = "CONTRACT_PRICE") -> Dict:
     params = {
         "symbol": symbol.upper(),
         "side": side.upper(),
@@ -42,10 +44,39 @@ def place_stop_limit_order(symbol: str, side: str, quantity: float, price: float
     }
     if reduce_only:
         params["reduceOnly"] = "true"
+    return params
+
+def place_stop_limit_order(symbol: str, side: str, quantity: float, price: float, stop_price: float, time_in_force: str = "GTC", position_side: str = "BOTH", reduce_only: bool = False, working_type: str = "CONTRACT_PRICE"):
+    if not _validate_stop_limit(symbol, side, quantity, price, stop_price, position_side, reduce_only):
+        return None
+
+    current = get_current_price(symbol)
+    if current:
+        logger.info(f"Current price: {current}")
 
+    params = _stop_limit_params(symbol, side, quantity, price, stop_price, time_in_force, position_side, reduce_only, working_type)
     try:
         res = make_request("POST", ORDER_ENDPOINT, params, signed=True)
-        logger.info(f"Stop-limit order placed: {res}")
+        logger.info("Stop-limit order placed: %s", res, extra=order_fields(res))
+        return res
+    except Exception:
+        logger.exception("Failed to place stop-limit order")
+        return None
+
+async def place_stop_limit_order_async(symbol: str, side: str, quantity: float, price: float, stop_price: float, time_in_force: str = "GTC", position_side: str = "BOTH", reduce_only: bool = False, working_type: str = "CONTRACT_PRICE"):
+    await preload_async(symbol)
+    await seed_async()
+    if not _validate_stop_limit(symbol, side, quantity, price, stop_price, position_side, reduce_only):
+        return None
+
+    current = await get_current_price_async(symbol)
+    if current:
+        logger.info(f"Current price: {current}")
+
+    params = _stop_limit_params(symbol, side, quantity, price, stop_price, time_in_force, position_side, reduce_only, working_type)
+    try:
+        res = await make_request_async("POST", ORDER_ENDPOINT, params, signed=True)
+        logger.info("Stop-limit order placed: %s", res, extra=order_fields(res))
         return res
     except Exception:
         logger.exception("Failed to place stop-limit order")
@@ -1,75 +1,365 @@
 """
 TWAP (Time-Weighted Average Price) Strategy
-Executes multiple small orders over a set duration.
+Executes multiple small orders over a set duration: equal slices (TWAP), slices
+sized by the symbol's intraday volume profile (VWAP), or slices sized from live
+traded volume (POV). Each slice records expected vs actual participation and its
+slippage against the price when it went out.
 """
 
 import argparse
 import sys
-import os
 import time
-from typing import Optional, List, Dict
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from typing import Callable, Optional, List, Dict, Tuple, Union
 
+from .. import market_data
 from ..utils import (
     make_request,
+    make_request_async,
     validate_symbol,
     validate_side,
     validate_quantity,
     get_current_price,
     setup_logger,
 )
+from ..exchange_info import get_symbol_filters, preload_async, quantize_quantity, validate_order
+from ..positions import check_order, seed_async
+from ..order_store import store
+from ..logger import order_fields
+from ..config import BOOK_PRICE_MODES, MIN_ORDER_SIZE, POV_DEFAULT_RATE, RISK_CHECKS_ENABLED, TWAP_MODES
 
 logger = setup_logger("twap")
 ORDER_ENDPOINT = "/fapi/v1/order"
 
+def _book_priced(limit_price) -> bool:
+    return isinstance(limit_price, str) and limit_price.lower() in BOOK_PRICE_MODES
+
+def _slice_price(symbol: str, side: str, quantity: float, limit_price: Union[float, str]) -> float:
+    """Fixed limit price, or one read from the local order book as the slice goes out"""
+    if not _book_priced(limit_price):
+        return float(limit_price)
+    from ..order_book import book_price
+    price = book_price(symbol, side, quantity, limit_price)
+    if price is None:
+        raise ValueError(f"no {limit_price} price from the {symbol.upper()} order book")
+    return price
+
+def _arrival_price(symbol: str) -> Optional[float]:
+    """Streamed price as a slice goes out, for slippage; None without a fresh one (never a REST call on the slice path)"""
+    return market_data.get_cached_price(symbol)
+
+def _min_quantity(symbol: str, market: bool, price: Optional[float]) -> float:
+    """Smallest slice the symbol filters and the risk check accept (0 when unknown)"""
+    least = MIN_ORDER_SIZE if RISK_CHECKS_ENABLED else 0.0
+    f = get_symbol_filters(symbol)
+    if f is None:
+        return least
+    least = max(least, f.market_min_qty if market else f.min_qty)
+    if f.min_notional and price:
+        least = max(least, f.min_notional / price)
+    return least
+
 class TWAPOrder:
-    def __init__(self):
+    def __init__(self, sleep: Callable[[float], None] = time.sleep, clock: Callable[[], float] = time.time, volume: Optional[Callable[[str], Optional[float]]] = None):
         self.executed_orders: List[Dict] = []
+        self.slices: List[Dict] = []  # one record per slice, sent or skipped; see slice_report()
+        self.mode = "TWAP"
+        self.participation: Optional[float] = None
+        self._sleep = sleep  # the backtester swaps in its simulated clock
+        self._clock = clock
+        self._volume = volume or market_data.traded_volume  # cumulative traded quantity, None when unknown
+        self._volume_symbol = self._side_sign = None
+        self._total = self._sent = self._min_qty = 0.0
+        self._start_mark = self._last_mark = None
+        self._open: Optional[Dict] = None  # slice whose market-volume window is still running
+        self._expected: List[Optional[float]] = []
 
-    def execute_twap(self, symbol: str, side: str, total_quantity: float, intervals: int, duration_seconds: int, order_type: str = "MARKET", limit_price: Optional[float] = None, position_side: str = "BOTH") -> Optional[List[Dict]]:
+    def _validate(self, symbol: str, side: str, total_quantity: float, intervals: int, duration_seconds: int) -> bool:
         if not (validate_symbol(symbol) and validate_side(side) and validate_quantity(total_quantity)):
-            return None
+            return False
         if intervals <= 0 or duration_seconds <= 0:
             logger.error("Invalid intervals or duration")
+            return False
+        return True
+
+    @staticmethod
+    def _slice_quantities(symbol: str, side: str, total_quantity: float, intervals: int, order_type: str, limit_price: Union[float, str, None], position_side: str = "BOTH") -> Optional[List[float]]:
+        """Per-slice quantities rounded to the lot step; the last slice takes the remainder"""
+        market = order_type.upper() == "MARKET"
+        qty = quantize_quantity(symbol, total_quantity / intervals, market=market)
+        last = quantize_quantity(symbol, total_quantity - qty * (intervals - 1), market=market)
+        price = float(limit_price) if limit_price and not (market or _book_priced(limit_price)) else None
+        if not (validate_quantity(qty) and validate_order(symbol, qty, price, market=market) and validate_order(symbol, last, price, market=market)):
+            logger.error(f"TWAP slice size {qty} is not tradable for {symbol}; use fewer intervals")
+            return None
+        quantities = [qty] * (intervals - 1) + [last]
+        if not check_order(symbol, side, min(quantities), price, position_side, total=sum(quantities)):
             return None
+        return quantities
+
+    @staticmethod
+    def _weighted_quantities(symbol: str, total_quantity: float, weights: List[float], market: bool, least: float) -> List[float]:
+        """total_quantity split by weights on the lot step; slices too small to trade roll into the next one"""
+        quantities: List[float] = []
+        carry = 0.0
+        for weight in weights:
+            carry += total_quantity * weight
+            qty = quantize_quantity(symbol, carry, market=market)
+            if qty < least:
+                qty = 0.0
+            quantities.append(qty)
+            carry -= qty
+        remainder = quantize_quantity(symbol, total_quantity - sum(quantities), market=market)
+        if remainder > 0:
+            last = max((i for i, q in enumerate(quantities) if q), default=len(quantities) - 1)
+            quantities[last] = quantize_quantity(symbol, quantities[last] + remainder, market=market)
+        return quantities
+
+    def _vwap_quantities(self, symbol: str, side: str, total_quantity: float, intervals: int, duration_seconds: float, order_type: str, limit_price: Union[float, str, None], position_side: str) -> Optional[List[float]]:
+        """Slices proportional to the volume the intraday profile expects in each interval"""
+        from ..volume_profile import get_profile
+
+        start_ms = self._clock() * 1000
+        profile = get_profile(symbol, end_ms=int(start_ms))
+        if profile is None:
+            logger.warning(f"No volume profile for {symbol}; falling back to equal slices")
+            return self._slice_quantities(symbol, side, total_quantity, intervals, order_type, limit_price, position_side)
+        expected = profile.expected_volumes(start_ms, duration_seconds * 1000 / intervals, intervals)
+        weights = expected / expected.sum() if expected.sum() > 0 else [1 / intervals] * intervals
+        market = order_type.upper() == "MARKET"
+        price = float(limit_price) if limit_price and not (market or _book_priced(limit_price)) else None
+        quantities = self._weighted_quantities(symbol, total_quantity, weights, market, _min_quantity(symbol, market, price or get_current_price(symbol)))
+        sized = [q for q in quantities if q]
+        if not sized or not all(validate_order(symbol, q, price, market=market) for q in set(sized)):
+            logger.error(f"VWAP slices {quantities} are not tradable for {symbol}; use fewer intervals")
+            return None
+        if not check_order(symbol, side, min(sized), price, position_side, total=sum(sized)):
+            return None
+        self._expected = [float(v) for v in expected]
+        return quantities
+
+    def _plan(self, symbol: str, side: str, total_quantity: float, intervals: int, duration_seconds: float, order_type: str, limit_price: Union[float, str, None], position_side: str, mode: str, participation: Optional[float]) -> Optional[List[float]]:
+        """Slice quantities for TWAP/VWAP (zeros for POV, sized as each slice goes out) and the run's volume baseline"""
+        mode = mode.upper()
+        if mode not in TWAP_MODES:
+            logger.error(f"Unknown execution mode {mode!r}; expected one of {TWAP_MODES}")
+            return None
+        self.mode = mode
+        self.participation = None
+        self._expected = [None] * intervals
+        if mode == "VWAP":
+            quantities = self._vwap_quantities(symbol, side, total_quantity, intervals, duration_seconds, order_type, limit_price, position_side)
+        elif mode == "POV":
+            participation = POV_DEFAULT_RATE if participation is None else float(participation)
+            if not 0 < participation <= 1:
+                logger.error(f"Participation rate {participation} must be in (0, 1]")
+                return None
+            market = order_type.upper() == "MARKET"
+            price = float(limit_price) if limit_price and not (market or _book_priced(limit_price)) else None
+            if not check_order(symbol, side, total_quantity, price, position_side):
+                return None
+            self.participation = participation
+            self._min_qty = _min_quantity(symbol, market, price or get_current_price(symbol))
+            if self._volume is market_data.traded_volume and market_data.traded_volume(symbol) is None:
+                market_data.subscribe_trades(symbol)
+            quantities = [0.0] * intervals
+        else:
+            quantities = self._slice_quantities(symbol, side, total_quantity, intervals, order_type, limit_price, position_side)
+        if quantities is None:
+            return None
+        self._volume_symbol = symbol.upper()
+        self._side_sign = 1.0 if side.upper() == "BUY" else -1.0
+        self._total = quantize_quantity(symbol, total_quantity, market=order_type.upper() == "MARKET")
+        self._sent = 0.0
+        self._start_mark = self._last_mark = self._volume(symbol)
+        self._open = None
+        return quantities
+
+    def _describe(self, quantities: List[float]) -> str:
+        if self.mode == "POV":
+            return f"up to {self._total} at {self.participation:.1%} of traded volume"
+        sized = [q for q in quantities if q]
+        if self.mode == "VWAP":
+            return f"{len(sized)} orders of {min(sized)}-{max(sized)}"
+        return f"{len(quantities)} orders of {quantities[0]}"
+
+    def _next_slice(self, i: int, quantities: List[float], market: bool) -> Tuple[float, Dict]:
+        """
+        Quantity for slice i and its record. Marks traded volume now, which closes
+        the previous TWAP/VWAP slice's window; a POV slice is sized from (and measured
+        against) the volume traded since the previous mark.
+        """
+        previous, mark = self._last_mark, self._volume(self._volume_symbol)
+        self._last_mark = mark
+        if self._open is not None:
+            self._open["volume_end"] = mark
+            self._open = None
+        record = {"slice": i + 1, "time": int(self._clock() * 1000), "quantity": 0.0, "order_id": None, "arrival_price": None, "expected_volume": self._expected[i], "target_participation": None}
+        if self.mode == "POV":
+            qty = 0.0
+            if mark is not None and self._start_mark is not None:
+                target = min(self._total, self.participation * (mark - self._start_mark))
+                qty = quantize_quantity(self._volume_symbol, target - self._sent, market=market)
+                if qty < self._min_qty or qty <= 0:
+                    qty = 0.0
+            record.update(volume_start=previous, volume_end=mark, target_participation=self.participation)
+        else:
+            qty = quantities[i]
+            record.update(volume_start=mark, volume_end=None)
+            if record["expected_volume"]:
+                record["target_participation"] = qty / record["expected_volume"]
+            self._open = record
+        record["quantity"] = qty
+        self.slices.append(record)
+        return qty, record
+
+    def _slice_sent(self, record: Dict, order: Dict) -> None:
+        self.executed_orders.append(order)
+        record["order_id"] = order.get("orderId")
+        self._sent += record["quantity"]
+
+    def _finish(self, symbol: str) -> None:
+        if self.mode == "POV" and self._sent < self._total:
+            logger.warning(f"POV finished with {self._sent}/{self._total} {symbol} sent; traded volume was too low for {self.participation:.1%} participation")
 
-        qty_per_order = total_quantity / intervals
+    @staticmethod
+    def _slice_params(symbol: str, side: str, quantity: float, order_type: str, limit_price: Union[float, str, None], position_side: str) -> Dict:
+        params = {
+            "symbol": symbol.upper(),
+            "side": side.upper(),
+            "type": order_type.upper(),
+            "quantity": quantity,
+            "positionSide": position_side.upper(),
+        }
+        if order_type.upper() == "LIMIT" and limit_price:
+            params["price"] = _slice_price(symbol, side, quantity, limit_price)
+            params["timeInForce"] = "GTC"
+        return params
+
+    def execute_twap(self, symbol: str, side: str, total_quantity: float, intervals: int, duration_seconds: int, order_type: str = "MARKET", limit_price: Union[float, str, None] = None, position_side: str = "BOTH", mode: str = "TWAP", participation: Optional[float] = None) -> Optional[List[Dict]]:
+        if not self._validate(symbol, side, total_quantity, intervals, duration_seconds):
+            return None
+
+        quantities = self._plan(symbol, side, total_quantity, intervals, duration_seconds, order_type, limit_price, position_side, mode, participation)
+        if quantities is None:
+            return None
+        market = order_type.upper() == "MARKET"
         delay = duration_seconds / intervals
-        logger.info(f"Executing TWAP: {intervals} orders of {qty_per_order} {symbol} every {delay:.2f}s")
+        logger.info(f"Executing {self.mode}: {self._describe(quantities)} {symbol} every {delay:.2f}s")
 
         for i in range(intervals):
-            params = {
-                "symbol": symbol.upper(),
-                "side": side.upper(),
-                "type": order_type.upper(),
-                "quantity": qty_per_order,
-                "positionSide": position_side.upper(),
-            }
-            if order_type.upper() == "LIMIT" and limit_price:
-                params["price"] = limit_price
-                params["timeInForce"] = "GTC"
-
+            if i or self.mode == "POV":  # POV slices follow the volume they are sized from
+                self._sleep(delay)
+            qty, record = self._next_slice(i, quantities, market)
+            if not qty:
+                continue
             try:
+                params = self._slice_params(symbol, side, qty, order_type, limit_price, position_side)
+                record["arrival_price"] = _arrival_price(symbol)
                 order = make_request("POST", ORDER_ENDPOINT, params, signed=True)
-                self.executed_orders.append(order)
-                logger.info(f"TWAP order {i+1}/{intervals} placed: {order.get('orderId')}")
+                self._slice_sent(record, order)
+                logger.info("%s order %d/%d placed: %s", self.mode, i + 1, intervals, order.get("orderId"), extra=order_fields(order))
             except Exception:
-                logger.exception(f"TWAP order {i+1} failed")
+                logger.exception(f"{self.mode} order {i+1} failed")
+
+        self._finish(symbol)
+        return self.executed_orders if self.executed_orders else None
+
+    async def execute_twap_async(self, symbol: str, side: str, total_quantity: float, intervals: int, duration_seconds: int, order_type: str = "MARKET", limit_price: Union[float, str, None] = None, position_side: str = "BOTH", mode: str = "TWAP", participation: Optional[float] = None) -> Optional[List[Dict]]:
+        import asyncio
+
+        if not self._validate(symbol, side, total_quantity, intervals, duration_seconds):
+            return None
 
-            if i < intervals - 1:
-                time.sleep(delay)
+        await preload_async(symbol, market=order_type.upper() == "MARKET")
+        await seed_async()
+        quantities = self._plan(symbol, side, total_quantity, intervals, duration_seconds, order_type, limit_price, position_side, mode, participation)
+        if quantities is None:
+            return None
+        if _book_priced(limit_price):
+            from ..order_book import get_book_async
+            if await get_book_async(symbol) is None:  # sync before the first slice rather than blocking the loop in it
+                return None
+        market = order_type.upper() == "MARKET"
+        delay = duration_seconds / intervals
+        logger.info(f"Executing {self.mode}: {self._describe(quantities)} {symbol} every {delay:.2f}s")
 
+        for i in range(intervals):
+            if i or self.mode == "POV":
+                await asyncio.sleep(delay)
+            qty, record = self._next_slice(i, quantities, market)
+            if not qty:
+                continue
+            try:
+                params = self._slice_params(symbol, side, qty, order_type, limit_price, position_side)
+                record["arrival_price"] = _arrival_price(symbol)
+                order = await make_request_async("POST", ORDER_ENDPOINT, params, signed=True)
+                self._slice_sent(record, order)
+                logger.info("%s order %d/%d placed: %s", self.mode, i + 1, intervals, order.get("orderId"), extra=order_fields(order))
+            except Exception:
+                logger.exception(f"{self.mode} order {i+1} failed")
+
+        self._finish(symbol)
         return self.executed_orders if self.executed_orders else None
 
+    @staticmethod
+    def _latest(order: Dict) -> Dict:
+        """Fill state from the order store (kept current by the user data stream), else the placement ack"""
+        state = store.get(order["orderId"]) if "orderId" in order else None
+        return state.as_dict() if state else order
+
+    def slice_report(self) -> List[Dict]:
+        """
+        Per slice: market volume over its window (the interval after it for TWAP/VWAP,
+        the one before it for POV; None without a traded-volume source), expected vs
+        actual participation, and slippage against the arrival price in basis points
+        (positive = paid more on a buy, received less on a sell).
+        """
+        orders = {o["orderId"]: self._latest(o) for o in self.executed_orders if "orderId" in o}
+        live = self._volume(self._volume_symbol) if self._open is not None else None
+        report = []
+        for r in self.slices:
+            end = r["volume_end"] if r["volume_end"] is not None else (live if r is self._open else None)
+            market_volume = end - r["volume_start"] if end is not None and r["volume_start"] is not None else None
+            order = orders.get(r["order_id"], {})
+            filled = float(order.get("executedQty", 0) or 0)
+            avg_price = float(order.get("avgPrice", 0) or 0)
+            arrival = r["arrival_price"]
+            report.append({
+                "slice": r["slice"],
+                "time": r["time"],
+                "quantity": r["quantity"],
+                "filled": filled,
+                "avg_price": avg_price,
+                "arrival_price": arrival,
+                "slippage_bps": self._side_sign * (avg_price - arrival) / arrival * 1e4 if filled and avg_price and arrival else None,
+                "expected_volume": r["expected_volume"],
+                "market_volume": market_volume,
+                "expected_participation": r["target_participation"],
+                "actual_participation": filled / market_volume if market_volume else None,
+            })
+        return report
+
     def get_summary(self) -> Dict:
-        total_qty = sum(float(o.get("executedQty", 0)) for o in self.executed_orders)
+        orders = [self._latest(o) for o in self.executed_orders]
+        total_qty = sum(float(o.get("executedQty", 0)) for o in orders)
         avg_price = (
-            sum(float(o.get("avgPrice", 0) or 0) * float(o.get("executedQty", 0)) for o in self.executed_orders)
+            sum(float(o.get("avgPrice", 0) or 0) * float(o.get("executedQty", 0)) for o in orders)
             / total_qty
             if total_qty
             else 0
         )
-        return {"orders": len(self.executed_orders), "total_quantity": total_qty, "average_price": avg_price}
+        report = self.slice_report()
+        measured = [r for r in report if r["market_volume"]]
+        slipped = [r for r in report if r["slippage_bps"] is not None]
+        slipped_qty = sum(r["filled"] for r in slipped)
+        return {
+            "orders": len(self.executed_orders),
+            "total_quantity": total_qty,
+            "average_price": avg_price,
+            "mode": self.mode,
+            "participation": sum(r["filled"] for r in measured) / sum(r["market_volume"] for r in measured) if measured and sum(r["market_volume"] for r in measured) > 0 else None,
+            "slippage_bps": sum(r["slippage_bps"] * r["filled"] for r in slipped) / slipped_qty if slipped_qty else None,
+        }
 
 def main():
     parser = argparse.ArgumentParser(description="Execute TWAP strategy")
@@ -78,25 +368,31 @@ def main():
     parser.add_argument("quantity", type=float)
     parser.add_argument("--intervals", type=int, default=10)
     parser.add_argument("--duration", type=int, default=300)
-    parser.add_argument("--limit-price", type=float)
+    parser.add_argument("--limit-price", help=f"fixed price, or {'/'.join(BOOK_PRICE_MODES)} to price each slice from the local order book")
     parser.add_argument("--position-side", default="BOTH", choices=["BOTH", "LONG", "SHORT"])
+    parser.add_argument("--mode", type=str.upper, default="TWAP", choices=TWAP_MODES, help="equal slices, volume-profile slices, or percentage of live volume")
+    parser.add_argument("--participation", type=float, default=POV_DEFAULT_RATE, help="POV share of traded volume, e.g. 0.1")
     args = parser.parse_args()
 
     order_type = "LIMIT" if args.limit_price else "MARKET"
-    print(f"\n⚠️  TWAP will place {args.intervals} {order_type} orders over {args.duration}s.")
+    print(f"\n⚠️  {args.mode} will place up to {args.intervals} {order_type} orders over {args.duration}s.")
     confirm = input("Proceed? (yes/no): ").strip().lower()
     if confirm not in ("yes", "y"):
         print("Cancelled.")
         sys.exit(0)
 
     twap = TWAPOrder()
-    result = twap.execute_twap(args.symbol, args.side, args.quantity, args.intervals, args.duration, order_type, args.limit_price, args.position_side)
+    result = twap.execute_twap(args.symbol, args.side, args.quantity, args.intervals, args.duration, order_type, args.limit_price, args.position_side, args.mode, args.participation)
     if result:
         summary = twap.get_summary()
-        print("\n✅ TWAP Execution Completed")
+        print(f"\n✅ {summary['mode']} Execution Completed")
         print(f"Total Orders: {summary['orders']}")
         print(f"Total Quantity: {summary['total_quantity']}")
         print(f"Average Price: {summary['average_price']}")
+        if summary["participation"] is not None:
+            print(f"Participation: {summary['participation']:.2%}")
+        if summary["slippage_bps"] is not None:
+            print(f"Slippage: {summary['slippage_bps']:.2f} bps")
     else:
         print("❌ TWAP execution failed. Check bot.log for details.")
 
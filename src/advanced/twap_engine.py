@@ -0,0 +1,288 @@
+"""
+TWAP Engine
+Runs many TWAP executions concurrently on one event loop. Slices fire against
+monotonic-clock deadlines (start + i * interval), so request latency never pushes
+the schedule back, and each slice's scheduling lag is recorded.
+"""
+
+import argparse
+import asyncio
+import itertools
+import threading
+import time
+from functools import partial
+from typing import Callable, Dict, List, Optional, Union
+
+from .. import metrics
+from ..utils import make_request_async, setup_logger
+from ..logger import order_fields
+from .twap import TWAPOrder, ORDER_ENDPOINT, _arrival_price, _book_priced
+from ..config import POV_DEFAULT_RATE, TWAP_MODES
+
+logger = setup_logger("twap_engine")
+
+PENDING, RUNNING, PAUSED, CANCELLED, DONE = "PENDING", "RUNNING", "PAUSED", "CANCELLED", "DONE"
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+class TWAPJob(TWAPOrder):
+    """One TWAP execution; executed_orders/get_summary behave as in TWAPOrder"""
+
+    def __init__(self, job_id: int, symbol: str, side: str, total_quantity: float, intervals: int, duration_seconds: float, order_type: str = "MARKET", limit_price: Union[float, str, None] = None, position_side: str = "BOTH", mode: str = "TWAP", participation: Optional[float] = None):
+        super().__init__()
+        self.job_id = job_id
+        self.symbol = symbol.upper()
+        self.side = side.upper()
+        self.total_quantity = total_quantity
+        self.intervals = intervals
+        self.duration_seconds = duration_seconds
+        self.order_type = order_type.upper()
+        self.limit_price = limit_price
+        self.position_side = position_side
+        self.mode = mode.upper()
+        self.participation = participation
+        self.interval = duration_seconds / intervals if intervals else 0.0
+        self.state = PENDING
+        self.quantities: List[float] = []
+        self.next_slice = 0
+        self.lags: List[float] = []  # seconds between each slice's deadline and when it fired
+        self.started_at = 0.0
+        self._paused_at = 0.0
+        self._paused_total = 0.0
+        self._wake: Optional[asyncio.Event] = None
+        self._inflight: List[asyncio.Task] = []
+
+    def deadline(self, i: int) -> float:
+        lead = 1 if self.mode == "POV" else 0  # POV slices follow the volume they are sized from
+        return self.started_at + self._paused_total + (i + lead) * self.interval
+
+    def lag_report(self) -> Dict[str, float]:
+        lags_ms = [lag * 1000 for lag in self.lags]
+        return {
+            "slices": len(lags_ms),
+            "p50_ms": _percentile(lags_ms, 50),
+            "p99_ms": _percentile(lags_ms, 99),
+            "max_ms": max(lags_ms, default=0.0),
+        }
+
+    def status(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "symbol": self.symbol,
+            "side": self.side,
+            "state": self.state,
+            "slices_sent": self.next_slice,
+            "intervals": self.intervals,
+            "lag": self.lag_report(),
+            **self.get_summary(),
+            "slices": self.slice_report(),
+        }
+
+class TWAPEngine:
+    """
+    Hosts TWAP jobs on an event loop. Pass a running loop, or call start() to run
+    one in a background thread; submit/pause/resume/cancel are safe from any thread.
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self._loop = loop
+        self._thread: Optional[threading.Thread] = None
+        self._ids = itertools.count(1)
+        self.jobs: Dict[int, TWAPJob] = {}
+        self._on_done: List[Callable[[TWAPJob], None]] = []
+
+    def start(self) -> "TWAPEngine":
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="twap-engine", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        for job in list(self.jobs.values()):
+            self.cancel(job.job_id)
+        if self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._thread = None
+            self._loop = None
+
+    def add_done_callback(self, callback: Callable[[TWAPJob], None]) -> None:
+        self._on_done.append(callback)
+
+    def _call(self, fn, *args) -> None:
+        if self._loop is None:
+            self.start()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            fn(*args)
+        else:
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    # -------- Job control --------
+    def submit(self, symbol: str, side: str, total_quantity: float, intervals: int, duration_seconds: float, order_type: str = "MARKET", limit_price: Union[float, str, None] = None, position_side: str = "BOTH", mode: str = "TWAP", participation: Optional[float] = None) -> Optional[TWAPJob]:
+        """Plan and start a job; planning may block on REST (VWAP profile, price), so use submit_async on a loop"""
+        job = self._prepare(symbol, side, total_quantity, intervals, duration_seconds, order_type, limit_price, position_side, mode, participation)
+        if job is not None:
+            self.jobs[job.job_id] = job
+            self._call(self._launch, job)
+        return job
+
+    async def submit_async(self, symbol: str, side: str, total_quantity: float, intervals: int, duration_seconds: float, order_type: str = "MARKET", limit_price: Union[float, str, None] = None, position_side: str = "BOTH", mode: str = "TWAP", participation: Optional[float] = None) -> Optional[TWAPJob]:
+        """submit from a coroutine: planning runs in an executor thread, off the calling loop"""
+        job = await asyncio.get_running_loop().run_in_executor(None, partial(self._prepare, symbol, side, total_quantity, intervals, duration_seconds, order_type, limit_price, position_side, mode, participation))
+        if job is not None:
+            self.jobs[job.job_id] = job
+            self._call(self._launch, job)
+        return job
+
+    def _prepare(self, symbol: str, side: str, total_quantity: float, intervals: int, duration_seconds: float, order_type: str, limit_price: Union[float, str, None], position_side: str, mode: str, participation: Optional[float]) -> Optional[TWAPJob]:
+        job = TWAPJob(next(self._ids), symbol, side, total_quantity, intervals, duration_seconds, order_type, limit_price, position_side, mode, participation)
+        if not job._validate(symbol, side, total_quantity, intervals, duration_seconds):
+            return None
+        quantities = job._plan(symbol, side, total_quantity, intervals, duration_seconds, order_type, limit_price, position_side, mode, participation)
+        if quantities is None:
+            return None
+        job.quantities = quantities
+        if _book_priced(limit_price):
+            from .. import order_book
+            order_book.watch(symbol)  # sync now so slices never wait on a snapshot inside the loop
+        return job
+
+    def pause(self, job_id: int) -> None:
+        self._call(self._pause, job_id)
+
+    def resume(self, job_id: int) -> None:
+        self._call(self._resume, job_id)
+
+    def cancel(self, job_id: int) -> None:
+        self._call(self._cancel, job_id)
+
+    def status(self, job_id: Optional[int] = None):
+        if job_id is not None:
+            return self.jobs[job_id].status()
+        return [job.status() for job in self.jobs.values()]
+
+    def _launch(self, job: TWAPJob) -> None:
+        job._wake = asyncio.Event()
+        job.started_at = time.monotonic()
+        job.state = RUNNING
+        logger.info(f"TWAP job {job.job_id} ({job.mode}): {job._describe(job.quantities)} {job.order_type} {job.symbol} every {job.interval:.3f}s")
+        asyncio.ensure_future(self._run(job))
+
+    def _pause(self, job_id: int) -> None:
+        job = self.jobs.get(job_id)
+        if job and job.state == RUNNING:
+            job.state = PAUSED
+            job._paused_at = time.monotonic()
+            job._wake.set()
+            logger.info(f"TWAP job {job_id} paused at slice {job.next_slice}/{job.intervals}")
+
+    def _resume(self, job_id: int) -> None:
+        job = self.jobs.get(job_id)
+        if job and job.state == PAUSED:
+            # Remaining slices keep their spacing; the whole tail shifts by the pause
+            job._paused_total += time.monotonic() - job._paused_at
+            job.state = RUNNING
+            job._wake.set()
+            logger.info(f"TWAP job {job_id} resumed")
+
+    def _cancel(self, job_id: int) -> None:
+        job = self.jobs.get(job_id)
+        if job and job.state in (PENDING, RUNNING, PAUSED):
+            job.state = CANCELLED
+            if job._wake:
+                job._wake.set()
+            logger.info(f"TWAP job {job_id} cancelled after {job.next_slice}/{job.intervals} slices")
+
+    # -------- Scheduling --------
+    async def _wait_for_deadline(self, job: TWAPJob, i: int) -> bool:
+        """Sleep until slice i is due; False if the job was cancelled meanwhile"""
+        while True:
+            if job.state == CANCELLED:
+                return False
+            job._wake.clear()
+            if job.state == PAUSED:
+                await job._wake.wait()
+                continue
+            remaining = job.deadline(i) - time.monotonic()
+            if remaining <= 0:
+                return True
+            try:
+                await asyncio.wait_for(job._wake.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, job: TWAPJob) -> None:
+        for i in range(job.intervals):
+            if not await self._wait_for_deadline(job, i):
+                break
+            job.lags.append(time.monotonic() - job.deadline(i))
+            job.next_slice = i + 1
+            qty, record = job._next_slice(i, job.quantities, job.order_type == "MARKET")
+            if qty:
+                # Fire and move on: a slow response must not delay the next deadline
+                job._inflight.append(asyncio.ensure_future(self._send(job, i, record)))
+        if job._inflight:
+            await asyncio.gather(*job._inflight)
+        job._finish(job.symbol)
+        if job.state != CANCELLED:
+            job.state = DONE
+        report = job.lag_report()
+        logger.info(f"TWAP job {job.job_id} {job.state}: {job.next_slice}/{job.intervals} slices, lag p50 {report['p50_ms']:.2f}ms p99 {report['p99_ms']:.2f}ms max {report['max_ms']:.2f}ms")
+        for callback in list(self._on_done):
+            try:
+                callback(job)
+            except Exception:
+                logger.exception(f"TWAP done callback failed for job {job.job_id}")
+
+    async def _send(self, job: TWAPJob, i: int, record: Dict) -> None:
+        try:
+            params = job._slice_params(job.symbol, job.side, record["quantity"], job.order_type, job.limit_price, job.position_side)
+            record["arrival_price"] = _arrival_price(job.symbol)
+            order = await make_request_async("POST", ORDER_ENDPOINT, params, signed=True)
+            job._slice_sent(record, order)
+            logger.info("TWAP job %d order %d/%d placed: %s", job.job_id, i + 1, job.intervals, order.get("orderId"), extra=order_fields(order, job=job.job_id))
+        except Exception:
+            logger.exception(f"TWAP job {job.job_id} order {i+1} failed")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several TWAP executions concurrently")
+    parser.add_argument("jobs", nargs="+", help="SYMBOL:SIDE:QUANTITY, e.g. BTCUSDT:BUY:0.1")
+    parser.add_argument("--intervals", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=300)
+    parser.add_argument("--limit-price", help="fixed price, or passive/improve/marketable from the local order book")
+    parser.add_argument("--mode", type=str.upper, default="TWAP", choices=TWAP_MODES)
+    parser.add_argument("--participation", type=float, default=POV_DEFAULT_RATE, help="POV share of traded volume")
+    args = parser.parse_args()
+
+    order_type = "LIMIT" if args.limit_price else "MARKET"
+    metrics.serve_from_config()
+    engine = TWAPEngine().start()
+    jobs = []
+    for spec in args.jobs:
+        symbol, side, quantity = spec.split(":")
+        job = engine.submit(symbol, side, float(quantity), args.intervals, args.duration, order_type, args.limit_price, mode=args.mode, participation=args.participation)
+        if job is None:
+            print(f"❌ Rejected {spec}. Check bot.log for details.")
+        else:
+            jobs.append(job)
+    try:
+        while any(job.state in (PENDING, RUNNING, PAUSED) for job in jobs):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        print("Cancelling...")
+        engine.stop()
+    for job in jobs:
+        s = job.status()
+        print(f"{s['symbol']} {s['side']}: {s['state']}, {s['orders']} orders, qty {s['total_quantity']}, lag p99 {s['lag']['p99_ms']:.2f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Backtest Data Store
+Columnar market history: one raw little-endian file per column under
+<root>/<SYMBOL>/<table>/, opened with np.memmap so months of data cost only the
+pages a backtest actually touches. Tables are append-only and sorted by time.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import zipfile
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+from ..config import BACKTEST_DATA_DIR
+
+# table kind -> (column, dtype); the first column is the millisecond time index
+SCHEMAS = {
+    "klines": (("open_time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"), ("volume", "<f8")),
+    "aggTrades": (("time", "<i8"), ("price", "<f8"), ("qty", "<f8")),
+}
+# CSV field positions in Binance's public data dumps
+CSV_FIELDS = {
+    "klines": (0, 1, 2, 3, 4, 5),
+    "aggTrades": (5, 1, 2),
+}
+CHUNK_ROWS = 1_000_000
+
+def schema_for(table: str) -> Tuple[Tuple[str, str], ...]:
+    """Columns of a table; kline tables may carry an interval suffix, e.g. klines_1m"""
+    kind = table.split("_", 1)[0]
+    if kind not in SCHEMAS:
+        raise ValueError(f"Unknown table {table!r}; expected one of {sorted(SCHEMAS)} (klines may be klines_<interval>)")
+    return SCHEMAS[kind]
+
+def table_path(root: str, symbol: str, table: str) -> str:
+    return os.path.join(root, symbol.upper(), table)
+
+class ColumnTable:
+    """Read-only, memory-mapped view of one table"""
+
+    def __init__(self, root: str, symbol: str, table: str):
+        self.symbol = symbol.upper()
+        self.table = table
+        self.path = table_path(root, symbol, table)
+        self.schema = schema_for(table)
+        self.time_column = self.schema[0][0]
+        sizes = [self._file_size(name) // np.dtype(dtype).itemsize for name, dtype in self.schema]
+        self.rows = min(sizes)  # an interrupted append can leave one column longer
+        self.columns: Dict[str, np.ndarray] = {name: self._map(name, dtype) for name, dtype in self.schema}
+
+    def _file_size(self, name: str) -> int:
+        path = os.path.join(self.path, f"{name}.bin")
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def _map(self, name: str, dtype: str) -> np.ndarray:
+        if not self.rows:
+            return np.empty(0, dtype)
+        return np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=dtype, mode="r", shape=(self.rows,))
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.columns[self.time_column]
+
+    def bounds(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> Tuple[int, int]:
+        """Row range [lo, hi) with start_ms <= time < end_ms, by binary search on the time column"""
+        lo = int(np.searchsorted(self.times, start_ms, "left")) if start_ms is not None else 0
+        hi = int(np.searchsorted(self.times, end_ms, "left")) if end_ms is not None else self.rows
+        return lo, max(lo, hi)
+
+    def slice(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy column views for a time range"""
+        lo, hi = self.bounds(start_ms, end_ms)
+        return {name: column[lo:hi] for name, column in self.columns.items()}
+
+    def time_range(self) -> Tuple[Optional[int], Optional[int]]:
+        return (int(self.times[0]), int(self.times[-1])) if self.rows else (None, None)
+
+def parse_time(value: Optional[str]) -> Optional[int]:
+    """Milliseconds from an epoch-ms string or an ISO date/time (UTC)"""
+    if value is None or value.isdigit():
+        return int(value) if value else None
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+def open_table(symbol: str, table: str, root: str = BACKTEST_DATA_DIR) -> ColumnTable:
+    return ColumnTable(root, symbol, table)
+
+def append(symbol: str, table: str, columns: Dict[str, np.ndarray], root: str = BACKTEST_DATA_DIR) -> int:
+    """
+    Append rows (sorted by time) to a table, skipping any at or before the last
+    stored time so re-importing overlapping files is harmless. Returns rows written.
+    """
+    schema = schema_for(table)
+    path = table_path(root, symbol, table)
+    os.makedirs(path, exist_ok=True)
+    existing = ColumnTable(root, symbol, table)
+    times = np.asarray(columns[schema[0][0]], dtype=schema[0][1])
+    start = int(np.searchsorted(times, existing.times[-1], "right")) if existing.rows else 0
+    if start >= len(times):
+        return 0
+    for name, dtype in schema:
+        data = np.ascontiguousarray(np.asarray(columns[name], dtype=dtype)[start:])
+        with open(os.path.join(path, f"{name}.bin"), "r+b" if os.path.exists(os.path.join(path, f"{name}.bin")) else "wb") as f:
+            # Drop the tail of a torn append before writing
+            f.seek(existing.rows * np.dtype(dtype).itemsize)
+            f.truncate()
+            f.write(data.tobytes())
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({"symbol": symbol.upper(), "table": table, "columns": dict(schema)}, f)
+    return len(times) - start
+
+def _csv_lines(path: str) -> Iterator[List[str]]:
+    """Rows of a CSV, or of the first member of a .zip as Binance publishes them"""
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as zf, zf.open(zf.namelist()[0]) as raw:
+            yield from csv.reader(io.TextIOWrapper(raw, newline=""))
+        return
+    with open(path, newline="") as f:
+        yield from csv.reader(f)
+
+def _chunked_rows(rows: Iterable[List[str]], fields: Tuple[int, ...], size: int) -> Iterator[List[Tuple[str, ...]]]:
+    chunk = []
+    for row in rows:
+        if not row or not row[0].isdigit():
+            continue  # header
+        chunk.append(tuple(row[i] for i in fields))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def import_csv(path: str, symbol: str, table: str, root: str = BACKTEST_DATA_DIR, chunk_rows: int = CHUNK_ROWS) -> int:
+    """Import a Binance klines/aggTrades CSV (or .zip) in chunks; returns rows appended"""
+    schema = schema_for(table)
+    fields = CSV_FIELDS[table.split("_", 1)[0]]
+    written = 0
+    for chunk in _chunked_rows(_csv_lines(path), fields, chunk_rows):
+        values = list(zip(*chunk))
+        columns = {name: np.array(values[i], dtype=np.float64).astype(dtype) for i, (name, dtype) in enumerate(schema)}
+        t = schema[0][0]
+        if columns[t].size and columns[t][0] > 1e14:
+            columns[t] //= 1000  # newer dumps use microseconds
+        written += append(symbol, table, columns, root)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage backtest market data")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--root", default=BACKTEST_DATA_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", parents=[common], help="import Binance klines/aggTrades CSV or zip files")
+    imp.add_argument("symbol")
+    imp.add_argument("table", help="klines_<interval> or aggTrades")
+    imp.add_argument("files", nargs="+")
+    info = sub.add_parser("info", parents=[common], help="show stored tables")
+    info.add_argument("symbol", nargs="?")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        for path in sorted(args.files):
+            print(f"{path}: {import_csv(path, args.symbol, args.table, args.root)} rows")
+        return
+    symbols = [args.symbol.upper()] if args.symbol else sorted(os.listdir(args.root)) if os.path.isdir(args.root) else []
+    for symbol in symbols:
+        for table in sorted(os.listdir(os.path.join(args.root, symbol))):
+            t = ColumnTable(args.root, symbol, table)
+            first, last = t.time_range()
+            print(f"{symbol} {table}: {len(t)} rows, {first} .. {last}")
+
+if __name__ == "__main__":
+    main()
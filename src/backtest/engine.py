@@ -0,0 +1,303 @@
+"""
+Backtest Engine
+Replays stored klines/aggTrades through the real strategy code (place_grid_orders,
+TWAPOrder, place_stop_limit_order) against the in-process simulator on a simulated
+clock. Ticks that cannot fill or trigger any resting order are skipped in bulk.
+"""
+
+import argparse
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+from .. import exchange_info, journal, market_data, positions, rate_limiter, time_sync, utils
+from ..order_store import store
+from ..simulator.exchange import SimulatedExchange, install
+from ..utils import setup_logger
+from .data import open_table, parse_time
+from ..config import BACKTEST_DATA_DIR, BACKTEST_FEE_RATE, GRID_LEVELS, GRID_PROFIT_PERCENTAGE, POV_DEFAULT_RATE
+
+logger = setup_logger("backtest")
+MIN_SCAN = 256
+MAX_SCAN = 65536  # ticks checked per vectorized pass while looking for the next fill or trigger
+DRAWDOWN_CHUNK = 1 << 20  # ticks marked to market per pass, bounding memory on long aggTrades runs
+
+Ticks = Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]  # (time ms, price, qty or None)
+
+def kline_ticks(columns: Dict[str, np.ndarray]) -> Ticks:
+    """
+    Four ticks per kline, spread over its interval: open, the extreme nearer the
+    open (low for up candles, high for down candles), the other extreme, close.
+    """
+    t = np.asarray(columns["open_time"])
+    interval = int(np.median(np.diff(t[:1000]))) if len(t) > 1 else 60_000
+    up = columns["close"] >= columns["open"]
+    first = np.where(up, columns["low"], columns["high"])
+    second = np.where(up, columns["high"], columns["low"])
+    prices = np.stack([columns["open"], first, second, columns["close"]], axis=1).ravel()
+    times = (t[:, None] + np.arange(4) * (interval // 4)).ravel()
+    return times, prices, None
+
+def load_ticks(symbol: str, table: str = "klines_1m", start_ms: Optional[int] = None, end_ms: Optional[int] = None, root: str = BACKTEST_DATA_DIR) -> Ticks:
+    """Ticks for a time range; aggTrades columns are used straight from the memory map"""
+    columns = open_table(symbol, table, root).slice(start_ms, end_ms)
+    if table.startswith("klines"):
+        return kline_ticks(columns)
+    return columns["time"], columns["price"], columns["qty"]
+
+def _clear_caches() -> None:
+    store.clear()
+    market_data.clear()
+    positions.book.clear()
+
+@contextmanager
+def simulated(exchange: SimulatedExchange) -> Iterator[SimulatedExchange]:
+    """
+    Point the order path at exchange, without rate limits, clock syncs, journaling or
+    the exchange info disk cache, on empty order/price/position caches. On exit the
+    live settings and exchange info come back and the simulated caches are dropped.
+    """
+    saved = (utils.API_BASE_URL, rate_limiter.RATE_LIMIT_ENABLED, time_sync.TIME_SYNC_ENABLED, journal.ENABLED,
+             exchange_info.EXCHANGE_INFO_CACHE_FILE, exchange_info._index, exchange_info._loaded_at, exchange_info._failed_at)
+    install(exchange)
+    rate_limiter.RATE_LIMIT_ENABLED = False
+    time_sync.TIME_SYNC_ENABLED = False
+    journal.enable(False)  # simulated orders must not mix with the live record
+    exchange_info.EXCHANGE_INFO_CACHE_FILE = ""
+    try:
+        exchange_info.refresh(force=True)
+        _clear_caches()
+        yield exchange
+    finally:
+        _clear_caches()  # simulated orders and prices must not reach live code
+        utils.API_BASE_URL, rate_limiter.RATE_LIMIT_ENABLED, time_sync.TIME_SYNC_ENABLED = saved[:3]
+        journal.enable(saved[3])
+        exchange_info.EXCHANGE_INFO_CACHE_FILE, exchange_info._index, exchange_info._loaded_at, exchange_info._failed_at = saved[4:]
+
+class Backtest:
+    """
+    One symbol's replay; strategies place orders through the normal order functions.
+    Use as a context manager: inside it the order path is routed to the simulator.
+    """
+
+    def __init__(self, symbol: str, times: np.ndarray, prices: np.ndarray, qtys: Optional[np.ndarray] = None, filters: Optional[Dict] = None, fee_rate: float = BACKTEST_FEE_RATE):
+        if not len(prices):
+            raise ValueError(f"No data for {symbol}")
+        self.symbol = symbol.upper()
+        self.times, self.prices, self.qtys = times, prices, qtys
+        self.fee_rate = fee_rate
+        self.exchange = SimulatedExchange({self.symbol: filters or {}})
+        self.exchange.add_listener(self._on_event)
+        self.book = self.exchange.engine.book(self.symbol)
+        self.cursor = -1  # last tick applied
+        self.clock_ms = int(times[0])
+        self._cum_qtys: Optional[np.ndarray] = None
+        self._fill_ticks: List[int] = []
+        self._fill_qtys: List[float] = []  # signed: + bought, - sold
+        self._fill_prices: List[float] = []
+        self._simulated = None
+
+    def __enter__(self) -> "Backtest":
+        self._simulated = simulated(self.exchange)
+        self._simulated.__enter__()
+        self._apply(0)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._simulated.__exit__(*exc)
+        self._simulated = None
+
+    @property
+    def price(self) -> float:
+        return float(self.prices[self.cursor])
+
+    def _apply(self, i: int) -> None:
+        self.cursor = i
+        price = float(self.prices[i])
+        market_data.update_last(self.symbol, price)  # stands in for the price stream (TWAP arrival prices)
+        self.exchange.on_trade(self.symbol, price, float(self.qtys[i]) if self.qtys is not None else None)
+
+    def _on_event(self, event: Dict) -> None:
+        o = event["o"]
+        if o["x"] == "TRADE":
+            qty = float(o["l"])
+            self._fill_ticks.append(self.cursor)
+            self._fill_qtys.append(qty if o["S"] == "BUY" else -qty)
+            self._fill_prices.append(float(o["L"]))
+
+    def _thresholds(self) -> Tuple[float, float]:
+        """A tick at or below lo, or at or above hi, can fill a resting order or fire a stop"""
+        bid, ask = self.book.bids.best(), self.book.asks.best()
+        lo = bid if bid is not None else -np.inf
+        hi = ask if ask is not None else np.inf
+        for order in self.book.stops:
+            up = (order.side == "BUY") != order.type.startswith("TAKE_PROFIT")
+            if up:
+                hi = min(hi, order.stop_price)
+            else:
+                lo = max(lo, order.stop_price)
+        return lo, hi
+
+    def _next_event(self, i: int, end: int, lo: float, hi: float) -> int:
+        """First index in [i, end) whose price reaches lo or hi, else end"""
+        size = MIN_SCAN
+        while i < end:
+            chunk = self.prices[i:min(end, i + size)]
+            hits = np.flatnonzero((chunk <= lo) | (chunk >= hi))
+            if hits.size:
+                return i + int(hits[0])
+            i += len(chunk)
+            size = min(size * 2, MAX_SCAN)
+        return end
+
+    def advance_to(self, t_ms: float) -> None:
+        """Replay every tick up to t_ms; only ticks that can change an order are sent to the engine"""
+        end = int(np.searchsorted(self.times, t_ms, "right"))
+        i = self.cursor + 1
+        while i < end:
+            lo, hi = self._thresholds()
+            if lo == -np.inf and hi == np.inf:
+                break
+            i = self._next_event(i, end, lo, hi)
+            if i < end:
+                self._apply(i)
+                i += 1
+        if end - 1 > self.cursor:
+            self._apply(end - 1)  # nothing between reaches an order, but the last price must be current
+        self.clock_ms = max(self.clock_ms, int(t_ms))
+
+    def sleep(self, seconds: float) -> None:
+        """Simulated-clock stand-in for time.sleep"""
+        self.advance_to(self.clock_ms + seconds * 1000)
+
+    def now(self) -> float:
+        """Simulated-clock stand-in for time.time"""
+        return self.clock_ms / 1000
+
+    def traded_volume(self, symbol: str = "") -> Optional[float]:
+        """Market quantity traded up to the simulated clock; None for kline ticks, which carry no quantity"""
+        if self.qtys is None:
+            return None
+        if self._cum_qtys is None:
+            self._cum_qtys = np.cumsum(self.qtys, dtype=np.float64)
+        end = int(np.searchsorted(self.times, self.clock_ms, "right"))
+        return float(self._cum_qtys[end - 1]) if end else 0.0
+
+    def run(self) -> None:
+        self.advance_to(self.times[-1])
+
+    def result(self) -> Dict:
+        ticks = np.array(self._fill_ticks, dtype=np.int64)
+        qtys = np.array(self._fill_qtys, dtype=np.float64)
+        fill_prices = np.array(self._fill_prices, dtype=np.float64)
+        fees = np.abs(qtys) * fill_prices * self.fee_rate
+        positions = np.cumsum(qtys)
+        cash = np.cumsum(-qtys * fill_prices - fees)
+        last = self.price
+        position = float(positions[-1]) if len(positions) else 0.0
+        pnl = (float(cash[-1]) if len(cash) else 0.0) + position * last
+        return {
+            "symbol": self.symbol,
+            "ticks": self.cursor + 1,
+            "fills": len(qtys),
+            "bought": float(qtys[qtys > 0].sum()),
+            "sold": float(np.abs(qtys[qtys < 0]).sum()),
+            "position": position,
+            "volume": float((np.abs(qtys) * fill_prices).sum()),
+            "fees": float(fees.sum()),
+            "pnl": pnl,
+            "max_drawdown": self._max_drawdown(ticks, positions, cash),
+            "open_orders": len(self.exchange.engine.open_orders(self.symbol)),
+            "last_price": last,
+        }
+
+    def _max_drawdown(self, ticks: np.ndarray, positions: np.ndarray, cash: np.ndarray) -> float:
+        """Largest peak-to-trough drop in equity (cash + position * price), marked at every tick"""
+        if not len(ticks):
+            return 0.0
+        peak, drawdown = 0.0, 0.0
+        for lo in range(0, self.cursor + 1, DRAWDOWN_CHUNK):
+            hi = min(self.cursor + 1, lo + DRAWDOWN_CHUNK)
+            k = np.searchsorted(ticks, np.arange(lo, hi), "right") - 1  # last fill at or before each tick
+            held = k >= 0
+            k = np.maximum(k, 0)
+            equity = np.where(held, cash[k] + positions[k] * self.prices[lo:hi], 0.0)
+            peaks = np.maximum.accumulate(np.maximum(equity, peak))
+            drawdown = max(drawdown, float((peaks - equity).max()))
+            peak = float(peaks[-1])
+        return drawdown
+
+# -------- Strategies: each places orders through the live code path, returns False if rejected --------
+def _grid(bt: Backtest, total_quantity: float, grid_levels: int = GRID_LEVELS, profit_percent: float = GRID_PROFIT_PERCENTAGE, spacing: str = "arithmetic") -> bool:
+    from ..advanced.grid_orders import place_grid_orders
+    return bool(place_grid_orders(bt.symbol, total_quantity, grid_levels, profit_percent, spacing))
+
+def _twap(bt: Backtest, side: str, total_quantity: float, intervals: int, duration: float, order_type: str = "MARKET", limit_price: Optional[float] = None, mode: str = "TWAP", participation: float = POV_DEFAULT_RATE) -> bool:
+    """mode is TWAP, VWAP (profile from klines cached before the replay starts) or POV (aggTrades data)"""
+    from ..advanced.twap import TWAPOrder
+    twap = TWAPOrder(sleep=bt.sleep, clock=bt.now, volume=bt.traded_volume)
+    return twap.execute_twap(bt.symbol, side, total_quantity, intervals, duration, order_type, limit_price, mode=mode, participation=participation) is not None
+
+def _stop_limit(bt: Backtest, side: str, quantity: float, stop_percent: float, limit_percent: float) -> bool:
+    """Stop and limit prices given as % offsets from the first price"""
+    from ..advanced.stop_limit import place_stop_limit_order
+    price = exchange_info.quantize_price(bt.symbol, bt.price * (1 + limit_percent / 100))
+    stop = exchange_info.quantize_price(bt.symbol, bt.price * (1 + stop_percent / 100))
+    return place_stop_limit_order(bt.symbol, side, quantity, price, stop) is not None
+
+STRATEGIES: Dict[str, Callable[..., bool]] = {"grid": _grid, "twap": _twap, "stop_limit": _stop_limit}
+
+def run_backtest(symbol: str, strategy: str, params: Dict, table: str = "klines_1m", start_ms: Optional[int] = None, end_ms: Optional[int] = None, root: str = BACKTEST_DATA_DIR, filters: Optional[Dict] = None, fee_rate: float = BACKTEST_FEE_RATE, quiet: bool = True) -> Dict:
+    """Run one strategy over one symbol's history; safe to call from pool workers"""
+    started = time.perf_counter()
+    if quiet:
+        logging.disable(logging.INFO)  # thousands of order lines per run would dominate the runtime
+    try:
+        with Backtest(symbol, *load_ticks(symbol, table, start_ms, end_ms, root), filters=filters, fee_rate=fee_rate) as bt:
+            accepted = STRATEGIES[strategy](bt, **params)
+            if accepted:
+                bt.run()
+            result = bt.result()
+    finally:
+        if quiet:
+            logging.disable(logging.NOTSET)
+    result.update(strategy=strategy, params=params, accepted=accepted, seconds=time.perf_counter() - started)
+    return result
+
+def parse_params(pairs: List[str]) -> Dict:
+    """key=value pairs; values are parsed as JSON where possible (numbers, lists), else kept as strings"""
+    params = {}
+    for pair in pairs:
+        key, value = pair.split("=", 1)
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    return params
+
+def add_run_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("symbol")
+    parser.add_argument("strategy", choices=sorted(STRATEGIES))
+    parser.add_argument("--param", action="append", default=[], help="strategy argument, e.g. total_quantity=0.1")
+    parser.add_argument("--table", default="klines_1m", help="klines_<interval> or aggTrades")
+    parser.add_argument("--start", help="ISO date/time (UTC) or epoch ms")
+    parser.add_argument("--end", help="ISO date/time (UTC) or epoch ms")
+    parser.add_argument("--root", default=BACKTEST_DATA_DIR)
+    parser.add_argument("--filters", type=json.loads, help='symbol filters, e.g. {"tick_size": "0.1", "min_notional": "5"}')
+    parser.add_argument("--fee-rate", type=float, default=BACKTEST_FEE_RATE)
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest a strategy on stored market data")
+    add_run_arguments(parser)
+    args = parser.parse_args()
+
+    result = run_backtest(args.symbol, args.strategy, parse_params(args.param), args.table, parse_time(args.start), parse_time(args.end), args.root, args.filters, args.fee_rate)
+    print(json.dumps(result, indent=2))
+    if not result["accepted"]:
+        print("❌ Strategy rejected its parameters. Check bot.log for details.")
+
+if __name__ == "__main__":
+    main()
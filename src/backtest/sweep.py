@@ -0,0 +1,79 @@
+"""
+Parameter Sweep
+Runs one backtest per parameter combination across CPU cores. Workers open the
+memory-mapped history themselves, so the OS page cache shares it between them
+instead of every process receiving a pickled copy.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional
+
+from ..utils import setup_logger
+from .data import parse_time
+from .engine import add_run_arguments, parse_params, run_backtest
+from ..config import BACKTEST_DATA_DIR, BACKTEST_FEE_RATE
+
+logger = setup_logger("backtest_sweep")
+
+def combinations(fixed: Dict, grid: Dict[str, List]) -> List[Dict]:
+    """Every combination of the swept values, each merged over the fixed params"""
+    keys = list(grid)
+    return [{**fixed, **dict(zip(keys, values))} for values in itertools.product(*(grid[k] for k in keys))]
+
+def run_combination(params: Dict, **kwargs) -> Dict:
+    """run_backtest that reports exceptions in the result instead of raising"""
+    try:
+        return run_backtest(params=params, **kwargs)
+    except Exception as e:
+        return {"params": params, "accepted": False, "error": f"{type(e).__name__}: {e}"}
+
+def sweep(symbol: str, strategy: str, fixed: Dict, grid: Dict[str, List], table: str = "klines_1m", start_ms: Optional[int] = None, end_ms: Optional[int] = None, root: str = BACKTEST_DATA_DIR, filters: Optional[Dict] = None, fee_rate: float = BACKTEST_FEE_RATE, processes: Optional[int] = None, sort_by: str = "pnl") -> List[Dict]:
+    """
+    Backtest every combination in a process pool; results come back best first by sort_by.
+    Workers are spawned rather than forked so they never inherit session pools or
+    background threads from the parent.
+    """
+    runs = combinations(fixed, grid)
+    processes = min(processes or os.cpu_count() or 1, len(runs))
+    logger.info(f"Sweeping {len(runs)} {strategy} runs on {symbol} over {processes} processes")
+    job = partial(run_combination, symbol=symbol, strategy=strategy, table=table, start_ms=start_ms, end_ms=end_ms, root=root, filters=filters, fee_rate=fee_rate)
+    if processes <= 1:
+        results = [job(params) for params in runs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(job, runs, chunksize=max(1, len(runs) // (processes * 4))))
+    failed = [r for r in results if "error" in r]
+    if failed:
+        logger.error(f"{len(failed)} of {len(runs)} sweep runs failed, first: {failed[0]['error']}")
+    return sorted(results, key=lambda r: (r.get("accepted", False), r.get(sort_by, float("-inf"))), reverse=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep strategy parameters over stored market data")
+    add_run_arguments(parser)
+    parser.add_argument("--sweep", action="append", default=[], help="swept values, e.g. grid_levels=[5,10,20]")
+    parser.add_argument("--processes", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--sort-by", default="pnl")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--out", help="write every result to this JSON file")
+    args = parser.parse_args()
+
+    grid = parse_params(args.sweep)
+    grid = {k: v if isinstance(v, list) else [v] for k, v in grid.items()}
+    results = sweep(args.symbol, args.strategy, parse_params(args.param), grid, args.table, parse_time(args.start), parse_time(args.end), args.root, args.filters, args.fee_rate, args.processes, args.sort_by)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    for r in results[:args.top]:
+        if r.get("accepted"):
+            print(f"{r[args.sort_by]:>14.4f}  pnl {r['pnl']:.4f}  dd {r['max_drawdown']:.4f}  fills {r['fills']}  {json.dumps({k: r['params'][k] for k in grid})}")
+        else:
+            print(f"{'rejected':>14}  {r.get('error', 'check bot.log')}  {json.dumps({k: r['params'][k] for k in grid})}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Command Line Interface
+One entry point for every order type: python -m src <command> ... Only the module a
+command needs is imported, and config, .env loading and logging come with it, so
+--help and argument errors cost next to nothing. `batch` runs many orders from a
+file or stdin in one process, paying interpreter start, imports and connection
+setup once.
+"""
+
+import argparse
+import shlex
+import sys
+from typing import List, Optional, Tuple
+
+SIDES = ["BUY", "SELL", "buy", "sell"]
+POSITION_SIDES = ["BOTH", "LONG", "SHORT"]
+Outcome = Tuple[bool, str]
+
+def _market(args: argparse.Namespace) -> Outcome:
+    from .market_orders import place_market_order
+    result = place_market_order(args.symbol, args.side, args.quantity, args.position_side, args.reduce_only)
+    return (True, f"Market order placed: {result.get('orderId')}") if result else (False, "Market order failed")
+
+def _limit(args: argparse.Namespace) -> Outcome:
+    from .limit_orders import place_limit_order
+    result = place_limit_order(args.symbol, args.side, args.quantity, args.price, args.time_in_force, args.position_side, args.post_only, args.reduce_only)
+    return (True, f"Limit order placed: {result.get('orderId')}") if result else (False, "Limit order failed")
+
+def _stop_limit(args: argparse.Namespace) -> Outcome:
+    from .advanced.stop_limit import place_stop_limit_order
+    result = place_stop_limit_order(args.symbol, args.side, args.quantity, args.price, args.stop_price, args.time_in_force, args.position_side, args.reduce_only, args.working_type)
+    return (True, f"Stop-limit order placed: {result.get('orderId')}") if result else (False, "Stop-limit order failed")
+
+def _oco(args: argparse.Namespace) -> Outcome:
+    from .advanced.oco import place_oco_order
+    # the sibling is only cancelled while this process runs; without --wait the legs are unlinked once it exits
+    result = place_oco_order(args.symbol, args.side, args.quantity, args.take_profit_price, args.stop_price, args.stop_limit_price, args.time_in_force, args.position_side, args.reduce_only, wait=args.wait)
+    if not result:
+        return False, "OCO order failed"
+    if not args.wait:
+        return True, f"OCO placed for {args.symbol.upper()}: TP order {result['take_profit_order']}, SL order {result['stop_order']} (linked while this process runs)"
+    return result["state"] == "DONE", f"OCO {result['state'].lower()} for {args.symbol.upper()}: {result['outcome'] or 'nothing'} filled {result['filled']}/{result['quantity']}"
+
+def _twap(args: argparse.Namespace) -> Outcome:
+    order_type = "LIMIT" if args.limit_price else "MARKET"
+    if not args.yes:
+        print(f"⚠️  {args.mode} will place up to {args.intervals} {order_type} orders over {args.duration}s.")
+        if input("Proceed? (yes/no): ").strip().lower() not in ("yes", "y"):
+            return False, "TWAP cancelled"
+    from .advanced.twap import TWAPOrder
+    twap = TWAPOrder()
+    if not twap.execute_twap(args.symbol, args.side, args.quantity, args.intervals, args.duration, order_type, args.limit_price, args.position_side, args.mode, args.participation):
+        return False, f"{args.mode} execution failed"
+    summary = twap.get_summary()
+    extra = "".join([
+        f", participation {summary['participation']:.2%}" if summary["participation"] is not None else "",
+        f", slippage {summary['slippage_bps']:.2f} bps" if summary["slippage_bps"] is not None else "",
+    ])
+    return True, f"{args.mode} completed: {summary['orders']} orders, qty {summary['total_quantity']}, avg price {summary['average_price']}{extra}"
+
+def _grid(args: argparse.Namespace) -> Outcome:
+    from .advanced.grid_orders import place_grid_orders
+    results = place_grid_orders(args.symbol, args.total_quantity, args.levels, args.profit_percent, args.spacing)
+    return (True, f"{len(results)} grid orders placed for {args.symbol.upper()}") if results else (False, "Grid strategy failed")
+
+def _order_parsers(sub) -> None:
+    """Order subcommands; shared by the command line and batch lines"""
+    from .config import BOOK_PRICE_MODES, GRID_LEVELS, GRID_PROFIT_PERCENTAGE, POV_DEFAULT_RATE, TWAP_DEFAULT_DURATION, TWAP_DEFAULT_INTERVALS, TWAP_MODES  # constants only; the heavy imports wait for the command
+
+    p = sub.add_parser("market", help="market order")
+    p.add_argument("symbol")
+    p.add_argument("side", choices=SIDES)
+    p.add_argument("quantity", type=float)
+    p.add_argument("--position-side", default="BOTH", choices=POSITION_SIDES)
+    p.add_argument("--reduce-only", action="store_true")
+    p.set_defaults(run=_market)
+
+    p = sub.add_parser("limit", help="limit order")
+    p.add_argument("symbol")
+    p.add_argument("side", choices=SIDES)
+    p.add_argument("quantity", type=float)
+    p.add_argument("price", help=f"limit price, or {'/'.join(BOOK_PRICE_MODES)} to price from the local order book")
+    p.add_argument("--time-in-force", default="GTC", choices=["GTC", "IOC", "FOK", "GTX"])
+    p.add_argument("--position-side", default="BOTH", choices=POSITION_SIDES)
+    p.add_argument("--post-only", action="store_true")
+    p.add_argument("--reduce-only", action="store_true")
+    p.set_defaults(run=_limit)
+
+    p = sub.add_parser("stop-limit", help="stop-limit order")
+    p.add_argument("symbol")
+    p.add_argument("side", choices=SIDES)
+    p.add_argument("quantity", type=float)
+    p.add_argument("price", type=float)
+    p.add_argument("stop_price", type=float)
+    p.add_argument("--time-in-force", default="GTC", choices=["GTC", "GTX"])
+    p.add_argument("--position-side", default="BOTH", choices=POSITION_SIDES)
+    p.add_argument("--reduce-only", action="store_true")
+    p.add_argument("--working-type", default="CONTRACT_PRICE", choices=["CONTRACT_PRICE", "MARK_PRICE"])
+    p.set_defaults(run=_stop_limit)
+
+    p = sub.add_parser("oco", help="take-profit + stop-loss pair")
+    p.add_argument("symbol")
+    p.add_argument("side", choices=SIDES)
+    p.add_argument("quantity", type=float)
+    p.add_argument("take_profit_price", type=float)
+    p.add_argument("stop_price", type=float)
+    p.add_argument("stop_limit_price", type=float)
+    p.add_argument("--time-in-force", default="GTC", choices=["GTC", "IOC", "FOK"])
+    p.add_argument("--position-side", default="BOTH", choices=POSITION_SIDES)
+    p.add_argument("--reduce-only", action="store_true", default=True, help="the default: the legs only close a position")
+    p.add_argument("--no-reduce-only", dest="reduce_only", action="store_false", help="let the legs open or add to a position")
+    p.add_argument("--wait", action="store_true", help="block until one leg completes, keeping the legs linked (ignored in batch)")
+    p.set_defaults(run=_oco)
+
+    p = sub.add_parser("twap", help="split an order over time")
+    p.add_argument("symbol")
+    p.add_argument("side", choices=SIDES)
+    p.add_argument("quantity", type=float)
+    p.add_argument("--intervals", type=int, default=TWAP_DEFAULT_INTERVALS)
+    p.add_argument("--duration", type=int, default=TWAP_DEFAULT_DURATION)
+    p.add_argument("--limit-price", help=f"fixed price, or {'/'.join(BOOK_PRICE_MODES)} to price each slice from the local order book")
+    p.add_argument("--position-side", default="BOTH", choices=POSITION_SIDES)
+    p.add_argument("--mode", type=str.upper, default="TWAP", choices=TWAP_MODES, help="equal slices, volume-profile slices, or percentage of live volume")
+    p.add_argument("--participation", type=float, default=POV_DEFAULT_RATE, help="POV share of traded volume, e.g. 0.1")
+    p.add_argument("--yes", action="store_true", help="skip the confirmation prompt")
+    p.set_defaults(run=_twap)
+
+    p = sub.add_parser("grid", help="place a grid around the current price")
+    p.add_argument("symbol")
+    p.add_argument("total_quantity", type=float)
+    p.add_argument("--levels", type=int, default=GRID_LEVELS)
+    p.add_argument("--profit-percent", type=float, default=GRID_PROFIT_PERCENTAGE)
+    p.add_argument("--spacing", default="arithmetic", choices=["arithmetic", "geometric"])
+    p.set_defaults(run=_grid)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src", description="Binance Futures trading bot")
+    sub = parser.add_subparsers(dest="command", required=True)
+    _order_parsers(sub)
+    p = sub.add_parser("batch", help="run one order per line from a file or stdin")
+    p.add_argument("file", help="path, or - for stdin; lines look like 'market BTCUSDT BUY 0.01', # starts a comment")
+    p.add_argument("--workers", type=int, default=1, help="orders in flight at once (1 keeps file order)")
+    p.add_argument("--stop-on-error", action="store_true", help="stop at the first failed order (with --workers 1)")
+    p = sub.add_parser("journal", help="query the order journal (python -m src journal query --help)", add_help=False)
+    p.add_argument("args", nargs=argparse.REMAINDER)
+    return parser
+
+def _run(args: argparse.Namespace) -> Outcome:
+    try:
+        return args.run(args)
+    except Exception as e:
+        return False, f"{type(e).__name__}: {e}"
+
+def _batch_lines(file: str) -> List[Tuple[int, List[str]]]:
+    stream = sys.stdin if file == "-" else open(file)
+    try:
+        lines = [(n, shlex.split(line, comments=True)) for n, line in enumerate(stream, 1)]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return [(n, argv) for n, argv in lines if argv]
+
+def _parse_line(parser: argparse.ArgumentParser, argv: List[str]) -> Optional[argparse.Namespace]:
+    """Parsed order line, or None if argparse rejected it (its message has gone to stderr)"""
+    if argv[0] in ("batch", "journal"):
+        print(f"batch lines cannot run {argv[0]}", file=sys.stderr)
+        return None
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit:
+        return None
+    args.yes = True  # the batch file is the confirmation
+    args.wait = False  # an OCO waiting for its pair to finish would hold up every later line
+    return args
+
+def run_batch(file: str, workers: int = 1, stop_on_error: bool = False) -> int:
+    """Run every order line in one process; returns the number that failed"""
+    parser = build_parser()
+    jobs = [(n, _parse_line(parser, argv)) for n, argv in _batch_lines(file)]
+    failed = 0
+    if workers > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = pool.map(lambda job: _run(job[1]) if job[1] else (False, "invalid line"), jobs)
+            for (n, _), (ok, message) in zip(jobs, outcomes):
+                failed += not ok
+                print(f"{n}: {'✅' if ok else '❌'} {message}")
+        return failed
+    for n, args in jobs:
+        ok, message = _run(args) if args else (False, "invalid line")
+        failed += not ok
+        print(f"{n}: {'✅' if ok else '❌'} {message}", flush=True)
+        if not ok and stop_on_error:
+            break
+    return failed
+
+def main(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+    if args.command == "journal":
+        from .journal import main as journal_main
+        journal_main(args.args)
+        return
+    if args.command == "batch":
+        failed = run_batch(args.file, args.workers, args.stop_on_error)
+        if failed:
+            print(f"❌ {failed} order(s) failed. Check bot.log for details.")
+        sys.exit(1 if failed else 0)
+    ok, message = _run(args)
+    if ok:
+        print(f"✅ {message}")
+    else:
+        print(f"❌ {message}. Check bot.log for details.")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,23 @@ Handles API credentials, endpoints, and default parameters.
 """
 
 import os
-from dotenv import load_dotenv
+
+def _load_env_file() -> None:
+    """Load the nearest .env above this package, as load_dotenv() would; python-dotenv is only imported if one exists"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            from dotenv import load_dotenv
+            load_dotenv(path)
+            return
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return
+        directory = parent
 
 # Load environment variables from .env file
-load_dotenv()
+_load_env_file()
 
 # Binance API Configuration
 API_KEY = os.getenv("BINANCE_API_KEY", "")
@@ -19,20 +32,67 @@ TESTNET_URL = "https://testnet.binancefuture.com"  # Testnet
 
 # Use Testnet by default (safety)
 USE_TESTNET = os.getenv("USE_TESTNET", "true").lower() in ("1", "true", "yes")
-API_BASE_URL = TESTNET_URL if USE_TESTNET else BASE_URL
+API_BASE_URL = os.getenv("BINANCE_BASE_URL") or (TESTNET_URL if USE_TESTNET else BASE_URL)  # override e.g. for the local simulator
+
+# WebSocket market data (bookTicker / markPrice)
+WS_BASE_URL = os.getenv("WS_BASE_URL", "wss://stream.binancefuture.com" if USE_TESTNET else "wss://fstream.binance.com")
+PRICE_STREAM_ENABLED = os.getenv("PRICE_STREAM_ENABLED", "false").lower() in ("1", "true", "yes")
+PRICE_STALE_AFTER = float(os.getenv("PRICE_STALE_AFTER", "2"))  # seconds before falling back to REST
+
+# Local order book (diff-depth stream + /depth snapshot)
+ORDER_BOOK_DEPTH = int(os.getenv("ORDER_BOOK_DEPTH", "1000"))  # snapshot levels per side (request weight 20 at 1000)
+ORDER_BOOK_STREAM_SPEED = os.getenv("ORDER_BOOK_STREAM_SPEED", "100ms")  # diff update interval: 100ms, 250ms or 500ms
+ORDER_BOOK_SYNC_TIMEOUT = float(os.getenv("ORDER_BOOK_SYNC_TIMEOUT", "10"))  # seconds a placer waits for a new book
+BOOK_PRICE_MODES = ("passive", "improve", "marketable")  # price keywords resolved from the local book
 
 # Logging Configuration
-LOG_FILE = "bot.log"
+LOG_FILE = os.getenv("LOG_FILE", "bot.log")
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_QUEUE = os.getenv("LOG_QUEUE", "false").lower() in ("1", "true", "yes")  # write from a background thread
+LOG_JSON = os.getenv("LOG_JSON", "false").lower() in ("1", "true", "yes")  # JSON lines instead of LOG_FORMAT
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", "0"))  # rotate at this size; 0 disables rotation
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
 
 # Order Configuration
 DEFAULT_RECV_WINDOW = 5000
+TIME_SYNC_ENABLED = os.getenv("TIME_SYNC_ENABLED", "true").lower() in ("1", "true", "yes")
+TIME_SYNC_INTERVAL = 300  # seconds between server time resyncs
+TIME_SYNC_SAMPLES = 3  # /time round trips per resync; the lowest-RTT one wins
 REQUEST_TIMEOUT = 10  # seconds
 
+# HTTP Connection Pool
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))  # keep-alive connections per base URL
+HTTP_PREWARM = os.getenv("HTTP_PREWARM", "false").lower() in ("1", "true", "yes")
+
+# Client-side rate limits (Binance USDT-M defaults)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_WEIGHT_PER_MIN = int(os.getenv("RATE_LIMIT_WEIGHT_PER_MIN", "2400"))
+RATE_LIMIT_ORDERS_PER_10S = int(os.getenv("RATE_LIMIT_ORDERS_PER_10S", "300"))
+RATE_LIMIT_ORDERS_PER_MIN = int(os.getenv("RATE_LIMIT_ORDERS_PER_MIN", "1200"))
+RATE_LIMIT_INFO_RESERVE = 0.1  # share of weight kept free for order placement/cancels
+
+# Request Metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")  # latency histograms and counters
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # serve /metrics from long-running processes; 0 = off
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# Order Journal
+JOURNAL_ENABLED = os.getenv("JOURNAL_ENABLED", "false").lower() in ("1", "true", "yes")  # binary record of requests, acks and fills; opt-in
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", "journal")  # append-only records plus their side indexes; relative to the working directory
+JOURNAL_FLUSH_INTERVAL = float(os.getenv("JOURNAL_FLUSH_INTERVAL", "0.2"))  # seconds records may wait in the write buffer
+JOURNAL_FSYNC = os.getenv("JOURNAL_FSYNC", "false").lower() in ("1", "true", "yes")  # fsync each flush: survives power loss, not just a crash
+JOURNAL_REPLAY_HOURS = float(os.getenv("JOURNAL_REPLAY_HOURS", "24"))  # closed orders this recent are restored on startup; open ones always are
+
+# Exchange Info Cache
+EXCHANGE_INFO_TTL = int(os.getenv("EXCHANGE_INFO_TTL", "3600"))  # seconds
+EXCHANGE_INFO_CACHE_FILE = os.getenv("EXCHANGE_INFO_CACHE_FILE", "")  # empty = memory only
+
 # Risk Management
-MAX_POSITION_SIZE = 1.0
-MIN_ORDER_SIZE = 0.001
+RISK_CHECKS_ENABLED = os.getenv("RISK_CHECKS_ENABLED", "true").lower() in ("1", "true", "yes")
+MAX_POSITION_SIZE = os.getenv("MAX_POSITION_SIZE", "")  # base asset per symbol and position side, open orders included: "BTCUSDT:1,DOGEUSDT:5000", or one number for every symbol; empty disables
+MAX_POSITION_NOTIONAL = float(os.getenv("MAX_POSITION_NOTIONAL", "0"))  # same, in quote asset; 0 disables
+MIN_ORDER_SIZE = float(os.getenv("MIN_ORDER_SIZE", "0.001"))
 
 # Grid Trading Configuration
 GRID_LEVELS = 10
@@ -41,3 +101,16 @@ GRID_PROFIT_PERCENTAGE = 0.5  # 0.5% profit per grid
 # TWAP Configuration
 TWAP_DEFAULT_INTERVALS = 10
 TWAP_DEFAULT_DURATION = 300  # seconds
+TWAP_MODES = ("TWAP", "VWAP", "POV")  # equal slices, slices sized by the intraday volume profile, or by live traded volume
+VWAP_PROFILE_DAYS = int(os.getenv("VWAP_PROFILE_DAYS", "14"))  # days of 1m klines averaged into the volume profile
+VWAP_PROFILE_TTL = int(os.getenv("VWAP_PROFILE_TTL", "86400"))  # seconds before a cached profile is rebuilt
+POV_DEFAULT_RATE = float(os.getenv("POV_DEFAULT_RATE", "0.1"))  # share of traded volume a POV execution targets
+
+# Strategy Daemon
+DAEMON_SOCKET = os.getenv("DAEMON_SOCKET", "/tmp/binance-futures-bot.sock")
+DAEMON_WORKERS = int(os.getenv("DAEMON_WORKERS", "0"))  # processes for CPU-heavy jobs; 0 = CPU count
+
+# Historical Data and Backtesting
+BACKTEST_DATA_DIR = os.getenv("BACKTEST_DATA_DIR", "data")  # columnar market data, one folder per symbol
+KLINES_DOWNLOAD_WORKERS = int(os.getenv("KLINES_DOWNLOAD_WORKERS", "8"))  # concurrent /klines pages; the rate limiter still paces them
+BACKTEST_FEE_RATE = float(os.getenv("BACKTEST_FEE_RATE", "0.0004"))  # charged on the notional of every fill
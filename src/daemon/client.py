@@ -0,0 +1,120 @@
+"""
+Strategy Daemon Client
+Talks to a running src.daemon.server over its Unix socket. Deliberately imports
+nothing from the bot (no dotenv, requests or numpy), so submitting a job costs an
+interpreter start plus one local round trip.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import socket
+import sys
+from typing import Dict, List, Optional
+
+# Same default as config.DAEMON_SOCKET, read here without importing config
+DEFAULT_SOCKET = os.getenv("DAEMON_SOCKET", "/tmp/binance-futures-bot.sock")
+
+class DaemonError(RuntimeError):
+    pass
+
+class DaemonClient:
+    """Blocking client; one connection, reused for every call"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, timeout: Optional[float] = 30.0):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(socket_path)
+        self._file = self._sock.makefile("rb")
+        self._ids = itertools.count(1)
+
+    def call(self, cmd: str, **fields) -> Dict:
+        request_id = next(self._ids)
+        self._sock.sendall(json.dumps({"id": request_id, "cmd": cmd, **fields}).encode() + b"\n")
+        line = self._file.readline()
+        if not line:
+            raise DaemonError("daemon closed the connection")
+        reply = json.loads(line)
+        if reply.get("id") != request_id:
+            raise DaemonError(f"out-of-order reply {reply.get('id')} for request {request_id}")
+        return reply
+
+    def submit(self, strategy: str, params: Dict, wait: bool = False) -> Dict:
+        return self.call("submit", strategy=strategy, params=params, wait=wait)
+
+    def status(self, job_id: Optional[int] = None) -> Dict:
+        return self.call("status", **({"job_id": job_id} if job_id is not None else {}))
+
+    def cancel(self, job_id: int) -> Dict:
+        return self.call("cancel", job_id=job_id)
+
+    def positions(self) -> Dict:
+        return self.call("positions")
+
+    def metrics(self) -> Dict:
+        return self.call("metrics")
+
+    def ping(self) -> Dict:
+        return self.call("ping")
+
+    def shutdown(self) -> Dict:
+        return self.call("shutdown")
+
+    def close(self) -> None:
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def _params(pairs: List[str]) -> Dict:
+    params = {}
+    for pair in pairs:
+        key, value = pair.split("=", 1)
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    return params
+
+def main():
+    parser = argparse.ArgumentParser(description="Control the strategy daemon")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    sub = parser.add_subparsers(dest="command", required=True)
+    submit = sub.add_parser("submit", help="e.g. submit twap symbol=BTCUSDT side=BUY total_quantity=0.1 intervals=10 duration_seconds=300")
+    submit.add_argument("strategy")
+    submit.add_argument("params", nargs="*", help="key=value; values are parsed as JSON where possible")
+    submit.add_argument("--wait", action="store_true", help="reply once placement finishes instead of when scheduled")
+    status = sub.add_parser("status")
+    status.add_argument("job_id", type=int, nargs="?")
+    cancel = sub.add_parser("cancel")
+    cancel.add_argument("job_id", type=int)
+    sub.add_parser("positions", help="the daemon's position and exposure book")
+    sub.add_parser("metrics", help="latency/counter snapshot from the daemon")
+    sub.add_parser("ping")
+    sub.add_parser("shutdown")
+    args = parser.parse_args()
+
+    try:
+        with DaemonClient(args.socket) as client:
+            if args.command == "submit":
+                reply = client.submit(args.strategy, _params(args.params), args.wait)
+            elif args.command in ("status", "cancel"):
+                reply = getattr(client, args.command)(args.job_id)
+            else:
+                reply = getattr(client, args.command)()
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"❌ No daemon listening on {args.socket}. Start one with: python -m src.daemon.server")
+        sys.exit(1)
+    except DaemonError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(json.dumps(reply, indent=2))
+    sys.exit(0 if reply.get("ok") else 1)
+
+if __name__ == "__main__":
+    main()
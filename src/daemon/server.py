@@ -0,0 +1,329 @@
+"""
+Strategy Daemon
+One resident process hosting TWAP, grid, stop-limit, OCO and plain orders for any
+number of symbols. Every order goes through this process's pooled sessions, signer
+and rate limiter; backtests and sweeps run in a worker process pool. Jobs arrive as
+JSON lines on a Unix socket and are acknowledged as soon as they are scheduled.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from .. import exchange_info, journal, metrics, positions, time_sync
+from ..utils import close_async_sessions, close_sessions, make_request_async, setup_logger
+from ..config import DAEMON_SOCKET, DAEMON_WORKERS, METRICS_PORT
+
+logger = setup_logger("daemon")
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "PENDING", "RUNNING", "DONE", "FAILED", "CANCELLED"
+
+class Job:
+    __slots__ = ("job_id", "strategy", "params", "state", "result", "error", "created_at", "finished_at", "handle", "task")
+
+    def __init__(self, job_id: int, strategy: str, params: Dict):
+        self.job_id = job_id
+        self.strategy = strategy
+        self.params = params
+        self.state = PENDING
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.handle: Any = None  # TWAPJob / GridState / OCOPair for long-running strategies
+        self.task: Optional[asyncio.Task] = None
+
+    def status(self) -> Dict:
+        status = {
+            "job_id": self.job_id,
+            "strategy": self.strategy,
+            "symbol": self.params.get("symbol"),
+            "state": self.state,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if self.handle is not None:
+            status["progress"] = self.handle.status()
+        if self.result is not None:
+            status["result"] = self.result
+        if self.error:
+            status["error"] = self.error
+        return status
+
+class StrategyDaemon:
+    def __init__(self, socket_path: str = DAEMON_SOCKET, workers: int = DAEMON_WORKERS, user_stream: bool = True):
+        self.socket_path = socket_path
+        self.workers = workers or os.cpu_count() or 1
+        self.user_stream = user_stream
+        self.jobs: Dict[int, Job] = {}
+        self._twap_jobs: Dict[int, Job] = {}  # TWAPJob.job_id -> daemon job
+        self._oco_jobs: Dict[int, Job] = {}   # OCOPair.pair_id -> daemon job
+        self._ids = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._twap = None
+        self._grids = None
+        self._ocos = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._runners: Dict[str, Callable] = {
+            "market": self._run_market,
+            "limit": self._run_limit,
+            "stop_limit": self._run_stop_limit,
+            "oco": self._run_oco,
+            "twap": self._run_twap,
+            "grid": self._run_grid,
+            "backtest": self._run_backtest,
+            "sweep": self._run_sweep,
+        }
+
+    # -------- Lifecycle --------
+    async def serve(self) -> None:
+        from ..advanced.twap_engine import TWAPEngine
+        from ..advanced.grid_loop import GridLoop
+        from ..advanced.oco import OCOEngine
+
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        if journal.ENABLED:
+            # before the user stream starts, so its reconcile also closes restored orders that finished meanwhile
+            await self._loop.run_in_executor(None, journal.restore)
+        self._twap = TWAPEngine(self._loop)
+        self._twap.add_done_callback(self._twap_done)
+        self._grids = GridLoop(self._loop).start(user_stream=self.user_stream)
+        self._ocos = OCOEngine(self._loop).start(user_stream=self.user_stream)
+        self._ocos.add_done_callback(self._oco_done)
+        await self._warm_up()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._client, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)  # the socket can place orders; owner only
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            self._loop.add_signal_handler(sig, self._stopped.set)
+        logger.info(f"Strategy daemon listening on {self.socket_path}")
+        await self._stopped.wait()
+        await self._shutdown()
+
+    async def _warm_up(self) -> None:
+        """Pay clock sync, exchange info and connection setup before the first job"""
+        time_sync.start(block=False)
+        await self._loop.run_in_executor(None, exchange_info.refresh)
+        await self._loop.run_in_executor(None, positions.book.seed)
+        try:
+            await make_request_async("GET", "/fapi/v1/ping")
+        except Exception as e:
+            logger.warning(f"Warm-up ping failed: {e}")
+
+    async def _shutdown(self) -> None:
+        logger.info("Strategy daemon stopping")
+        self._server.close()
+        await self._server.wait_closed()
+        for job in self.jobs.values():
+            if job.state in (PENDING, RUNNING):
+                await self._cancel(job)
+        await self._loop.run_in_executor(None, self._grids.stop)
+        await self._loop.run_in_executor(None, self._ocos.stop)  # unlinked legs could both fill, so they are cancelled
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        await close_async_sessions()
+        close_sessions()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    # -------- Protocol: one JSON object per line each way --------
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    request, reply = {}, {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                else:
+                    try:
+                        reply = await self.dispatch(request)
+                    except Exception as e:
+                        reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                if isinstance(request, dict) and "id" in request:
+                    reply["id"] = request["id"]
+                writer.write(json.dumps(reply, default=str).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request: Dict) -> Dict:
+        cmd = request.get("cmd")
+        if cmd == "submit":
+            job = self.submit(request["strategy"], request.get("params", {}))
+            if request.get("wait"):
+                await asyncio.shield(job.task)
+                return {"ok": job.state not in (FAILED, CANCELLED), "job": job.status()}
+            return {"ok": True, "job_id": job.job_id}
+        if cmd == "status":
+            if "job_id" in request:
+                return {"ok": True, "job": self._job(request["job_id"]).status()}
+            return {"ok": True, "jobs": [job.status() for job in self.jobs.values()]}
+        if cmd == "cancel":
+            job = self._job(request["job_id"])
+            await self._cancel(job)
+            return {"ok": True, "job": job.status()}
+        if cmd == "positions":
+            return {"ok": True, "positions": positions.book.snapshot()}
+        if cmd == "metrics":
+            return {"ok": True, "metrics": metrics.snapshot(), "oco": self._ocos.latency()}
+        if cmd == "ping":
+            return {"ok": True, "pid": os.getpid(), "jobs": len(self.jobs)}
+        if cmd == "shutdown":
+            self._loop.call_soon(self._stopped.set)
+            return {"ok": True}
+        return {"ok": False, "error": f"Unknown command {cmd!r}"}
+
+    # -------- Jobs --------
+    def _job(self, job_id) -> Job:
+        job = self.jobs.get(int(job_id))
+        if job is None:
+            raise ValueError(f"Unknown job {job_id}")
+        return job
+
+    def submit(self, strategy: str, params: Dict) -> Job:
+        if strategy not in self._runners:
+            raise ValueError(f"Unknown strategy {strategy!r}; expected one of {sorted(self._runners)}")
+        job = Job(next(self._ids), strategy, params)
+        self.jobs[job.job_id] = job
+        job.task = asyncio.ensure_future(self._execute(job))
+        return job
+
+    async def _execute(self, job: Job) -> None:
+        job.state = RUNNING
+        try:
+            result = await self._runners[job.strategy](job, **job.params)
+        except asyncio.CancelledError:
+            job.state = CANCELLED
+        except Exception as e:
+            job.state, job.error = FAILED, f"{type(e).__name__}: {e}"
+            logger.exception(f"Job {job.job_id} ({job.strategy}) failed")
+        else:
+            if job.handle is not None:
+                return  # long-running; finishes through its engine
+            job.result = result
+            job.state = DONE if result is not None else FAILED
+            if result is None:
+                job.error = "rejected; check bot.log"
+        job.finished_at = time.time()
+
+    async def _cancel(self, job: Job) -> None:
+        if job.state not in (PENDING, RUNNING):
+            return
+        if job.strategy == "twap" and job.handle is not None:
+            self._twap.cancel(job.handle.job_id)  # the done callback finishes the job
+            return
+        if job.strategy == "oco" and job.handle is not None:
+            self._ocos.cancel(job.handle.pair_id)  # the done callback finishes the job
+            return
+        if job.strategy == "grid" and job.handle is not None:
+            await self._loop.run_in_executor(None, self._grids.remove_grid, job.handle.grid_id)
+        elif job.task:
+            job.task.cancel()
+        job.state, job.finished_at = CANCELLED, time.time()
+
+    def _twap_done(self, twap_job) -> None:
+        job = self._twap_jobs.pop(twap_job.job_id, None)
+        if job is not None:
+            job.state = CANCELLED if twap_job.state == "CANCELLED" else DONE
+            job.finished_at = time.time()
+
+    def _oco_done(self, pair) -> None:
+        job = self._oco_jobs.pop(pair.pair_id, None)
+        if job is not None:
+            job.state = {"DONE": DONE, "FAILED": FAILED}.get(pair.state, CANCELLED)
+            if pair.state == "FAILED":
+                job.error = "placement failed; check bot.log"
+            job.finished_at = time.time()
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawned so workers never inherit sessions, sockets or background threads
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    # -------- Strategy runners: order placement stays in this process --------
+    async def _run_market(self, job: Job, **params):
+        from ..market_orders import place_market_order_async
+        return await place_market_order_async(**params)
+
+    async def _run_limit(self, job: Job, **params):
+        from ..limit_orders import place_limit_order_async
+        return await place_limit_order_async(**params)
+
+    async def _run_stop_limit(self, job: Job, **params):
+        from ..advanced.stop_limit import place_stop_limit_order_async
+        return await place_stop_limit_order_async(**params)
+
+    async def _run_oco(self, job: Job, **params):
+        # validation may fetch exchange info or seed positions over blocking REST
+        pair = await self._loop.run_in_executor(None, partial(self._ocos.add_pair, **params))
+        if pair is None:
+            return None
+        job.handle = pair
+        self._oco_jobs[pair.pair_id] = job
+        if pair.done.is_set():
+            self._oco_done(pair)  # placement failed before the job was registered
+        return pair.pair_id
+
+    async def _run_twap(self, job: Job, **params):
+        twap_job = await self._twap.submit_async(**params)
+        if twap_job is None:
+            return None
+        job.handle = twap_job
+        self._twap_jobs[twap_job.job_id] = job
+        if twap_job.state in ("DONE", "CANCELLED"):
+            self._twap_done(twap_job)  # finished before the job was registered
+        return twap_job.job_id
+
+    async def _run_grid(self, job: Job, **params):
+        # add_grid fetches the price over blocking REST
+        grid = await self._loop.run_in_executor(None, partial(self._grids.add_grid, **params))
+        if grid is None:
+            return None
+        job.handle = grid
+        return grid.grid_id
+
+    async def _run_backtest(self, job: Job, **params):
+        from ..backtest.engine import run_backtest
+        return await self._loop.run_in_executor(self._process_pool(), partial(run_backtest, **params))
+
+    async def _run_sweep(self, job: Job, fixed: Dict, grid: Dict, sort_by: str = "pnl", **kwargs):
+        from ..backtest.sweep import combinations, run_combination
+        runs = combinations(fixed, grid)
+        pool = self._process_pool()
+        results = await asyncio.gather(*(self._loop.run_in_executor(pool, partial(run_combination, params, **kwargs)) for params in runs))
+        return sorted(results, key=lambda r: (r.get("accepted", False), r.get(sort_by, float("-inf"))), reverse=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the resident strategy daemon")
+    parser.add_argument("--socket", default=DAEMON_SOCKET)
+    parser.add_argument("--workers", type=int, default=DAEMON_WORKERS, help="processes for backtests/sweeps (0 = CPU count)")
+    parser.add_argument("--no-user-stream", action="store_true", help="do not open the user data stream (grids will not re-arm)")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT, help="serve Prometheus /metrics on this port (0 = off)")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+
+    daemon = StrategyDaemon(args.socket, args.workers, not args.no_user_stream)
+    print(f"Strategy daemon listening on {args.socket} (Ctrl-C to stop)")
+    asyncio.run(daemon.serve())
+
+if __name__ == "__main__":
+    main()
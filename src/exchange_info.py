@@ -0,0 +1,195 @@
+"""
+Exchange Info Cache
+Indexes /fapi/v1/exchangeInfo symbol filters so orders are validated and rounded locally.
+"""
+
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, NamedTuple, Optional
+from . import market_data
+from .utils import get_current_price, get_current_price_async, make_request, setup_logger
+from .config import EXCHANGE_INFO_TTL, EXCHANGE_INFO_CACHE_FILE
+
+logger = setup_logger("exchange_info")
+EXCHANGE_INFO_ENDPOINT = "/fapi/v1/exchangeInfo"
+RETRY_AFTER_FAILURE = 60  # seconds before retrying a failed refresh
+
+class SymbolFilters(NamedTuple):
+    symbol: str
+    tick_size: float
+    min_price: float
+    max_price: float
+    step_size: float
+    min_qty: float
+    max_qty: float
+    market_step_size: float
+    market_min_qty: float
+    market_max_qty: float
+    min_notional: float
+    price_decimals: int
+    qty_decimals: int
+
+_index: Dict[str, SymbolFilters] = {}
+_loaded_at = 0.0
+_failed_at = 0.0
+_lock = threading.Lock()
+
+def _decimals(step: float) -> int:
+    return max(0, -Decimal(str(step)).normalize().as_tuple().exponent)
+
+def _parse_symbol(info: Dict) -> SymbolFilters:
+    filters = {f["filterType"]: f for f in info.get("filters", [])}
+    price = filters.get("PRICE_FILTER", {})
+    lot = filters.get("LOT_SIZE", {})
+    market_lot = filters.get("MARKET_LOT_SIZE", lot)
+    notional = filters.get("MIN_NOTIONAL", {})
+    tick = float(price.get("tickSize", 0) or 0)
+    step = float(lot.get("stepSize", 0) or 0)
+    return SymbolFilters(
+        symbol=info["symbol"],
+        tick_size=tick,
+        min_price=float(price.get("minPrice", 0) or 0),
+        max_price=float(price.get("maxPrice", 0) or 0),
+        step_size=step,
+        min_qty=float(lot.get("minQty", 0) or 0),
+        max_qty=float(lot.get("maxQty", 0) or 0),
+        market_step_size=float(market_lot.get("stepSize", 0) or 0),
+        market_min_qty=float(market_lot.get("minQty", 0) or 0),
+        market_max_qty=float(market_lot.get("maxQty", 0) or 0),
+        min_notional=float(notional.get("notional", notional.get("minNotional", 0)) or 0),
+        price_decimals=_decimals(tick) if tick else 8,
+        qty_decimals=_decimals(step) if step else 8,
+    )
+
+def _load_from_disk() -> bool:
+    global _index, _loaded_at
+    if not EXCHANGE_INFO_CACHE_FILE or not os.path.exists(EXCHANGE_INFO_CACHE_FILE):
+        return False
+    try:
+        with open(EXCHANGE_INFO_CACHE_FILE) as f:
+            data = json.load(f)
+        if time.time() - data["saved_at"] > EXCHANGE_INFO_TTL:
+            return False
+        _index = {s: SymbolFilters(*v) for s, v in data["symbols"].items()}
+        _loaded_at = time.monotonic() - (time.time() - data["saved_at"])
+        logger.info(f"Loaded {len(_index)} symbols from {EXCHANGE_INFO_CACHE_FILE}")
+        return True
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable exchange info cache {EXCHANGE_INFO_CACHE_FILE}: {e}")
+        return False
+
+def _save_to_disk() -> None:
+    if not EXCHANGE_INFO_CACHE_FILE:
+        return
+    tmp = EXCHANGE_INFO_CACHE_FILE + ".tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump({"saved_at": time.time(), "symbols": {s: list(v) for s, v in _index.items()}}, f)
+        os.replace(tmp, EXCHANGE_INFO_CACHE_FILE)
+    except Exception as e:
+        logger.warning(f"Failed to persist exchange info cache: {e}")
+
+def refresh(force: bool = False) -> bool:
+    """Reload the symbol index from disk or REST if it is missing or older than the TTL"""
+    global _index, _loaded_at, _failed_at
+    with _lock:
+        now = time.monotonic()
+        if not force and _index and now - _loaded_at < EXCHANGE_INFO_TTL:
+            return True
+        if not force and _failed_at and now - _failed_at < RETRY_AFTER_FAILURE:
+            return bool(_index)
+        if not force and not _index and _load_from_disk():
+            return True
+        try:
+            data = make_request("GET", EXCHANGE_INFO_ENDPOINT)
+            _index = {s["symbol"]: _parse_symbol(s) for s in data.get("symbols", []) if s.get("status", "TRADING") == "TRADING"}
+            _loaded_at = time.monotonic()
+            _failed_at = 0.0
+            logger.info(f"Indexed filters for {len(_index)} symbols")
+            _save_to_disk()
+            return True
+        except Exception as e:
+            _failed_at = time.monotonic()
+            logger.warning(f"Exchange info unavailable, falling back to basic validation: {e}")
+            return bool(_index)
+
+async def refresh_async() -> bool:
+    """refresh() for event loops: a due download runs in an executor thread instead of blocking the loop"""
+    if _index and time.monotonic() - _loaded_at < EXCHANGE_INFO_TTL:
+        return True
+    return await asyncio.get_running_loop().run_in_executor(None, refresh)
+
+async def preload_async(symbol: str, market: bool = False) -> None:
+    """Fetch what validate_order would otherwise get over blocking REST: the filters, and a market order's reference price"""
+    await refresh_async()
+    if market and market_data.get_snapshot(symbol) is None:
+        await get_current_price_async(symbol)
+
+def get_symbol_filters(symbol: str) -> Optional[SymbolFilters]:
+    """Filters for a symbol, or None when the index is unavailable or the symbol is not trading"""
+    if not _index or time.monotonic() - _loaded_at >= EXCHANGE_INFO_TTL:
+        refresh()
+    return _index.get(symbol.upper())
+
+# -------- Quantize Helpers --------
+def quantize_price(symbol: str, price: float) -> float:
+    """Round a price to the nearest tick (2 decimals if the symbol is unknown)"""
+    f = get_symbol_filters(symbol)
+    if not f or not f.tick_size:
+        return round(price, 2)
+    return round(round(price / f.tick_size) * f.tick_size, f.price_decimals)
+
+def quantize_quantity(symbol: str, quantity: float, market: bool = False) -> float:
+    """Round a quantity down to the lot step so it never exceeds what was asked for"""
+    f = get_symbol_filters(symbol)
+    step = (f.market_step_size if market else f.step_size) if f else 0
+    if not step:
+        return quantity
+    return round(math.floor(quantity / step + 1e-9) * step, f.qty_decimals)
+
+def _on_step(value: float, step: float) -> bool:
+    return not step or abs(round(value / step) * step - value) <= step * 1e-6
+
+# -------- Validation --------
+def validate_order(symbol: str, quantity: float, price: Optional[float] = None, market: bool = False) -> bool:
+    """
+    Check an order against the symbol's filters; passes when the index is unavailable.
+    A market order's notional is checked at the last known price (REST if none is cached).
+    """
+    if not _index and not refresh():
+        return True
+    f = get_symbol_filters(symbol)
+    if f is None:
+        logger.error(f"Unknown or non-trading symbol: {symbol}")
+        return False
+    quantity = float(quantity)
+    min_qty, max_qty, step = (f.market_min_qty, f.market_max_qty, f.market_step_size) if market else (f.min_qty, f.max_qty, f.step_size)
+    if quantity < min_qty or (max_qty and quantity > max_qty):
+        logger.error(f"Quantity {quantity} outside [{min_qty}, {max_qty}] for {f.symbol}")
+        return False
+    if not _on_step(quantity, step):
+        logger.error(f"Quantity {quantity} is not a multiple of step size {step} for {f.symbol}")
+        return False
+    if price is None and market and f.min_notional:
+        snapshot = market_data.get_snapshot(symbol)
+        reference = snapshot.price if snapshot and snapshot.price else get_current_price(symbol)  # a rough price is enough here
+        if reference and reference * quantity < f.min_notional:
+            logger.error(f"Notional {reference * quantity} at {reference} below minimum {f.min_notional} for {f.symbol}")
+            return False
+    if price is not None:
+        price = float(price)
+        if price < f.min_price or (f.max_price and price > f.max_price):
+            logger.error(f"Price {price} outside [{f.min_price}, {f.max_price}] for {f.symbol}")
+            return False
+        if not _on_step(price, f.tick_size):
+            logger.error(f"Price {price} is not a multiple of tick size {f.tick_size} for {f.symbol}")
+            return False
+        if f.min_notional and price * quantity < f.min_notional:
+            logger.error(f"Notional {price * quantity} below minimum {f.min_notional} for {f.symbol}")
+            return False
+    return True
@@ -0,0 +1,576 @@
+"""
+Order Journal
+Append-only binary record of every order request, REST ack, stream update and fill,
+one fixed-size record each. Records are packed into an in-memory buffer and written
+with a single O_APPEND write per flush, so several processes can share the file and
+stay record-aligned; a torn tail left by a crash is cut off before the next write or
+replay. Sorted side indexes by orderId, symbol and time let queries over millions of
+records read only the rows they return, and restore() rebuilds the order store on
+restart.
+"""
+
+import argparse
+import atexit
+import itertools
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from . import metrics
+from .logger import setup_logger
+from .config import JOURNAL_DIR, JOURNAL_ENABLED, JOURNAL_FLUSH_INTERVAL, JOURNAL_FSYNC, JOURNAL_REPLAY_HOURS
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, so one writing process at a time
+    fcntl = None
+
+logger = setup_logger("journal")
+ENABLED = JOURNAL_ENABLED  # toggle at runtime with enable()
+JOURNAL_FILE = "orders.bin"
+BUFFER_RECORDS = 4096  # a full buffer is flushed at once, without waiting for the interval
+VERIFY_TAIL = 4096  # records checksummed on open; only the last flushes can be torn
+INDEX_TAIL = 65536  # unindexed records a query scans linearly before the indexes are extended
+MAX_TAGS = 100_000  # strategy labels remembered per process; the oldest half goes when full
+
+PLACE, CANCEL, ACK, UPDATE, FILL, ERROR = 1, 2, 3, 4, 5, 6
+KINDS = {"place": PLACE, "cancel": CANCEL, "ack": ACK, "update": UPDATE, "fill": FILL, "error": ERROR}
+KIND_NAMES = {code: name for name, code in KINDS.items()}
+SIDES = ("", "BUY", "SELL")
+POSITION_SIDES = ("", "BOTH", "LONG", "SHORT")
+STATUSES = ("", "NEW", "PARTIALLY_FILLED", "FILLED", "CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH")
+OPEN_STATUSES = (1, 2)
+ORDER_TYPES = ("", "LIMIT", "MARKET", "STOP", "STOP_MARKET", "TAKE_PROFIT", "TAKE_PROFIT_MARKET", "TRAILING_STOP_MARKET")
+REDUCE_ONLY = 1  # flags bit
+
+# (field, struct format); the numpy dtype RECORD mirrors it byte for byte
+FIELDS = (
+    ("time", "q"), ("event_time", "q"), ("order_id", "q"), ("trade_id", "q"),
+    ("price", "d"), ("stop_price", "d"), ("quantity", "d"), ("executed_qty", "d"), ("avg_price", "d"),
+    ("last_qty", "d"), ("last_price", "d"), ("commission", "d"), ("realized_pnl", "d"),
+    ("code", "i"), ("kind", "B"), ("side", "B"), ("status", "B"), ("order_type", "B"), ("position_side", "B"), ("flags", "B"),
+    ("symbol", "16s"), ("strategy", "12s"), ("client_order_id", "36s"), ("reserved", "2s"), ("crc", "I"),
+)
+_DTYPES = {"q": "<i8", "d": "<f8", "i": "<i4", "B": "u1", "I": "<u4"}
+_STRUCT = struct.Struct("<" + "".join(fmt for _, fmt in FIELDS))
+RECORD_SIZE = _STRUCT.size
+RECORD = None  # numpy dtype, built by _numpy() on the first read
+_CRC = struct.Struct("<I")
+_CODES = {table: {name: i for i, name in enumerate(table)} for table in (SIDES, POSITION_SIDES, STATUSES, ORDER_TYPES)}
+
+def _numpy():
+    """numpy and RECORD, loaded on the first read so the write path never imports numpy"""
+    global RECORD
+    import numpy as np
+
+    if RECORD is None:
+        RECORD = np.dtype([(name, _DTYPES.get(fmt, "S" + fmt[:-1])) for name, fmt in FIELDS])
+    return np
+
+def enable(flag: bool = True) -> None:
+    global ENABLED
+    ENABLED = flag
+
+def journal_path(directory: str = JOURNAL_DIR) -> str:
+    return os.path.join(directory, JOURNAL_FILE)
+
+@contextmanager
+def _locked(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+def _valid(record: bytes) -> bool:
+    return zlib.crc32(record[:-4]) == _CRC.unpack_from(record, RECORD_SIZE - 4)[0]
+
+def repair(path: str) -> int:
+    """Cut a partial or corrupt tail (a write torn by a crash); returns the records kept"""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r+b") as f, _locked(f.fileno()):
+        size = os.fstat(f.fileno()).st_size
+        rows = size // RECORD_SIZE
+        first = max(0, rows - VERIFY_TAIL)
+        f.seek(first * RECORD_SIZE)
+        tail = f.read((rows - first) * RECORD_SIZE)
+        keep = first
+        while keep < rows and _valid(tail[(keep - first) * RECORD_SIZE:(keep - first + 1) * RECORD_SIZE]):
+            keep += 1
+        if keep * RECORD_SIZE != size:
+            logger.warning(f"Journal {path}: dropping {size - keep * RECORD_SIZE} bytes of torn tail after record {keep}")
+            f.truncate(keep * RECORD_SIZE)
+    return keep
+
+# -------- Writer --------
+class JournalWriter:
+    """Buffers packed records and appends them from a flusher thread (or when the buffer fills)"""
+
+    def __init__(self, directory: str = JOURNAL_DIR):
+        self.path = journal_path(directory)
+        self._buffer = bytearray(BUFFER_RECORDS * RECORD_SIZE)
+        self._count = 0
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self.written = 0
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        repair(self.path)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        threading.Thread(target=self._flush_loop, name="journal-flush", daemon=True).start()
+
+    def append(self, values: Tuple) -> None:
+        with self._lock:
+            if self._fd is None:
+                self._open()
+            offset = self._count * RECORD_SIZE
+            _STRUCT.pack_into(self._buffer, offset, *values, 0)
+            _CRC.pack_into(self._buffer, offset + RECORD_SIZE - 4, zlib.crc32(memoryview(self._buffer)[offset:offset + RECORD_SIZE - 4]))
+            self._count += 1
+            if self._count == BUFFER_RECORDS:
+                self._flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._count or self._fd is None:
+            return
+        data = memoryview(self._buffer)[:self._count * RECORD_SIZE]
+        try:
+            with _locked(self._fd):
+                while data:
+                    data = data[os.write(self._fd, data):]
+                if JOURNAL_FSYNC:
+                    os.fsync(self._fd)
+            self.written += self._count
+        except OSError as e:
+            logger.error(f"Journal write failed, {self._count} records lost: {e}")
+        self._count = 0
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.wait(JOURNAL_FLUSH_INTERVAL):
+            self.flush()
+
+    def close(self) -> None:
+        self._stopped.set()
+        with self._lock:
+            self._flush()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def _after_fork(self) -> None:
+        # the parent flushes its own buffer; a forked worker starts empty, with its own flusher
+        self._lock = threading.Lock()
+        self._count = 0
+        self._fd = None
+
+_writer = JournalWriter()
+atexit.register(_writer.close)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_writer._after_fork)
+
+def flush() -> None:
+    _writer.flush()
+
+# -------- Recording --------
+# Strategy labels by orderId and by clientOrderId (until acked), so stream events and cancels
+# from elsewhere, which carry no placing call stack, are attributed to the strategy that placed them.
+# Order threads and the stream thread share them, under the writer's lock (reset in a forked child).
+_tags: Dict[int, str] = {}
+_client_tags: Dict[str, str] = {}
+
+def _remember(tags: Dict, key, strategy: str) -> None:
+    """Caller holds _writer._lock"""
+    if len(tags) >= MAX_TAGS:
+        for old in list(itertools.islice(tags, MAX_TAGS // 2)):
+            del tags[old]
+    tags[key] = strategy
+
+def _bytes(value, size: int) -> bytes:
+    return str(value or "").encode()[:size]
+
+def _float(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def _record(kind: int, strategy: str, o: Dict, code: int = 0) -> None:
+    """Pack one record from user-stream style keys (i, c, s, S, ps, o, X, p, sp, q, z, ap, l, L, n, rp, t, T, R)"""
+    _writer.append((
+        int(time.time() * 1000), int(o.get("T", 0) or 0), int(o.get("i", 0) or 0), int(o.get("t", 0) or 0),
+        _float(o.get("p")), _float(o.get("sp")), _float(o.get("q")), _float(o.get("z")), _float(o.get("ap")),
+        _float(o.get("l")), _float(o.get("L")), _float(o.get("n")), _float(o.get("rp")),
+        code, kind,
+        _CODES[SIDES].get(o.get("S"), 0),
+        _CODES[STATUSES].get(o.get("X"), 0),
+        _CODES[ORDER_TYPES].get(o.get("o"), 0),
+        _CODES[POSITION_SIDES].get(o.get("ps"), 0),
+        REDUCE_ONLY if str(o.get("R", "")).lower() == "true" else 0,
+        _bytes(o.get("s"), 16).upper(), _bytes(strategy, 12), _bytes(o.get("c"), 36), b"",
+    ))
+
+def _from_rest(res: Dict) -> Dict:
+    """REST order fields under the stream's short keys"""
+    return {
+        "i": res.get("orderId"), "c": res.get("clientOrderId") or res.get("newClientOrderId") or res.get("origClientOrderId"),
+        "s": res.get("symbol"), "S": res.get("side"), "ps": res.get("positionSide"), "o": res.get("type"),
+        "X": res.get("status"), "p": res.get("price"), "sp": res.get("stopPrice"), "q": res.get("origQty", res.get("quantity")),
+        "z": res.get("executedQty"), "ap": res.get("avgPrice"), "T": res.get("updateTime"), "R": res.get("reduceOnly"),
+    }
+
+def _request_orders(endpoint: str, params: Dict) -> List[Dict]:
+    """One params dict per order a request touches"""
+    if endpoint != "/fapi/v1/batchOrders":
+        return [params]
+    if "batchOrders" in params:
+        orders = params["batchOrders"]
+        return json.loads(orders) if isinstance(orders, str) else list(orders)
+    symbol = params.get("symbol")
+    if "orderIdList" in params:
+        ids = params["orderIdList"]
+        return [{"symbol": symbol, "orderId": i} for i in (json.loads(ids) if isinstance(ids, str) else ids)]
+    ids = params.get("origClientOrderIdList", "[]")
+    return [{"symbol": symbol, "origClientOrderId": c} for c in (json.loads(ids) if isinstance(ids, str) else ids)]
+
+def record_request(method: str, endpoint: str, params: Dict) -> None:
+    """PLACE/CANCEL records for an order request about to go out (GETs are not journaled)"""
+    method = method.upper()
+    if method == "GET":
+        return
+    kind = CANCEL if method == "DELETE" else PLACE
+    strategy = metrics.caller_module()
+    for order in _request_orders(endpoint, params):
+        o = _from_rest(order)
+        if kind == PLACE and o["c"]:
+            with _writer._lock:
+                _remember(_client_tags, o["c"], strategy)
+        _record(kind, strategy, o)
+
+def record_response(method: str, endpoint: str, data) -> None:
+    """ACK records for order responses; per-order errors inside batch responses become ERROR records"""
+    strategy = metrics.caller_module()
+    for res in data if isinstance(data, list) else [data]:
+        if not isinstance(res, dict):
+            continue
+        if "orderId" not in res:
+            if "code" in res and res.get("code") != 200:
+                _record(ERROR, strategy, {}, int(res["code"]))
+            continue
+        o = _from_rest(res)
+        order_id = int(res["orderId"])
+        with _writer._lock:
+            if order_id not in _tags and method.upper() != "GET":
+                _remember(_tags, order_id, _client_tags.pop(o["c"] or "", strategy))  # a later cancel stays with the placing strategy
+            owner = _tags.get(order_id, strategy)
+        _record(ACK, owner, o)
+
+def _error_code(error: BaseException) -> int:
+    response = getattr(error, "response", None)
+    try:
+        return int(response.json()["code"])  # Binance error code, e.g. -2019 margin is insufficient
+    except Exception:
+        return int(getattr(response, "status_code", None) or getattr(error, "status", None) or -1)
+
+def record_error(method: str, endpoint: str, params: Dict, error: BaseException) -> None:
+    if method.upper() == "GET":
+        return
+    strategy, code = metrics.caller_module(), _error_code(error)
+    for order in _request_orders(endpoint, params):
+        _record(ERROR, strategy, _from_rest(order), code)
+
+def record_update(o: Dict) -> None:
+    """UPDATE or FILL record for the "o" payload of an ORDER_TRADE_UPDATE event"""
+    order_id = int(o.get("i", 0) or 0)
+    with _writer._lock:
+        strategy = _tags.get(order_id) or _client_tags.get(o.get("c", ""), "")
+    _record(FILL if o.get("x") == "TRADE" and _float(o.get("l")) > 0 else UPDATE, strategy, o)
+
+# -------- Reading --------
+class Journal:
+    """Memory-mapped records with sorted side indexes, extended as the file grows"""
+
+    INDEXED = ("order_id", "symbol", "time")
+
+    def __init__(self, directory: str = JOURNAL_DIR):
+        np = _numpy()
+        self.directory = directory
+        self.path = journal_path(directory)
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        self.rows = size // RECORD_SIZE  # a tail still being written is left for the next open
+        self.records = np.memmap(self.path, dtype=RECORD, mode="r", shape=(self.rows,)) if self.rows else np.zeros(0, RECORD)
+        self._indexes: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _index_path(self, name: str, part: str) -> str:
+        return os.path.join(self.directory, "index", f"{name}.{part}.npy")
+
+    def _load_index(self, name: str) -> "Tuple[np.ndarray, np.ndarray]":
+        np = _numpy()
+        try:
+            keys = np.load(self._index_path(name, "keys"), mmap_mode="r")
+            rows = np.load(self._index_path(name, "rows"), mmap_mode="r")
+            if len(keys) == len(rows) <= self.rows and keys.dtype == RECORD[name]:
+                return keys, rows
+        except (OSError, ValueError):
+            pass
+        return np.empty(0, RECORD[name]), np.empty(0, np.int64)
+
+    def _save_index(self, name: str, keys: "np.ndarray", rows: "np.ndarray") -> None:
+        np = _numpy()
+        os.makedirs(os.path.join(self.directory, "index"), exist_ok=True)
+        for part, values in (("keys", keys), ("rows", rows)):
+            path = self._index_path(name, part)
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, values)
+            os.replace(path + ".tmp", path)
+
+    def index(self, name: str, extend_at: int = INDEX_TAIL) -> "Tuple[np.ndarray, np.ndarray]":
+        """(sorted keys, their rows) for a column; records past len(rows) are not indexed yet"""
+        np = _numpy()
+        keys, rows = self._indexes.get(name) or self._load_index(name)
+        covered = len(rows)
+        if self.rows - covered > extend_at:
+            tail = np.asarray(self.records[name][covered:])
+            order = np.argsort(tail, kind="stable")
+            keys = np.concatenate((keys, tail[order]))
+            rows = np.concatenate((rows, order.astype(np.int64) + covered))
+            order = np.argsort(keys, kind="stable")  # two sorted runs: a linear merge
+            keys, rows = keys[order], rows[order]
+            try:
+                self._save_index(name, keys, rows)
+            except OSError as e:
+                logger.warning(f"Could not save journal index {name}: {e}")
+        self._indexes[name] = (keys, rows)
+        return keys, rows
+
+    def _lookup(self, name: str, low, high=None) -> "np.ndarray":
+        """Rows whose column equals low, or lies in [low, high) when high is given; ascending"""
+        np = _numpy()
+        keys, rows = self.index(name)
+        lo = np.searchsorted(keys, low, "left")
+        hi = np.searchsorted(keys, high, "left") if high is not None else np.searchsorted(keys, low, "right")
+        tail = np.asarray(self.records[name][len(rows):])
+        hits = (tail == low) if high is None else (tail >= low) & (tail < high)
+        return np.concatenate((np.sort(rows[lo:hi]), np.flatnonzero(hits) + len(rows)))
+
+    def query(self, order_id: Optional[int] = None, symbol: Optional[str] = None, start_ms: Optional[int] = None, end_ms: Optional[int] = None, strategy: Optional[str] = None, client_prefix: Optional[str] = None, kinds: Optional[List[int]] = None) -> "np.ndarray":
+        """Matching records in file order; the narrowest index picks the candidates and the rest filters them"""
+        np = _numpy()
+        if not self.rows:
+            return np.zeros(0, RECORD)
+        candidates = []
+        if order_id is not None:
+            candidates.append(self._lookup("order_id", int(order_id)))
+        if symbol:
+            candidates.append(self._lookup("symbol", symbol.upper().encode()))
+        if start_ms is not None or end_ms is not None:
+            candidates.append(self._lookup("time", start_ms or 0, end_ms or np.iinfo(np.int64).max))
+        rows = min(candidates, key=len) if candidates else None
+        records = self.records[rows] if rows is not None else self.records
+        mask = np.ones(len(records), dtype=bool)
+        if order_id is not None:
+            mask &= records["order_id"] == int(order_id)
+        if symbol:
+            mask &= records["symbol"] == symbol.upper().encode()
+        if start_ms is not None:
+            mask &= records["time"] >= start_ms
+        if end_ms is not None:
+            mask &= records["time"] < end_ms
+        if client_prefix:
+            mask &= np.char.startswith(records["client_order_id"], client_prefix.encode())
+        if kinds:
+            mask &= np.isin(records["kind"], kinds)
+        records = self._attribute(np.array(records[mask]))
+        return records[records["strategy"] == strategy.encode()] if strategy else records
+
+    def _attribute(self, records: "np.ndarray") -> "np.ndarray":
+        """Fill in the strategy of stream records written before their order's ack tagged it with its owner"""
+        np = _numpy()
+        missing = (records["strategy"] == b"") & (records["order_id"] > 0)
+        if not missing.any():
+            return records
+        acks = records[(records["kind"] == ACK) & (records["strategy"] != b"")][::-1]  # first ack wins
+        tags = dict(zip(acks["order_id"].tolist(), acks["strategy"].tolist()))
+        for order_id in np.unique(records["order_id"][missing]).tolist():
+            if order_id not in tags:
+                found = self.records[self._lookup("order_id", order_id)]
+                found = found["strategy"][(found["kind"] == ACK) & (found["strategy"] != b"")]
+                if len(found):
+                    tags[order_id] = found[0]
+        records["strategy"][missing] = [tags.get(i, b"") for i in records["order_id"][missing].tolist()]
+        return records
+
+def summarize(records: "np.ndarray") -> List[Dict]:
+    """Per strategy, symbol and side: orders, fills, filled quantity, notional, fees, realized PnL, errors"""
+    np = _numpy()
+    records = records[records["kind"] != CANCEL]  # cancel requests carry no side; the order's acks and updates do
+    if not len(records):
+        return []
+    groups, inverse = np.unique(records[["strategy", "symbol", "side"]], return_inverse=True)
+    fill = records["kind"] == FILL
+    error = records["kind"] == ERROR
+
+    def total(values: "np.ndarray", where: "np.ndarray") -> "np.ndarray":
+        return np.bincount(inverse, weights=np.where(where, values, 0.0), minlength=len(groups))
+
+    qty = total(records["last_qty"], fill)
+    notional = total(records["last_qty"] * records["last_price"], fill)
+    fees, pnl = total(records["commission"], fill), total(records["realized_pnl"], fill)
+    fills, errors = np.bincount(inverse[fill], minlength=len(groups)), np.bincount(inverse[error], minlength=len(groups))
+    placed = records["order_id"] > 0
+    pairs = np.unique(np.stack([inverse[placed].astype(np.int64), records["order_id"][placed]]), axis=1)
+    orders = np.bincount(pairs[0], minlength=len(groups))
+    summary = []
+    for g, (strategy, symbol, side) in enumerate(groups.tolist()):
+        summary.append({
+            "strategy": strategy.decode(), "symbol": symbol.decode(), "side": SIDES[side],
+            "orders": int(orders[g]), "fills": int(fills[g]), "filled_qty": float(qty[g]),
+            "avg_price": float(notional[g] / qty[g]) if qty[g] else 0.0, "notional": float(notional[g]),
+            "commission": float(fees[g]), "realized_pnl": float(pnl[g]), "errors": int(errors[g]),
+        })
+    return summary
+
+def as_dict(record) -> Dict:
+    return {
+        "time": int(record["time"]), "kind": KIND_NAMES.get(int(record["kind"]), "?"),
+        "strategy": record["strategy"].decode(), "symbol": record["symbol"].decode(),
+        "orderId": int(record["order_id"]), "clientOrderId": record["client_order_id"].decode(),
+        "side": SIDES[record["side"]], "positionSide": POSITION_SIDES[record["position_side"]],
+        "type": ORDER_TYPES[record["order_type"]], "status": STATUSES[record["status"]],
+        "price": float(record["price"]), "stopPrice": float(record["stop_price"]), "origQty": float(record["quantity"]),
+        "executedQty": float(record["executed_qty"]), "avgPrice": float(record["avg_price"]),
+        "lastQty": float(record["last_qty"]), "lastPrice": float(record["last_price"]), "tradeId": int(record["trade_id"]),
+        "commission": float(record["commission"]), "realizedPnl": float(record["realized_pnl"]),
+        "eventTime": int(record["event_time"]), "reduceOnly": bool(record["flags"] & REDUCE_ONLY), "code": int(record["code"]),
+    }
+
+# -------- Replay --------
+def restore(order_store=None, directory: str = JOURNAL_DIR, hours: float = JOURNAL_REPLAY_HOURS) -> int:
+    """
+    Rebuild order state from the journal: the newest state of every order that was
+    still open, and of closed orders updated within hours, fills included. Returns
+    the number of orders restored.
+    """
+    from .order_store import Fill, store
+
+    np = _numpy()
+    order_store = order_store or store
+    path = journal_path(directory)
+    _writer.flush()
+    if not os.path.exists(path):
+        return 0
+    repair(path)
+    records = Journal(directory).records
+    kind, order_ids = np.asarray(records["kind"]), np.asarray(records["order_id"])
+    rows = np.flatnonzero(((kind == ACK) | (kind == UPDATE) | (kind == FILL)) & (order_ids > 0))
+    if not len(rows):
+        return 0
+    ids, event_times = order_ids[rows], np.asarray(records["event_time"])[rows]
+    order = np.lexsort((rows, event_times, ids))  # per order: exchange time, then file order
+    ids, rows = ids[order], rows[order]
+    last = rows[np.flatnonzero(np.append(ids[1:] != ids[:-1], True))]
+    states = records[last]
+    since = (time.time() - hours * 3600) * 1000
+    states = states[np.isin(states["status"], OPEN_STATUSES) | (states["time"] >= since)]
+    for r in states:
+        order_store.apply_order_update({
+            "i": int(r["order_id"]), "s": r["symbol"].decode(), "c": r["client_order_id"].decode(),
+            "S": SIDES[r["side"]], "ps": POSITION_SIDES[r["position_side"]] or "BOTH", "o": ORDER_TYPES[r["order_type"]],
+            "X": STATUSES[r["status"]] or "NEW", "p": float(r["price"]), "sp": float(r["stop_price"]), "q": float(r["quantity"]),
+            "z": float(r["executed_qty"]), "ap": float(r["avg_price"]), "T": int(r["event_time"]),
+            "R": bool(r["flags"] & REDUCE_ONLY), "x": "RESTORED",
+        })
+    fills = np.flatnonzero((kind == FILL) & np.isin(order_ids, states["order_id"]))
+    for r in records[fills]:
+        state = order_store.get(int(r["order_id"]))
+        if state is not None:
+            state.fills.append(Fill(int(r["trade_id"]), float(r["last_qty"]), float(r["last_price"]), float(r["commission"]), float(r["realized_pnl"]), int(r["event_time"])))
+    logger.info(f"Restored {len(states)} orders ({int(np.isin(states['status'], OPEN_STATUSES).sum())} open) and {len(fills)} fills from {path}")
+    return len(states)
+
+# -------- CLI --------
+def _format_time(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+def _line(r: Dict) -> str:
+    what = f"{r['lastQty']}@{r['lastPrice']}" if r["kind"] == "fill" else f"{r['origQty']}@{r['price']}" + (f" exec {r['executedQty']}@{r['avgPrice']}" if r["executedQty"] else "")
+    code = f" code {r['code']}" if r["code"] else ""
+    return f"{_format_time(r['time'])} {r['kind']:<6} {r['strategy'] or '-':<10} {r['symbol']:<10} {r['side']:<4} {r['type'] or '-':<11} {r['status'] or '-':<16} {r['orderId'] or '-'} {r['clientOrderId'] or '-'} {what}{code}"
+
+def main(argv: Optional[List[str]] = None):
+    from .backtest.data import parse_time
+
+    parser = argparse.ArgumentParser(prog="python -m src.journal", description="Query the order journal")
+    parser.add_argument("--dir", default=JOURNAL_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    q = sub.add_parser("query", help="records by order, symbol, time range, strategy or clientOrderId prefix")
+    q.add_argument("--order-id", type=int)
+    q.add_argument("--symbol")
+    q.add_argument("--start", help="ISO date/time (UTC) or epoch ms")
+    q.add_argument("--end", help="ISO date/time (UTC) or epoch ms")
+    q.add_argument("--strategy", help="module label, e.g. grid, twap, oco, market")
+    q.add_argument("--client-prefix", help="clientOrderId prefix, e.g. one grid's gl1a2b3c_4_")
+    q.add_argument("--kind", action="append", choices=sorted(KINDS), help="repeatable")
+    q.add_argument("--limit", type=int, default=100, help="newest records shown (0 = all)")
+    q.add_argument("--summary", action="store_true", help="totals per strategy, symbol and side instead of records")
+    q.add_argument("--json", action="store_true", help="JSON lines")
+    s = sub.add_parser("state", help="replay the journal into a fresh order store and list orders")
+    s.add_argument("--hours", type=float, default=JOURNAL_REPLAY_HOURS, help="closed orders updated this recently are included")
+    s.add_argument("--open", action="store_true", help="only orders still open")
+    sub.add_parser("index", help="bring the side indexes up to date")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.command == "index":
+        journal = Journal(args.dir)
+        for name in Journal.INDEXED:
+            journal.index(name, extend_at=0)
+        print(f"✅ Indexed {len(journal)} records in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return
+    if args.command == "state":
+        from .order_store import OrderStore
+        order_store = OrderStore()
+        restore(order_store, args.dir, args.hours)
+        orders = order_store.open_orders() if args.open else order_store.all_orders()
+        for o in sorted(orders, key=lambda o: o.update_time):
+            print(f"{o.symbol:<10} {o.side:<4} {o.type:<11} {o.status:<16} {o.order_id} {o.client_order_id or '-'} {o.executed_qty:g}/{o.orig_qty:g} @ {o.avg_price or o.price:g} ({len(o.fills)} fills)")
+        print(f"✅ {len(orders)} orders in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return
+
+    journal = Journal(args.dir)
+    try:
+        records = journal.query(args.order_id, args.symbol, parse_time(args.start), parse_time(args.end), args.strategy, args.client_prefix, [KINDS[k] for k in args.kind or []])
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    elapsed = (time.perf_counter() - started) * 1000
+    if args.summary:
+        for row in summarize(records):
+            print(json.dumps(row) if args.json else f"{row['strategy'] or '-':<10} {row['symbol']:<10} {row['side']:<4} orders {row['orders']} fills {row['fills']} qty {row['filled_qty']:g} avg {row['avg_price']:g} notional {row['notional']:.2f} fees {row['commission']:g} pnl {row['realized_pnl']:g} errors {row['errors']}")
+    else:
+        shown = records[-args.limit:] if args.limit else records
+        for record in shown:
+            r = as_dict(record)
+            print(json.dumps(r) if args.json else _line(r))
+    print(f"✅ {len(records)} of {len(journal)} records in {elapsed:.1f}ms", file=sys.stderr if args.json else sys.stdout)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Historical Klines
+Downloads /fapi/v1/klines pages concurrently through make_request (so the client
+rate limiter paces them), resumes from the last cached candle, and appends to the
+columnar store the backtester reads. The cached open_time column is the time index:
+range reads are binary searches on a memory map, not re-downloads.
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import numpy as np
+
+from .utils import make_request, setup_logger, validate_symbol
+from .backtest.data import append, open_table, parse_time
+from .config import BACKTEST_DATA_DIR, KLINES_DOWNLOAD_WORKERS
+
+logger = setup_logger("klines")
+KLINES_ENDPOINT = "/fapi/v1/klines"
+PAGE_LIMIT = 1000  # weight 5 per page; 1500 costs 10, so 1000 gets the most candles per unit of weight
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000, "8h": 28_800_000,
+    "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000, "1w": 604_800_000,
+}
+
+def _table(interval: str) -> str:
+    if interval not in INTERVAL_MS:
+        raise ValueError(f"Unsupported interval {interval!r}; expected one of {list(INTERVAL_MS)}")
+    return f"klines_{interval}"
+
+def _fetch_page(symbol: str, interval: str, start_ms: int, end_ms: int) -> List[List]:
+    return make_request("GET", KLINES_ENDPOINT, {"symbol": symbol, "interval": interval, "startTime": start_ms, "endTime": end_ms, "limit": PAGE_LIMIT})
+
+def _columns(rows: List[List]) -> Dict[str, np.ndarray]:
+    values = np.array([row[:6] for row in rows], dtype=np.float64)
+    return {
+        "open_time": values[:, 0].astype(np.int64),
+        "open": values[:, 1],
+        "high": values[:, 2],
+        "low": values[:, 3],
+        "close": values[:, 4],
+        "volume": values[:, 5],
+    }
+
+def download_klines(symbol: str, interval: str, start_ms: int, end_ms: Optional[int] = None, root: str = BACKTEST_DATA_DIR, workers: int = KLINES_DOWNLOAD_WORKERS) -> int:
+    """
+    Cache closed candles from start_ms (or the last cached candle) up to end_ms (default: now).
+    Pages download in parallel but are appended strictly in time order, so an
+    interrupted run resumes where the cache ends. Returns candles appended.
+    """
+    symbol = symbol.upper()
+    table = _table(interval)
+    step = INTERVAL_MS[interval]
+    first, last = open_table(symbol, table, root).time_range()
+    start = start_ms - start_ms % step
+    if first is not None and start < first:
+        logger.warning(f"{symbol} {interval} cache starts at {first}; it only extends forward, delete it to fetch earlier history")
+    if last is not None:
+        start = max(start, last + step)
+    now_ms = int(time.time() * 1000)
+    end = min(end_ms or now_ms, now_ms - now_ms % step)  # the current candle is still open
+    if start >= end:
+        return 0
+
+    span = step * PAGE_LIMIT
+    windows = [(t, min(t + span, end) - 1) for t in range(start, end, span)]
+    logger.info(f"Downloading {symbol} {interval} klines in {len(windows)} pages from {start}")
+    written = 0
+    with ThreadPoolExecutor(max_workers=min(workers, len(windows))) as pool:
+        pages = [pool.submit(_fetch_page, symbol, interval, a, b) for a, b in windows]
+        try:
+            for page in pages:
+                rows = page.result()
+                if rows:
+                    written += append(symbol, table, _columns(rows), root)
+        except Exception as e:
+            for page in pages:
+                page.cancel()
+            logger.error(f"{symbol} {interval} download stopped after {written} candles: {e}; rerun to resume")
+            raise
+    logger.info(f"Cached {written} {symbol} {interval} candles")
+    return written
+
+def get_klines(symbol: str, interval: str, start_ms: int, end_ms: Optional[int] = None, root: str = BACKTEST_DATA_DIR, download: bool = True) -> Dict[str, np.ndarray]:
+    """Candles with start_ms <= open_time < end_ms as zero-copy column views, fetching what the cache lacks"""
+    if download:
+        download_klines(symbol, interval, start_ms, end_ms, root)
+    return open_table(symbol, _table(interval), root).slice(start_ms, end_ms)
+
+def main():
+    parser = argparse.ArgumentParser(description="Download historical klines into the local cache")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--interval", default="1m", choices=list(INTERVAL_MS))
+    parser.add_argument("--start", required=True, help="ISO date/time (UTC) or epoch ms")
+    parser.add_argument("--end", help="ISO date/time (UTC) or epoch ms (default: now)")
+    parser.add_argument("--root", default=BACKTEST_DATA_DIR)
+    parser.add_argument("--workers", type=int, default=KLINES_DOWNLOAD_WORKERS)
+    args = parser.parse_args()
+
+    for symbol in args.symbols:
+        if not validate_symbol(symbol):
+            print(f"❌ Invalid symbol {symbol}")
+            continue
+        try:
+            count = download_klines(symbol, args.interval, parse_time(args.start), parse_time(args.end), args.root, args.workers)
+            print(f"✅ {symbol.upper()} {args.interval}: {count} new candles")
+        except Exception as e:
+            print(f"❌ {symbol.upper()} {args.interval}: {e}. Rerun to resume.")
+
+if __name__ == "__main__":
+    main()
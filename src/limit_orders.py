@@ -4,20 +4,45 @@ Places orders at specific prices that execute when the market reaches that level
 """
 
 import argparse
+from typing import Dict, Optional, Union
 from .utils import (
     make_request,
+    make_request_async,
     validate_symbol,
     validate_side,
     validate_quantity,
     validate_price,
     setup_logger,
 )
+from .logger import order_fields
+from .exchange_info import preload_async, validate_order
+from .positions import check_order, seed_async
+from .config import BOOK_PRICE_MODES
 
 logger = setup_logger("limit_orders")
 ORDER_ENDPOINT = "/fapi/v1/order"
 
-def place_limit_order(symbol: str, side: str, quantity: float, price: float, time_in_force: str = "GTC", position_side: str = "BOTH", post_only: bool = False, reduce_only: bool = False):
-    if not (validate_symbol(symbol) and validate_side(side) and validate_quantity(quantity) and validate_price(price)):
+def _book_priced(price: Union[float, str]) -> bool:
+    return isinstance(price, str) and price.lower() in BOOK_PRICE_MODES
+
+def _resolve_price(symbol: str, side: str, quantity: float, price: Union[float, str], post_only: bool = False) -> Optional[float]:
+    """A fixed price, or passive/improve/marketable priced from the local order book"""
+    if not _book_priced(price):
+        try:
+            return float(price)
+        except (TypeError, ValueError):
+            return price  # validate_price reports it
+    if post_only and price.lower() == "marketable":
+        logger.error("A post-only order cannot be priced to take liquidity")
+        return None
+    from .order_book import book_price
+    return book_price(symbol, side, quantity, price)
+
+def _limit_order_params(symbol: str, side: str, quantity: float, price: Union[float, str], time_in_force: str = "GTC", position_side: str = "BOTH", post_only: bool = False, reduce_only: bool = False) -> Optional[Dict]:
+    if not (validate_symbol(symbol) and validate_side(side) and validate_quantity(quantity)):
+        return None
+    price = _resolve_price(symbol, side, quantity, price, post_only)
+    if not (validate_price(price) and validate_order(symbol, quantity, price) and check_order(symbol, side, quantity, price, position_side, reduce_only)):
         return None
     params = {
         "symbol": symbol.upper(),
@@ -32,9 +57,33 @@ def place_limit_order(symbol: str, side: str, quantity: float, price: float, tim
         params["newOrderRespType"] = "RESULT"
     if reduce_only:
         params["reduceOnly"] = "true"
+    return params
+
+def place_limit_order(symbol: str, side: str, quantity: float, price: Union[float, str], time_in_force: str = "GTC", position_side: str = "BOTH", post_only: bool = False, reduce_only: bool = False):
+    params = _limit_order_params(symbol, side, quantity, price, time_in_force, position_side, post_only, reduce_only)
+    if params is None:
+        return None
     try:
         res = make_request("POST", ORDER_ENDPOINT, params, signed=True)
-        logger.info(f"Limit order placed: {res}")
+        logger.info("Limit order placed: %s", res, extra=order_fields(res))
+        return res
+    except Exception:
+        logger.exception("Failed to place limit order")
+        return None
+
+async def place_limit_order_async(symbol: str, side: str, quantity: float, price: Union[float, str], time_in_force: str = "GTC", position_side: str = "BOTH", post_only: bool = False, reduce_only: bool = False):
+    await preload_async(symbol)
+    await seed_async()
+    if _book_priced(price):
+        from .order_book import get_book_async
+        if await get_book_async(symbol) is None:  # the first snapshot syncs off the event loop; pricing then reads the synced book
+            return None
+    params = _limit_order_params(symbol, side, quantity, price, time_in_force, position_side, post_only, reduce_only)
+    if params is None:
+        return None
+    try:
+        res = await make_request_async("POST", ORDER_ENDPOINT, params, signed=True)
+        logger.info("Limit order placed: %s", res, extra=order_fields(res))
         return res
     except Exception:
         logger.exception("Failed to place limit order")
@@ -45,7 +94,7 @@ def main():
     parser.add_argument("symbol")
     parser.add_argument("side", choices=["BUY", "SELL", "buy", "sell"])
     parser.add_argument("quantity", type=float)
-    parser.add_argument("price", type=float)
+    parser.add_argument("price", help=f"limit price, or {'/'.join(BOOK_PRICE_MODES)} to price from the local order book")
     parser.add_argument("--time-in-force", default="GTC", choices=["GTC", "IOC", "FOK", "GTX"])
     parser.add_argument("--position-side", default="BOTH", choices=["BOTH", "LONG", "SHORT"])
     parser.add_argument("--post-only", action="store_true")
@@ -0,0 +1,107 @@
+"""
+Logging setup for Binance Futures Trading Bot
+Kept free of other project imports so every module can use it.
+
+All module loggers share one file handler. With LOG_QUEUE enabled, records are
+handed to a queue and written by a single background thread, so the calling
+thread never touches the disk; LOG_JSON switches the file to JSON lines.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import Any, Dict, Optional
+from .config import (
+    LOG_FILE,
+    LOG_LEVEL,
+    LOG_FORMAT,
+    LOG_QUEUE,
+    LOG_JSON,
+    LOG_MAX_BYTES,
+    LOG_BACKUP_COUNT,
+)
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """One compact JSON object per line: ts, level, logger, msg plus any extra= fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(",", ":"), default=str)
+
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    """Enqueue the record untouched; formatting happens on the writer thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+_handler: Optional[logging.Handler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler_lock = threading.Lock()
+
+def _file_handler() -> logging.Handler:
+    if LOG_MAX_BYTES:
+        handler = logging.handlers.RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, delay=True)
+    else:
+        handler = logging.FileHandler(LOG_FILE, delay=True)  # opened on the first record, not at import
+    handler.setFormatter(JsonFormatter() if LOG_JSON else logging.Formatter(LOG_FORMAT))
+    return handler
+
+def _shared_handler() -> logging.Handler:
+    global _handler, _listener
+    with _handler_lock:
+        if _handler is None:
+            if LOG_QUEUE:
+                log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+                _listener = logging.handlers.QueueListener(log_queue, _file_handler())
+                _listener.start()
+                atexit.register(flush_logs)
+                _handler = _EnqueueHandler(log_queue)
+            else:
+                _handler = _file_handler()
+        return _handler
+
+def _no_caller(stack_info: bool = False, stacklevel: int = 1):
+    # Our formats never show the caller, so this project's loggers skip the frame walk;
+    # other libraries' loggers, and logging's module settings, are left alone
+    return "(unknown file)", 0, "(unknown function)", None
+
+def flush_logs() -> None:
+    """Drain the queue and stop the background writer (no-op in synchronous mode)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def setup_logger(name: str):
+    """Configure and return a logger"""
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        logger.addHandler(_shared_handler())
+        logger.setLevel(getattr(logging, LOG_LEVEL.upper(), logging.INFO))
+        if LOG_QUEUE:
+            logger.findCaller = _no_caller
+    return logger
+
+def order_fields(res: Any, **fields) -> Dict[str, Any]:
+    """extra= fields for an order log line (symbol, side, orderId, plus whatever is passed)"""
+    if isinstance(res, dict):
+        for key in ("symbol", "side", "orderId"):
+            if key in res:
+                fields.setdefault(key, res[key])
+    return fields
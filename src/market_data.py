@@ -0,0 +1,246 @@
+"""
+Market Data Stream
+Background WebSocket subscriber that keeps the latest bookTicker/markPrice per symbol in memory,
+counts traded volume from aggTrade events, and feeds diff-depth events to the local order books.
+"""
+
+import itertools
+import json
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Set
+from .config import ORDER_BOOK_STREAM_SPEED, WS_BASE_URL, PRICE_STALE_AFTER
+from .logger import setup_logger
+from . import metrics
+
+logger = setup_logger("market_data")
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+class PriceSnapshot(NamedTuple):
+    bid: Optional[float]
+    ask: Optional[float]
+    mark: Optional[float]
+    last: Optional[float]
+    updated_at: float  # time.monotonic() of the newest field
+    book_at: float = 0.0  # time.monotonic() of each field's own last update
+    mark_at: float = 0.0
+    last_at: float = 0.0
+
+    @property
+    def price(self) -> Optional[float]:
+        return self.price_since(0.0)
+
+    def price_since(self, since: float) -> Optional[float]:
+        """Bid/ask mid, else mark, else last, using only fields updated at or after since"""
+        if self.bid is not None and self.ask is not None and self.book_at >= since:
+            return (self.bid + self.ask) / 2
+        if self.mark is not None and self.mark_at >= since:
+            return self.mark
+        return self.last if self.last is not None and self.last_at >= since else None
+
+# Snapshots are immutable and swapped in with a single dict assignment, so readers never lock.
+_prices: Dict[str, PriceSnapshot] = {}
+_EMPTY = PriceSnapshot(None, None, None, None, 0.0)
+
+def _store(symbol: str, stamp: str, **fields) -> None:
+    now = time.monotonic()
+    _prices[symbol] = _prices.get(symbol, _EMPTY)._replace(updated_at=now, **{stamp: now}, **fields)
+
+def update_book(symbol: str, bid: float, ask: float) -> None:
+    _store(symbol.upper(), "book_at", bid=bid, ask=ask)
+
+def update_mark(symbol: str, mark: float) -> None:
+    _store(symbol.upper(), "mark_at", mark=mark)
+
+def update_last(symbol: str, last: float) -> None:
+    _store(symbol.upper(), "last_at", last=last)
+
+# Cumulative traded quantity per symbol since its trade stream was subscribed; only the stream thread writes
+_volumes: Dict[str, float] = {}
+
+def record_trade(symbol: str, price: float, qty: float) -> None:
+    symbol = symbol.upper()
+    _volumes[symbol] = _volumes.get(symbol, 0.0) + qty
+    _store(symbol, "last_at", last=price)
+
+def traded_volume(symbol: str) -> Optional[float]:
+    """Quantity traded since the symbol's trade stream started, or None if it is not subscribed"""
+    return _volumes.get(symbol.upper())
+
+def clear(symbol: Optional[str] = None) -> None:
+    """Forget cached prices (all symbols, or one)"""
+    if symbol is None:
+        _prices.clear()
+        _volumes.clear()
+    else:
+        _prices.pop(symbol.upper(), None)
+        _volumes.pop(symbol.upper(), None)
+
+def get_snapshot(symbol: str) -> Optional[PriceSnapshot]:
+    return _prices.get(symbol.upper())
+
+def get_cached_price(symbol: str, max_age: float = PRICE_STALE_AFTER) -> Optional[float]:
+    """Latest cached price from fields younger than max_age seconds, or None if there are none"""
+    snap = _prices.get(symbol.upper())
+    if snap is None:
+        return None
+    return snap.price_since(time.monotonic() - max_age)
+
+def handle_message(raw: str) -> None:
+    """Apply one stream message (combined-stream envelope or raw event) to the cache"""
+    msg = json.loads(raw)
+    data = msg.get("data", msg)
+    event = data.get("e")
+    if event == "bookTicker":
+        update_book(data["s"], float(data["b"]), float(data["a"]))
+    elif event == "markPriceUpdate":
+        update_mark(data["s"], float(data["p"]))
+    elif event == "aggTrade":
+        record_trade(data["s"], float(data["p"]), float(data["q"]))
+    elif event == "depthUpdate":
+        from . import order_book  # only processes that subscribed depth get here
+        order_book.on_depth_update(data)
+
+class PriceStream:
+    """Runs the WebSocket connection on its own event loop in a daemon thread"""
+
+    def __init__(self, url: str = WS_BASE_URL):
+        self.url = url.rstrip("/") + "/stream"
+        self.symbols: Set[str] = set()
+        self.depth_symbols: Set[str] = set()
+        self.trade_symbols: Set[str] = set()
+        self._ids = itertools.count(1)
+        self._loop = None  # asyncio loop of the stream thread; asyncio is only imported once it starts
+        self._ws = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def _streams(symbol: str):
+        s = symbol.lower()
+        return [f"{s}@bookTicker", f"{s}@markPrice@1s"]
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="price-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._loop and self._ws:
+            import asyncio
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def subscribe(self, *symbols: str) -> None:
+        new = {s.upper() for s in symbols} - self.symbols
+        if not new:
+            return
+        self.symbols |= new
+        if self._loop and self._ws:
+            import asyncio
+            asyncio.run_coroutine_threadsafe(self._send_subscribe(new), self._loop)
+
+    def subscribe_depth(self, *symbols: str) -> None:
+        new = {s.upper() for s in symbols} - self.depth_symbols
+        if not new:
+            return
+        self.depth_symbols |= new
+        if self._loop and self._ws:
+            import asyncio
+            asyncio.run_coroutine_threadsafe(self._send_subscribe((), new), self._loop)
+
+    def subscribe_trades(self, *symbols: str) -> None:
+        new = {s.upper() for s in symbols} - self.trade_symbols
+        if not new:
+            return
+        self.trade_symbols |= new
+        for symbol in new:
+            _volumes.setdefault(symbol, 0.0)
+        if self._loop and self._ws:
+            import asyncio
+            asyncio.run_coroutine_threadsafe(self._send_subscribe((), (), new), self._loop)
+
+    async def _send_subscribe(self, symbols, depth_symbols=(), trade_symbols=()) -> None:
+        streams = [st for s in sorted(symbols) for st in self._streams(s)]
+        streams += [f"{s.lower()}@depth@{ORDER_BOOK_STREAM_SPEED}" for s in sorted(depth_symbols)]
+        streams += [f"{s.lower()}@aggTrade" for s in sorted(trade_symbols)]
+        await self._ws.send(json.dumps({"method": "SUBSCRIBE", "params": streams, "id": next(self._ids)}))
+
+    def _run(self) -> None:
+        import asyncio
+
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._consume())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def _consume(self) -> None:
+        import asyncio
+        import websockets
+
+        delay = RECONNECT_DELAY
+        while not self._stopped.is_set():
+            try:
+                async with websockets.connect(self.url, ping_interval=20) as ws:
+                    self._ws = ws
+                    if self.symbols or self.depth_symbols or self.trade_symbols:
+                        # books see the reconnect as a gap in update ids and resync themselves;
+                        # trades missed while disconnected are not in traded_volume
+                        await self._send_subscribe(set(self.symbols), set(self.depth_symbols), set(self.trade_symbols))
+                    logger.info(f"Price stream connected: {self.url} ({len(self.symbols)} symbols, {len(self.depth_symbols)} books)")
+                    delay = RECONNECT_DELAY
+                    async for raw in ws:
+                        try:
+                            handle_message(raw)
+                        except Exception as e:
+                            logger.warning(f"Bad price stream message: {e}")
+            except Exception as e:
+                if not self._stopped.is_set():
+                    logger.warning(f"Price stream disconnected: {e}; reconnecting in {delay:.0f}s")
+                    metrics.count_retry("market_data", type(e).__name__)
+            finally:
+                self._ws = None
+            if not self._stopped.is_set():
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+_stream: Optional[PriceStream] = None
+_stream_lock = threading.Lock()
+
+def start_price_stream(*symbols: str, url: Optional[str] = None) -> PriceStream:
+    """Start (once) the shared background stream and subscribe to symbols"""
+    global _stream
+    with _stream_lock:
+        if _stream is None:
+            _stream = PriceStream(url or WS_BASE_URL)
+            _stream.start()
+    _stream.subscribe(*symbols)
+    return _stream
+
+def subscribe(symbol: str) -> None:
+    """Add a symbol to the shared stream, starting it on first use"""
+    stream = _stream
+    if stream is None or symbol.upper() not in stream.symbols:
+        start_price_stream(symbol)
+
+def subscribe_depth(*symbols: str) -> None:
+    """Add diff-depth streams for symbols to the shared stream, starting it on first use"""
+    start_price_stream().subscribe_depth(*symbols)
+
+def subscribe_trades(*symbols: str) -> None:
+    """Add aggTrade streams for symbols to the shared stream (feeding traded_volume), starting it on first use"""
+    start_price_stream().subscribe_trades(*symbols)
+
+def stop_price_stream() -> None:
+    global _stream
+    with _stream_lock:
+        if _stream is not None:
+            _stream.stop()
+            _stream = None
@@ -4,19 +4,25 @@ Executes immediate buy/sell orders at best available price.
 """
 
 import argparse
+from typing import Dict, Optional
 from .utils import (
     make_request,
+    make_request_async,
     validate_symbol,
     validate_side,
     validate_quantity,
     setup_logger,
 )
+from .logger import order_fields
+from .exchange_info import preload_async, validate_order
+from .positions import check_order, seed_async
 
 logger = setup_logger("market_orders")
 ORDER_ENDPOINT = "/fapi/v1/order"
 
-def place_market_order(symbol: str, side: str, quantity: float, position_side: str = "BOTH", reduce_only: bool = False):
-    if not (validate_symbol(symbol) and validate_side(side) and validate_quantity(quantity)):
+def _market_order_params(symbol: str, side: str, quantity: float, position_side: str = "BOTH", reduce_only: bool = False) -> Optional[Dict]:
+    if not (validate_symbol(symbol) and validate_side(side) and validate_quantity(quantity) and validate_order(symbol, quantity, market=True)
+            and check_order(symbol, side, quantity, position_side=position_side, reduce_only=reduce_only)):
         return None
     params = {
         "symbol": symbol.upper(),
@@ -27,9 +33,29 @@ def place_market_order(symbol: str, side: str, quantity: float, position_side: s
     }
     if reduce_only:
         params["reduceOnly"] = "true"
+    return params
+
+def place_market_order(symbol: str, side: str, quantity: float, position_side: str = "BOTH", reduce_only: bool = False):
+    params = _market_order_params(symbol, side, quantity, position_side, reduce_only)
+    if params is None:
+        return None
     try:
         res = make_request("POST", ORDER_ENDPOINT, params, signed=True)
-        logger.info(f"Market order placed: {res}")
+        logger.info("Market order placed: %s", res, extra=order_fields(res))
+        return res
+    except Exception:
+        logger.exception("Failed to place market order")
+        return None
+
+async def place_market_order_async(symbol: str, side: str, quantity: float, position_side: str = "BOTH", reduce_only: bool = False):
+    await preload_async(symbol, market=True)
+    await seed_async()
+    params = _market_order_params(symbol, side, quantity, position_side, reduce_only)
+    if params is None:
+        return None
+    try:
+        res = await make_request_async("POST", ORDER_ENDPOINT, params, signed=True)
+        logger.info("Market order placed: %s", res, extra=order_fields(res))
         return res
     except Exception:
         logger.exception("Failed to place market order")
@@ -0,0 +1,260 @@
+"""
+Request Metrics
+Latency histograms (queue, connect/TLS, time to first byte, our own overhead, total)
+by endpoint and calling module, plus request, error and retry counters. Exposed as
+Prometheus text over HTTP and as an in-process snapshot. When disabled, callers
+skip everything behind a single flag check.
+"""
+
+import bisect
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .config import METRICS_ENABLED, METRICS_HOST, METRICS_PORT
+from .logger import setup_logger
+
+logger = setup_logger("metrics")
+ENABLED = METRICS_ENABLED  # toggle at runtime with enable()
+PREFIX = "binance_bot"
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+
+# Caller module -> label; anything else is labelled by its last dotted component
+MODULE_LABELS = {
+    "src.market_orders": "market",
+    "src.limit_orders": "limit",
+    "src.advanced.stop_limit": "stop_limit",
+    "src.advanced.oco": "oco",
+    "src.advanced.twap": "twap",
+    "src.advanced.twap_engine": "twap",
+    "src.advanced.grid_orders": "grid",
+    "src.advanced.grid_loop": "grid",
+}
+# Frames from these modules are the transport itself, not the caller
+_TRANSPORT_MODULES = {"src.utils", "src.metrics", "src.journal", "asyncio.events", "asyncio.tasks", "asyncio.base_events", "concurrent.futures.thread", "threading"}
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile"""
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank and n:
+                return bound
+        return 0.0
+
+_lock = threading.Lock()
+_histograms: Dict[Tuple[str, str, str], Histogram] = {}      # (phase, endpoint, module)
+_requests: Dict[Tuple[str, str, str, int], int] = {}          # (method, endpoint, module, status)
+_errors: Dict[Tuple[str, str, str], int] = {}                 # (endpoint, module, error)
+_retries: Dict[Tuple[str, str], int] = {}                     # (module, reason)
+_local = threading.local()
+
+def enable(flag: bool = True) -> None:
+    global ENABLED
+    ENABLED = flag
+
+def caller_module() -> str:
+    """Label of the first module up the stack that is not the transport"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        name = frame.f_globals.get("__name__", "")
+        if name not in _TRANSPORT_MODULES:
+            return MODULE_LABELS.get(name, name.rsplit(".", 1)[-1])
+        frame = frame.f_back
+    return "unknown"
+
+def _observe(phase: str, endpoint: str, module: str, value: float) -> None:
+    key = (phase, endpoint, module)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        histogram = _histograms.setdefault(key, Histogram())
+    histogram.observe(value)
+
+def observe_request(method: str, endpoint: str, status: int, total: float, queue: float = 0.0, connect: float = 0.0, ttfb: Optional[float] = None, module: Optional[str] = None) -> None:
+    """Record one completed request; overhead is whatever total is not queueing, connecting or waiting on the exchange"""
+    module = module or caller_module()
+    with _lock:
+        _observe("total", endpoint, module, total)
+        _observe("queue", endpoint, module, queue)
+        if connect:
+            _observe("connect", endpoint, module, connect)
+        if ttfb is not None:
+            _observe("ttfb", endpoint, module, ttfb)
+            _observe("overhead", endpoint, module, max(0.0, total - queue - connect - ttfb))
+        key = (method, endpoint, module, status)
+        _requests[key] = _requests.get(key, 0) + 1
+
+def observe_error(method: str, endpoint: str, error: BaseException, total: float, queue: float = 0.0) -> None:
+    module = caller_module()
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None) or getattr(error, "status", None) or 0
+    label = str(status) if status else type(error).__name__
+    with _lock:
+        _observe("total", endpoint, module, total)
+        key = (endpoint, module, label)
+        _errors[key] = _errors.get(key, 0) + 1
+        key = (method, endpoint, module, int(status))
+        _requests[key] = _requests.get(key, 0) + 1
+
+def count_retry(module: str, reason: str) -> None:
+    """Count a retry or reconnect (no-op while disabled)"""
+    if not ENABLED:
+        return
+    with _lock:
+        _retries[(module, reason)] = _retries.get((module, reason), 0) + 1
+
+def reset() -> None:
+    with _lock:
+        _histograms.clear()
+        _requests.clear()
+        _errors.clear()
+        _retries.clear()
+
+# -------- Connection timing (requests/urllib3) --------
+def take_connect_time() -> float:
+    """Seconds this thread's last request spent opening a connection (0 if it reused one)"""
+    seconds = getattr(_local, "connect", 0.0)
+    _local.connect = 0.0
+    return seconds
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _local.connect = time.perf_counter() - start
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()  # TCP + TLS handshake
+        _local.connect = time.perf_counter() - start
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+TIMED_POOL_CLASSES = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+# -------- Connection timing (aiohttp) --------
+def aiohttp_trace_config():
+    """TraceConfig filling the dict passed as trace_request_ctx with connect/ttfb timestamps"""
+    import aiohttp
+
+    async def on_request_start(session, ctx, params):
+        ctx.trace_request_ctx["start"] = time.perf_counter()
+
+    async def on_connection_create_start(session, ctx, params):
+        ctx.trace_request_ctx["connect_start"] = time.perf_counter()
+
+    async def on_connection_create_end(session, ctx, params):
+        ctx.trace_request_ctx["connect"] = time.perf_counter() - ctx.trace_request_ctx.get("connect_start", time.perf_counter())
+
+    async def on_request_end(session, ctx, params):
+        ctx.trace_request_ctx["headers"] = time.perf_counter()
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_connection_create_start.append(on_connection_create_start)
+    trace.on_connection_create_end.append(on_connection_create_end)
+    trace.on_request_end.append(on_request_end)
+    return trace
+
+# -------- Exposition --------
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{v}"' for k, v in labels.items())
+
+def prometheus_text() -> str:
+    with _lock:
+        histograms = [(k, list(h.counts), h.sum, h.count) for k, h in _histograms.items()]
+        requests, errors, retries = dict(_requests), dict(_errors), dict(_retries)
+    lines = [f"# HELP {PREFIX}_request_seconds Request latency by phase", f"# TYPE {PREFIX}_request_seconds histogram"]
+    for (phase, endpoint, module), counts, total, count in sorted(histograms):
+        labels = _labels(phase=phase, endpoint=endpoint, module=module)
+        cumulative = 0
+        for bound, n in zip(BUCKETS + (float("inf"),), counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{PREFIX}_request_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"{PREFIX}_request_seconds_sum{{{labels}}} {total}")
+        lines.append(f"{PREFIX}_request_seconds_count{{{labels}}} {count}")
+    lines += [f"# HELP {PREFIX}_requests_total Requests by status (0 = no HTTP response)", f"# TYPE {PREFIX}_requests_total counter"]
+    lines += [f"{PREFIX}_requests_total{{{_labels(method=m, endpoint=e, module=mod, status=s)}}} {n}" for (m, e, mod, s), n in sorted(requests.items())]
+    lines += [f"# HELP {PREFIX}_request_errors_total Failed requests by HTTP status or exception type", f"# TYPE {PREFIX}_request_errors_total counter"]
+    lines += [f"{PREFIX}_request_errors_total{{{_labels(endpoint=e, module=mod, error=err)}}} {n}" for (e, mod, err), n in sorted(errors.items())]
+    lines += [f"# HELP {PREFIX}_retries_total Retries and reconnects", f"# TYPE {PREFIX}_retries_total counter"]
+    lines += [f"{PREFIX}_retries_total{{{_labels(module=mod, reason=r)}}} {n}" for (mod, r), n in sorted(retries.items())]
+    return "\n".join(lines) + "\n"
+
+def snapshot() -> Dict:
+    """Current metrics as plain data: per-(phase, endpoint, module) count/mean/p50/p99 in ms, and counters"""
+    with _lock:
+        latency: List[Dict] = [
+            {
+                "phase": phase, "endpoint": endpoint, "module": module, "count": h.count,
+                "mean_ms": h.sum / h.count * 1000 if h.count else 0.0,
+                "p50_ms": h.quantile(0.5) * 1000, "p99_ms": h.quantile(0.99) * 1000,
+            }
+            for (phase, endpoint, module), h in sorted(_histograms.items())
+        ]
+        return {
+            "latency": latency,
+            "requests": [{"method": m, "endpoint": e, "module": mod, "status": s, "count": n} for (m, e, mod, s), n in sorted(_requests.items())],
+            "errors": [{"endpoint": e, "module": mod, "error": err, "count": n} for (e, mod, err), n in sorted(_errors.items())],
+            "retries": [{"module": mod, "reason": r, "count": n} for (mod, r), n in sorted(_retries.items())],
+        }
+
+def _do_get(handler) -> None:
+    path = handler.path.split("?")[0]
+    if path == "/metrics":
+        body, content_type = prometheus_text().encode(), "text/plain; version=0.0.4"
+    elif path == "/metrics.json":
+        import json
+        body, content_type = json.dumps(snapshot()).encode(), "application/json"
+    else:
+        handler.send_error(404)
+        return
+    handler.send_response(200)
+    handler.send_header("Content-Type", content_type)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+_server = None
+
+def start_http_server(port: int = METRICS_PORT, host: str = METRICS_HOST):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread; also enables collection"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # imported only by processes that serve
+
+    global _server
+    if _server is None:
+        enable()
+        # log_message is silenced: scrapes every few seconds would flood the log
+        handler = type("MetricsHandler", (BaseHTTPRequestHandler,), {"do_GET": _do_get, "log_message": lambda self, *args: None})
+        _server = ThreadingHTTPServer((host, port), handler)
+        threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"Metrics on http://{host}:{_server.server_port}/metrics")
+    return _server
+
+def serve_from_config() -> None:
+    """Start the endpoint if METRICS_PORT is configured (long-running entry points call this)"""
+    if METRICS_PORT:
+        start_http_server()
@@ -0,0 +1,355 @@
+"""
+Local Order Book
+Per-symbol L2 book seeded from a /fapi/v1/depth snapshot and kept current from the
+diff-depth stream, with update-id gap detection and resync. Each side is a pair of
+sorted NumPy arrays with lazily built running totals, so best price, depth at a
+price and cost to fill are binary searches and placers price orders without REST.
+"""
+
+import asyncio
+import threading
+import time
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from . import market_data, metrics
+from .utils import make_request, setup_logger
+from .exchange_info import get_symbol_filters, quantize_price
+from .config import BOOK_PRICE_MODES, ORDER_BOOK_DEPTH, ORDER_BOOK_SYNC_TIMEOUT
+
+logger = setup_logger("order_book")
+DEPTH_ENDPOINT = "/fapi/v1/depth"
+RESYNC_DELAY = 1.0  # seconds before taking another snapshot
+MAX_BUFFERED = 1000  # diff events held while a snapshot is in flight
+
+class BookSide:
+    """
+    One side in walk order: asks ascending, bids descending. Keys are price * sign
+    (sign -1 for bids) so both sides are ascending arrays. Updates build a new side,
+    so a reader holding one always sees a consistent book.
+    """
+
+    __slots__ = ("sign", "keys", "qtys", "_cum_qty", "_cum_notional")
+
+    def __init__(self, sign: int, keys: np.ndarray, qtys: np.ndarray):
+        self.sign = sign
+        self.keys = keys
+        self.qtys = qtys
+        self._cum_qty: Optional[np.ndarray] = None
+        self._cum_notional: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_levels(cls, sign: int, levels: List[List[str]]) -> "BookSide":
+        arr = np.array(levels, dtype=np.float64).reshape(-1, 2)
+        arr = arr[arr[:, 1] > 0]
+        order = np.argsort(arr[:, 0] * sign, kind="stable")
+        return cls(sign, arr[order, 0] * sign, arr[order, 1])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self.keys * self.sign
+
+    def best(self) -> Optional[float]:
+        return float(self.keys[0] * self.sign) if len(self.keys) else None
+
+    def apply(self, levels: List[List[str]]) -> "BookSide":
+        """New side with absolute quantities set (0 removes the level)"""
+        arr = np.array(levels, dtype=np.float64).reshape(-1, 2)
+        keys, qtys = arr[:, 0] * self.sign, arr[:, 1]
+        # the last entry for a price wins, and inserts must be ascending
+        keys, last = np.unique(keys[::-1], return_index=True)
+        qtys = qtys[::-1][last]
+        idx = np.searchsorted(self.keys, keys)
+        hit = idx < len(self.keys)
+        hit[hit] = self.keys[idx[hit]] == keys[hit]
+        book_qtys = self.qtys.copy()
+        book_qtys[idx[hit]] = qtys[hit]
+        new = ~hit & (qtys > 0)
+        book_keys = self.keys
+        if new.any():
+            book_keys = np.insert(book_keys, idx[new], keys[new])
+            book_qtys = np.insert(book_qtys, idx[new], qtys[new])
+        keep = book_qtys > 0
+        if not keep.all():
+            book_keys, book_qtys = book_keys[keep], book_qtys[keep]
+        return BookSide(self.sign, book_keys, book_qtys)
+
+    def _totals(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._cum_qty is None:
+            self._cum_notional = np.cumsum(self.qtys * self.prices)
+            self._cum_qty = np.cumsum(self.qtys)
+        return self._cum_qty, self._cum_notional
+
+    def qty_at(self, price: float) -> float:
+        key = price * self.sign
+        i = int(np.searchsorted(self.keys, key))
+        return float(self.qtys[i]) if i < len(self.keys) and self.keys[i] == key else 0.0
+
+    def qty_through(self, price: float) -> float:
+        """Quantity resting from the best level up to and including price"""
+        i = int(np.searchsorted(self.keys, price * self.sign, side="right"))
+        return float(self._totals()[0][i - 1]) if i else 0.0
+
+    def cost_to_fill(self, quantity: float) -> Tuple[float, float, Optional[float]]:
+        """(quantity filled, notional, worst price) sweeping this side from the best level"""
+        if not len(self.keys):
+            return 0.0, 0.0, None
+        cum_qty, cum_notional = self._totals()
+        i = int(np.searchsorted(cum_qty, quantity))
+        if i >= len(cum_qty):
+            return float(cum_qty[-1]), float(cum_notional[-1]), float(self.keys[-1] * self.sign)
+        price = float(self.keys[i] * self.sign)
+        before_qty = cum_qty[i - 1] if i else 0.0
+        before_notional = cum_notional[i - 1] if i else 0.0
+        return quantity, float(before_notional + (quantity - before_qty) * price), price
+
+    def levels(self, n: int) -> List[Tuple[float, float]]:
+        return list(zip((self.keys[:n] * self.sign).tolist(), self.qtys[:n].tolist()))
+
+_EMPTY_BIDS = BookSide(-1, np.empty(0), np.empty(0))
+_EMPTY_ASKS = BookSide(1, np.empty(0), np.empty(0))
+
+class OrderBook:
+    """
+    One symbol's book. Stream events go through on_update; until a snapshot has been
+    bridged to the stream they are buffered, and any break in the pu -> u chain
+    drops the book back to buffering and takes a new snapshot.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol.upper()
+        self._sides: Tuple[BookSide, BookSide] = (_EMPTY_BIDS, _EMPTY_ASKS)  # swapped in one assignment
+        self.last_update_id = 0
+        self.updated_at = 0.0
+        self.synced = threading.Event()
+        self.gaps = 0
+        self.resyncs = 0
+        self._first = True  # next event must straddle the snapshot's lastUpdateId
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._resyncing = False
+
+    @property
+    def bids(self) -> BookSide:
+        return self._sides[0]
+
+    @property
+    def asks(self) -> BookSide:
+        return self._sides[1]
+
+    def side(self, side: str) -> BookSide:
+        """Resting side by order side: BUY -> bids, SELL -> asks"""
+        return self._sides[0] if side.upper() in ("BUY", "BID") else self._sides[1]
+
+    # -------- Sync --------
+    def on_update(self, event: Dict) -> None:
+        """Apply one depthUpdate event (stream thread)"""
+        with self._lock:
+            if not self.synced.is_set():
+                self._buffer.append(event)
+                if len(self._buffer) > MAX_BUFFERED:
+                    del self._buffer[0]
+                self._start_resync()
+            elif not self._accept(event):
+                self.gaps += 1
+                logger.warning(f"{self.symbol} depth gap at update {event.get('U')} (book at {self.last_update_id}); resyncing")
+                metrics.count_retry("order_book", "gap")
+                self.synced.clear()
+                self._buffer = [event]
+                self._start_resync()
+
+    def _accept(self, event: Dict) -> bool:
+        """Apply event if it continues the book; False on a gap"""
+        if self._first:
+            if event["u"] < self.last_update_id:
+                return True  # already in the snapshot
+            if event["U"] > self.last_update_id:
+                return False
+        elif event["pu"] != self.last_update_id:
+            return False
+        bids, asks = self._sides
+        if event.get("b"):
+            bids = bids.apply(event["b"])
+        if event.get("a"):
+            asks = asks.apply(event["a"])
+        self._sides = (bids, asks)
+        self.last_update_id = event["u"]
+        self.updated_at = time.monotonic()
+        self._first = False
+        if len(bids) and len(asks):
+            market_data.update_book(self.symbol, bids.best(), asks.best())
+        return True
+
+    def load_snapshot(self, snapshot: Dict) -> bool:
+        """Seed from a /depth response and replay buffered events; False if they do not bridge"""
+        with self._lock:
+            self._sides = (BookSide.from_levels(-1, snapshot["bids"]), BookSide.from_levels(1, snapshot["asks"]))
+            self.last_update_id = int(snapshot["lastUpdateId"])
+            self._first = True
+            buffered, self._buffer = self._buffer, []
+            for i, event in enumerate(buffered):
+                if not self._accept(event):
+                    self._buffer = buffered[i:]  # the stream is ahead of this snapshot; keep waiting
+                    return False
+            self.updated_at = time.monotonic()
+            self.synced.set()
+            return True
+
+    def _start_resync(self) -> None:
+        if not self._resyncing:
+            self._resyncing = True
+            threading.Thread(target=self._resync, name=f"book-{self.symbol}", daemon=True).start()
+
+    def _resync(self) -> None:
+        try:
+            while True:
+                try:
+                    snapshot = make_request("GET", DEPTH_ENDPOINT, {"symbol": self.symbol, "limit": ORDER_BOOK_DEPTH})
+                except Exception as e:
+                    logger.warning(f"{self.symbol} depth snapshot failed: {e}; retrying in {RESYNC_DELAY:.0f}s")
+                    metrics.count_retry("order_book", type(e).__name__)
+                    time.sleep(RESYNC_DELAY)
+                    continue
+                self.resyncs += 1
+                if self.load_snapshot(snapshot):
+                    logger.info(f"{self.symbol} book synced at update {self.last_update_id}: {len(self.bids)} bids, {len(self.asks)} asks")
+                    return
+                time.sleep(RESYNC_DELAY)
+        finally:
+            self._resyncing = False
+
+    # -------- Queries --------
+    def best_bid(self) -> Optional[float]:
+        return self._sides[0].best()
+
+    def best_ask(self) -> Optional[float]:
+        return self._sides[1].best()
+
+    def mid(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        return (bid + ask) / 2 if bid is not None and ask is not None else None
+
+    def spread(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        return ask - bid if bid is not None and ask is not None else None
+
+    def depth_at(self, side: str, price: float) -> float:
+        """Quantity resting at exactly price on side (BUY = bids, SELL = asks)"""
+        return self.side(side).qty_at(price)
+
+    def depth_through(self, side: str, price: float) -> float:
+        """Quantity resting on side from its best level through price"""
+        return self.side(side).qty_through(price)
+
+    def cost_to_fill(self, side: str, quantity: float) -> Dict:
+        """What a taker order of side (BUY sweeps asks) and quantity would pay right now"""
+        filled, notional, worst = self.side("SELL" if side.upper() == "BUY" else "BUY").cost_to_fill(quantity)
+        return {
+            "filled": filled,
+            "notional": notional,
+            "average_price": notional / filled if filled else None,
+            "worst_price": worst,
+            "complete": filled >= quantity - 1e-12,
+        }
+
+    def passive_price(self, side: str, improve: bool = False) -> Optional[float]:
+        """Price that rests on our own side: the best level, or one tick inside the spread if improve and there is room"""
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        f = get_symbol_filters(self.symbol)
+        tick = f.tick_size if f else 0.0
+        if side.upper() == "BUY":
+            return bid + tick if improve and tick and bid + tick < ask else bid
+        return ask - tick if improve and tick and ask - tick > bid else ask
+
+    def marketable_price(self, side: str, quantity: float) -> Optional[float]:
+        """Limit price at which quantity fills against the current book, or None if the book is too thin"""
+        cost = self.cost_to_fill(side, quantity)
+        return cost["worst_price"] if cost["complete"] else None
+
+    def snapshot(self, levels: int = 10) -> Dict:
+        bids, asks = self._sides
+        return {
+            "symbol": self.symbol,
+            "lastUpdateId": self.last_update_id,
+            "synced": self.synced.is_set(),
+            "bids": bids.levels(levels),
+            "asks": asks.levels(levels),
+            "age": time.monotonic() - self.updated_at if self.updated_at else None,
+            "gaps": self.gaps,
+            "resyncs": self.resyncs,
+        }
+
+# -------- Registry --------
+_books: Dict[str, OrderBook] = {}
+_books_lock = threading.Lock()
+
+def on_depth_update(data: Dict) -> None:
+    """Route a depthUpdate stream event to its book (called by market_data)"""
+    book = _books.get(data["s"])
+    if book is not None:
+        book.on_update(data)
+
+def get_book(symbol: str, wait: bool = True, timeout: float = ORDER_BOOK_SYNC_TIMEOUT) -> Optional[OrderBook]:
+    """
+    The symbol's local book, subscribing its diff-depth stream on first use. With
+    wait, blocks until synced; returns None if it does not sync within timeout.
+    """
+    symbol = symbol.upper()
+    book = _books.get(symbol)
+    if book is None:
+        with _books_lock:
+            book = _books.get(symbol)
+            if book is None:
+                book = _books[symbol] = OrderBook(symbol)
+                market_data.subscribe_depth(symbol)
+                with book._lock:
+                    book._start_resync()
+    if wait and not book.synced.wait(timeout):
+        logger.error(f"{symbol} order book not synced after {timeout}s")
+        return None
+    return book
+
+async def get_book_async(symbol: str, timeout: float = ORDER_BOOK_SYNC_TIMEOUT) -> Optional[OrderBook]:
+    """get_book for event loops: waiting for the first sync happens in an executor thread"""
+    book = get_book(symbol, wait=False)
+    if book.synced.is_set():
+        return book
+    return await asyncio.get_running_loop().run_in_executor(None, partial(get_book, symbol, True, timeout))
+
+def watch(*symbols: str) -> None:
+    """Start syncing books without waiting (long-running processes call this at startup)"""
+    for symbol in symbols:
+        get_book(symbol, wait=False)
+
+def drop(symbol: Optional[str] = None) -> None:
+    """Forget books (all, or one); their stream subscriptions stay until the stream restarts"""
+    with _books_lock:
+        if symbol is None:
+            _books.clear()
+        else:
+            _books.pop(symbol.upper(), None)
+
+def book_price(symbol: str, side: str, quantity: float, mode: str = "passive") -> Optional[float]:
+    """
+    Order price from the local book: passive joins the best level on our side,
+    improve steps one tick inside the spread, marketable is the worst level
+    quantity would sweep. Tick-rounded; None if the book is unavailable or too thin.
+    """
+    mode = mode.lower()
+    if mode not in BOOK_PRICE_MODES:
+        logger.error(f"Unknown book price mode {mode!r}; expected one of {BOOK_PRICE_MODES}")
+        return None
+    book = get_book(symbol)
+    if book is None:
+        return None
+    price = book.marketable_price(side, quantity) if mode == "marketable" else book.passive_price(side, improve=mode == "improve")
+    if price is None:
+        logger.error(f"{symbol.upper()} book cannot price a {mode} {side.upper()} of {quantity}")
+        return None
+    return quantize_price(symbol, price)
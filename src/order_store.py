@@ -0,0 +1,209 @@
+"""
+Order State Store
+In-memory open orders and fills, indexed by orderId, clientOrderId and symbol.
+Fed by REST acks and by ORDER_TRADE_UPDATE events from the user data stream.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set
+from .logger import setup_logger
+
+logger = setup_logger("order_store")
+ORDER_ENDPOINTS = ("/fapi/v1/order", "/fapi/v1/batchOrders")
+FINAL_STATUSES = {"FILLED", "CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH"}
+FINAL_KEPT = 10000  # final orders kept with their fills; the oldest are dropped past this
+
+class Fill:
+    __slots__ = ("trade_id", "quantity", "price", "commission", "realized_pnl", "time")
+
+    def __init__(self, trade_id: int, quantity: float, price: float, commission: float, realized_pnl: float, time: int):
+        self.trade_id = trade_id
+        self.quantity = quantity
+        self.price = price
+        self.commission = commission
+        self.realized_pnl = realized_pnl
+        self.time = time
+
+class OrderState:
+    __slots__ = ("order_id", "client_order_id", "symbol", "side", "position_side", "type", "status",
+                 "price", "stop_price", "orig_qty", "executed_qty", "avg_price", "update_time", "reduce_only", "fills")
+
+    def __init__(self, order_id: int, symbol: str):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.client_order_id = ""
+        self.side = ""
+        self.position_side = "BOTH"
+        self.type = ""
+        self.status = "NEW"
+        self.price = 0.0
+        self.stop_price = 0.0
+        self.orig_qty = 0.0
+        self.executed_qty = 0.0
+        self.avg_price = 0.0
+        self.update_time = 0
+        self.reduce_only = False
+        self.fills: List[Fill] = []
+
+    @property
+    def is_open(self) -> bool:
+        return self.status not in FINAL_STATUSES
+
+    @property
+    def remaining_qty(self) -> float:
+        return max(0.0, self.orig_qty - self.executed_qty)
+
+    def as_dict(self) -> Dict:
+        return {
+            "orderId": self.order_id,
+            "clientOrderId": self.client_order_id,
+            "symbol": self.symbol,
+            "side": self.side,
+            "positionSide": self.position_side,
+            "type": self.type,
+            "status": self.status,
+            "price": self.price,
+            "stopPrice": self.stop_price,
+            "origQty": self.orig_qty,
+            "executedQty": self.executed_qty,
+            "avgPrice": self.avg_price,
+            "updateTime": self.update_time,
+            "reduceOnly": self.reduce_only,
+        }
+
+class OrderStore:
+    def __init__(self):
+        self._orders: Dict[int, OrderState] = {}
+        self._by_client_id: Dict[str, int] = {}
+        self._by_symbol: Dict[str, Set[int]] = {}
+        self._open: Dict[str, Set[int]] = {}
+        self._final: "OrderedDict[int, None]" = OrderedDict()  # final orders, oldest first
+        self._listeners: List[Callable[[OrderState, Optional[Fill]], None]] = []
+        self._lock = threading.RLock()
+
+    def add_listener(self, callback: Callable[[OrderState, Optional[Fill]], None]) -> None:
+        """Call callback(order, fill_or_None) after every order update"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[OrderState, Optional[Fill]], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _get_or_create(self, order_id: int, symbol: str, client_order_id: str) -> OrderState:
+        state = self._orders.get(order_id)
+        if state is None:
+            state = OrderState(order_id, symbol)
+            self._orders[order_id] = state
+            self._by_symbol.setdefault(symbol, set()).add(order_id)
+        if client_order_id and not state.client_order_id:
+            state.client_order_id = client_order_id
+            self._by_client_id[client_order_id] = order_id
+        return state
+
+    def _reindex_open(self, state: OrderState) -> None:
+        open_ids = self._open.setdefault(state.symbol, set())
+        if state.is_open:
+            open_ids.add(state.order_id)
+            self._final.pop(state.order_id, None)
+        elif state.order_id not in self._final:
+            open_ids.discard(state.order_id)
+            self._final[state.order_id] = None
+            while len(self._final) > FINAL_KEPT:
+                self._forget(self._final.popitem(last=False)[0])
+
+    def _forget(self, order_id: int) -> None:
+        state = self._orders.pop(order_id)
+        self._by_symbol[state.symbol].discard(order_id)
+        if self._by_client_id.get(state.client_order_id) == order_id:
+            del self._by_client_id[state.client_order_id]
+
+    def _notify(self, state: OrderState, fill: Optional[Fill]) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(state, fill)
+            except Exception:
+                logger.exception(f"Order listener failed for {state.order_id}")
+
+    def record_ack(self, res: Dict) -> Optional[OrderState]:
+        """Seed or refresh an order from a REST response (place/cancel/query)"""
+        if not isinstance(res, dict) or "orderId" not in res:
+            return None
+        with self._lock:
+            state = self._get_or_create(int(res["orderId"]), res.get("symbol", ""), res.get("clientOrderId", ""))
+            update_time = int(res.get("updateTime", 0) or 0)
+            if update_time and update_time < state.update_time:
+                return state  # a stream event already moved it further
+            state.side = res.get("side", state.side)
+            state.position_side = res.get("positionSide", state.position_side)
+            state.type = res.get("type", state.type)
+            state.status = res.get("status", state.status)
+            state.price = float(res.get("price", state.price) or 0)
+            state.stop_price = float(res.get("stopPrice", state.stop_price) or 0)
+            state.orig_qty = float(res.get("origQty", state.orig_qty) or 0)
+            state.executed_qty = max(state.executed_qty, float(res.get("executedQty", 0) or 0))
+            state.avg_price = float(res.get("avgPrice", state.avg_price) or 0) or state.avg_price
+            state.update_time = max(state.update_time, update_time)
+            state.reduce_only = str(res.get("reduceOnly", state.reduce_only)).lower() == "true"
+            self._reindex_open(state)
+        self._notify(state, None)
+        return state
+
+    def apply_order_update(self, o: Dict) -> OrderState:
+        """Apply the "o" payload of an ORDER_TRADE_UPDATE event"""
+        fill = None
+        with self._lock:
+            state = self._get_or_create(int(o["i"]), o["s"], o.get("c", ""))
+            state.side = o.get("S", state.side)
+            state.position_side = o.get("ps", state.position_side)
+            state.type = o.get("o", state.type)
+            state.status = o.get("X", state.status)
+            state.price = float(o.get("p", state.price) or 0)
+            state.stop_price = float(o.get("sp", state.stop_price) or 0)
+            state.orig_qty = float(o.get("q", state.orig_qty) or 0)
+            state.executed_qty = float(o.get("z", state.executed_qty) or 0)
+            state.avg_price = float(o.get("ap", state.avg_price) or 0)
+            state.update_time = max(state.update_time, int(o.get("T", 0) or 0))
+            state.reduce_only = str(o.get("R", state.reduce_only)).lower() == "true"
+            if o.get("x") == "TRADE" and float(o.get("l", 0) or 0) > 0:
+                fill = Fill(int(o.get("t", 0)), float(o["l"]), float(o.get("L", 0)), float(o.get("n", 0) or 0), float(o.get("rp", 0) or 0), int(o.get("T", 0) or 0))
+                state.fills.append(fill)
+            self._reindex_open(state)
+        self._notify(state, fill)
+        return state
+
+    # -------- Queries --------
+    def get(self, order_id: int) -> Optional[OrderState]:
+        return self._orders.get(int(order_id))
+
+    def get_by_client_id(self, client_order_id: str) -> Optional[OrderState]:
+        order_id = self._by_client_id.get(client_order_id)
+        return self._orders.get(order_id) if order_id is not None else None
+
+    def orders_for_symbol(self, symbol: str) -> List[OrderState]:
+        orders = (self._orders.get(i) for i in list(self._by_symbol.get(symbol.upper(), ())))
+        return [o for o in orders if o is not None]
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[OrderState]:
+        symbols = [symbol.upper()] if symbol else list(self._open)
+        return [self._orders[i] for s in symbols for i in list(self._open.get(s, ()))]
+
+    def all_orders(self) -> List[OrderState]:
+        return list(self._orders.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._orders.clear()
+            self._by_client_id.clear()
+            self._by_symbol.clear()
+            self._open.clear()
+            self._final.clear()
+
+store = OrderStore()
+
+def record_response(method: str, endpoint: str, data) -> None:
+    """Feed order acks from make_request into the shared store"""
+    if endpoint not in ORDER_ENDPOINTS:
+        return
+    for res in data if isinstance(data, list) else [data]:
+        store.record_ack(res)
@@ -0,0 +1,212 @@
+"""
+Position and Exposure Book
+Position, entry price and open-order exposure per symbol and position side. Seeded
+once from /fapi/v2/positionRisk and /fapi/v1/openOrders, then kept current from the
+order store (our REST acks and user-stream fills), so pre-trade risk checks cost a
+dict lookup instead of a request.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from . import market_data
+from .utils import make_request, setup_logger
+from .order_store import Fill, OrderState, store
+from .config import MAX_POSITION_NOTIONAL, MAX_POSITION_SIZE, MIN_ORDER_SIZE, RISK_CHECKS_ENABLED
+
+logger = setup_logger("positions")
+POSITION_RISK_ENDPOINT = "/fapi/v2/positionRisk"
+OPEN_ORDERS_ENDPOINT = "/fapi/v1/openOrders"
+RETRY_AFTER_FAILURE = 60  # seconds before retrying a failed seed
+EPSILON = 1e-12
+FINISHED_KEPT = 10000  # final orders remembered so a late ack or stream event is not applied twice
+
+def _size_limits(spec: str) -> Dict[str, float]:
+    """MAX_POSITION_SIZE as {symbol: limit}; a bare number is stored under "" and covers every other symbol"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        symbol, _, limit = item.rpartition(":")
+        limits[symbol.strip().upper()] = float(limit)
+    return limits
+
+SIZE_LIMITS = _size_limits(MAX_POSITION_SIZE)
+
+class Exposure:
+    __slots__ = ("symbol", "position_side", "position", "entry_price", "last_price", "open_buy", "open_sell")
+
+    def __init__(self, symbol: str, position_side: str):
+        self.symbol = symbol
+        self.position_side = position_side
+        self.position = 0.0  # signed: + long, - short
+        self.entry_price = 0.0
+        self.last_price = 0.0  # mark price from the seed, then the last fill
+        self.open_buy = 0.0  # resting quantity that would add to the position
+        self.open_sell = 0.0
+
+    @property
+    def worst_long(self) -> float:
+        """Position if every resting buy filled"""
+        return self.position + self.open_buy
+
+    @property
+    def worst_short(self) -> float:
+        """Position if every resting sell filled (negative when short)"""
+        return self.position - self.open_sell
+
+    def fill(self, quantity: float, price: float) -> None:
+        """Apply a signed fill, keeping the average entry price of what is still held"""
+        position = self.position + quantity
+        if abs(position) < EPSILON:
+            position, self.entry_price = 0.0, 0.0
+        elif abs(self.position) < EPSILON or (self.position > 0) == (quantity > 0):
+            self.entry_price = (self.entry_price * abs(self.position) + price * abs(quantity)) / abs(position)
+        elif (self.position > 0) != (position > 0):
+            self.entry_price = price  # flipped through zero
+        self.position = position
+        if price:
+            self.last_price = price
+
+    def as_dict(self) -> Dict:
+        return {
+            "symbol": self.symbol,
+            "positionSide": self.position_side,
+            "position": self.position,
+            "entryPrice": self.entry_price,
+            "lastPrice": self.last_price,
+            "openBuy": self.open_buy,
+            "openSell": self.open_sell,
+        }
+
+class PositionBook:
+    def __init__(self):
+        self._exposures: Dict[Tuple[str, str], Exposure] = {}
+        self._orders: Dict[int, Tuple[float, float]] = {}  # open orderId -> (executed qty applied, open qty counted)
+        self._finished: "OrderedDict[int, None]" = OrderedDict()  # final orders, already fully applied
+        self._lock = threading.RLock()
+        self._seeded = False
+        self._failed_at = 0.0
+
+    def get(self, symbol: str, position_side: str = "BOTH") -> Exposure:
+        key = (symbol.upper(), position_side.upper())
+        exposure = self._exposures.get(key)
+        if exposure is None:
+            with self._lock:
+                exposure = self._exposures.setdefault(key, Exposure(*key))
+        return exposure
+
+    def on_order(self, state: OrderState, fill: Optional[Fill]) -> None:
+        """Order store listener; executed quantity is applied once per order whichever of ack or stream reports it first"""
+        if not state.symbol or state.side not in ("BUY", "SELL"):
+            return
+        sign = 1.0 if state.side == "BUY" else -1.0
+        with self._lock:
+            if state.order_id in self._finished:
+                return
+            exposure = self.get(state.symbol, state.position_side or "BOTH")
+            applied, counted = self._orders.get(state.order_id, (0.0, 0.0))
+            if state.executed_qty > applied + EPSILON:
+                exposure.fill(sign * (state.executed_qty - applied), fill.price if fill else state.avg_price)
+                applied = state.executed_qty
+            open_qty = state.remaining_qty if state.is_open and not state.reduce_only else 0.0
+            if open_qty != counted:
+                if sign > 0:
+                    exposure.open_buy = max(0.0, exposure.open_buy + open_qty - counted)
+                else:
+                    exposure.open_sell = max(0.0, exposure.open_sell + open_qty - counted)
+            if state.is_open:
+                self._orders[state.order_id] = (applied, open_qty)
+            else:
+                self._orders.pop(state.order_id, None)
+                self._finished[state.order_id] = None
+                if len(self._finished) > FINISHED_KEPT:
+                    self._finished.popitem(last=False)
+
+    def seed(self, force: bool = False) -> bool:
+        """Load positions and open orders from REST once; afterwards the book is updated incrementally"""
+        with self._lock:
+            if self._seeded and not force:
+                return True
+            if not force and self._failed_at and time.monotonic() - self._failed_at < RETRY_AFTER_FAILURE:
+                return False
+            try:
+                positions = make_request("GET", POSITION_RISK_ENDPOINT, signed=True)
+                orders = make_request("GET", OPEN_ORDERS_ENDPOINT, signed=True)
+            except Exception as e:
+                self._failed_at = time.monotonic()
+                logger.warning(f"Position seed failed, tracking only this process's orders from zero: {e}")
+                return False
+            self._exposures.clear()
+            for p in positions:
+                exposure = self.get(p["symbol"], p.get("positionSide", "BOTH"))
+                exposure.position = float(p.get("positionAmt", 0) or 0)
+                exposure.entry_price = float(p.get("entryPrice", 0) or 0)
+                exposure.last_price = float(p.get("markPrice", 0) or 0)
+            self._orders.clear()
+            self._finished.clear()
+            for o in orders:
+                self._orders[int(o["orderId"])] = (float(o.get("executedQty", 0) or 0), 0.0)  # already in positionAmt
+                state = store.record_ack(o)  # counts the open quantity through on_order
+                if state is not None and state.update_time > int(o.get("updateTime", 0) or 0):
+                    self.on_order(state, None)  # the store already had newer state, so record_ack did not notify
+            self._seeded = True
+            self._failed_at = 0.0
+            logger.info(f"Seeded {len(self._exposures)} positions and {len(orders)} open orders")
+            return True
+
+    async def seed_async(self) -> bool:
+        """seed() for event loops: the REST calls run in an executor thread"""
+        if self._seeded:
+            return True
+        return await asyncio.get_running_loop().run_in_executor(None, self.seed)
+
+    def snapshot(self) -> List[Dict]:
+        return [e.as_dict() for e in list(self._exposures.values())]
+
+    def clear(self) -> None:
+        """Forget everything, including the seed (the next check seeds again)"""
+        with self._lock:
+            self._exposures.clear()
+            self._orders.clear()
+            self._finished.clear()
+            self._seeded = False
+            self._failed_at = 0.0
+
+book = PositionBook()
+store.add_listener(book.on_order)
+
+async def seed_async() -> None:
+    """Seed the book before an async placer's check_order would seed it over blocking REST"""
+    if RISK_CHECKS_ENABLED:
+        await book.seed_async()
+
+def check_order(symbol: str, side: str, quantity: float, price: Optional[float] = None, position_side: str = "BOTH", reduce_only: bool = False, total: Optional[float] = None) -> bool:
+    """
+    Pre-trade risk check against the local book: quantity per order against
+    MIN_ORDER_SIZE, and position plus resting orders plus total (default: quantity)
+    against the symbol's MAX_POSITION_SIZE and MAX_POSITION_NOTIONAL, where set.
+    Reduce-only orders only need the minimum size.
+    """
+    if not RISK_CHECKS_ENABLED:
+        return True
+    if float(quantity) < MIN_ORDER_SIZE:
+        logger.error(f"Order quantity {quantity} below MIN_ORDER_SIZE {MIN_ORDER_SIZE}")
+        return False
+    if reduce_only:
+        return True
+    book.seed()
+    exposure = book.get(symbol, position_side)
+    added = float(total if total is not None else quantity)
+    worst = exposure.worst_long + added if side.upper() == "BUY" else -(exposure.worst_short - added)
+    limit = SIZE_LIMITS.get(symbol.upper(), SIZE_LIMITS.get(""))
+    if limit and worst > limit + EPSILON:
+        logger.error(f"{side.upper()} {added} {symbol.upper()} would allow a {position_side.upper()} position of {worst} (position {exposure.position}, resting buys {exposure.open_buy}, sells {exposure.open_sell}); its MAX_POSITION_SIZE is {limit}")
+        return False
+    if MAX_POSITION_NOTIONAL:
+        reference = price or market_data.get_cached_price(symbol) or exposure.last_price
+        if reference and worst * float(reference) > MAX_POSITION_NOTIONAL:
+            logger.error(f"{side.upper()} {added} {symbol.upper()} would allow {worst * float(reference):.2f} of {position_side.upper()} notional; MAX_POSITION_NOTIONAL is {MAX_POSITION_NOTIONAL}")
+            return False
+    return True
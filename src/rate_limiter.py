@@ -0,0 +1,203 @@
+"""
+Rate Limiter
+Client-side token buckets for Binance request weight and order counts, resynced from response headers.
+"""
+
+import json
+import threading
+import time
+from typing import Dict, Mapping, Optional, Tuple
+from .config import (
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_WEIGHT_PER_MIN,
+    RATE_LIMIT_ORDERS_PER_10S,
+    RATE_LIMIT_ORDERS_PER_MIN,
+    RATE_LIMIT_INFO_RESERVE,
+)
+from .logger import setup_logger
+
+logger = setup_logger("rate_limiter")
+
+# (method, endpoint) -> request weight; anything missing costs DEFAULT_WEIGHT
+ENDPOINT_WEIGHTS: Dict[Tuple[str, str], int] = {
+    ("POST", "/fapi/v1/order"): 1,
+    ("DELETE", "/fapi/v1/order"): 1,
+    ("GET", "/fapi/v1/order"): 1,
+    ("POST", "/fapi/v1/batchOrders"): 5,
+    ("DELETE", "/fapi/v1/batchOrders"): 1,
+    ("DELETE", "/fapi/v1/allOpenOrders"): 1,
+    ("GET", "/fapi/v1/openOrders"): 1,
+    ("GET", "/fapi/v1/ticker/price"): 1,
+    ("GET", "/fapi/v1/exchangeInfo"): 1,
+    ("GET", "/fapi/v1/time"): 1,
+    ("GET", "/fapi/v1/ping"): 1,
+    ("GET", "/fapi/v1/depth"): 10,
+    ("GET", "/fapi/v1/klines"): 5,
+    ("GET", "/fapi/v2/positionRisk"): 5,
+    ("GET", "/fapi/v2/account"): 5,
+    ("POST", "/fapi/v1/listenKey"): 1,
+    ("PUT", "/fapi/v1/listenKey"): 1,
+}
+DEFAULT_WEIGHT = 1
+# Endpoints whose weight grows with the "limit" param: ascending (max limit, weight)
+LIMIT_WEIGHTS: Dict[str, Tuple[Tuple[int, int], ...]] = {
+    "/fapi/v1/klines": ((99, 1), (499, 2), (1000, 5), (1500, 10)),
+    "/fapi/v1/depth": ((50, 2), (100, 5), (500, 10), (1000, 20)),
+}
+ORDER_ENDPOINTS = {"/fapi/v1/order", "/fapi/v1/batchOrders"}
+
+class TokenBucket:
+    def __init__(self, capacity: float, window_seconds: float):
+        self.capacity = capacity
+        self.rate = capacity / window_seconds
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, reserve: float = 0.0) -> float:
+        missing = amount + reserve - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def resync(self, used: float, now: float) -> None:
+        # The exchange's count is authoritative; take it if it is more pessimistic than ours
+        self.refill(now)
+        self.tokens = min(self.tokens, self.capacity - used)
+
+class RateLimiter:
+    """
+    Shared weight/order budget. Order placement and cancels are "priority" requests:
+    informational GETs leave RATE_LIMIT_INFO_RESERVE of the weight bucket for them
+    and wait while any priority request is queued.
+    """
+
+    def __init__(self, weight_per_min: int = RATE_LIMIT_WEIGHT_PER_MIN, orders_per_10s: int = RATE_LIMIT_ORDERS_PER_10S, orders_per_min: int = RATE_LIMIT_ORDERS_PER_MIN, info_reserve: float = RATE_LIMIT_INFO_RESERVE):
+        self.weight = TokenBucket(weight_per_min, 60)
+        self.orders_10s = TokenBucket(orders_per_10s, 10)
+        self.orders_1m = TokenBucket(orders_per_min, 60)
+        self.info_reserve = weight_per_min * info_reserve
+        self.banned_until = 0.0
+        self._priority_waiting = 0
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def cost(method: str, endpoint: str, params: Optional[Mapping] = None) -> Tuple[int, int, bool]:
+        """(weight, order count, priority) of a request"""
+        method = method.upper()
+        weight = ENDPOINT_WEIGHTS.get((method, endpoint), DEFAULT_WEIGHT)
+        if params and "limit" in params and endpoint in LIMIT_WEIGHTS:
+            limit = int(params["limit"])
+            weight = next((w for bound, w in LIMIT_WEIGHTS[endpoint] if limit <= bound), LIMIT_WEIGHTS[endpoint][-1][1])
+        orders = 0
+        if method == "POST" and endpoint in ORDER_ENDPOINTS:
+            orders = len(json.loads(params["batchOrders"])) if params and "batchOrders" in params else 1
+        priority = endpoint in ORDER_ENDPOINTS or method == "DELETE"
+        return weight, orders, priority
+
+    def _try_acquire(self, weight: int, orders: int, priority: bool) -> float:
+        """Take the tokens and return 0, or return how long to wait. Caller holds the lock."""
+        now = time.monotonic()
+        if now < self.banned_until:
+            return self.banned_until - now
+        if not priority and self._priority_waiting:
+            return 0.01
+        for bucket in (self.weight, self.orders_10s, self.orders_1m):
+            bucket.refill(now)
+        wait = self.weight.wait_time(weight, 0.0 if priority else self.info_reserve)
+        if orders:
+            wait = max(wait, self.orders_10s.wait_time(orders), self.orders_1m.wait_time(orders))
+        if wait > 0:
+            return wait
+        self.weight.tokens -= weight
+        if orders:
+            self.orders_10s.tokens -= orders
+            self.orders_1m.tokens -= orders
+        return 0.0
+
+    def acquire(self, method: str, endpoint: str, params: Optional[Mapping] = None) -> float:
+        """Block until the request fits in the budget; returns seconds spent waiting"""
+        weight, orders, priority = self.cost(method, endpoint, params)
+        start = time.monotonic()
+        with self._cond:
+            if priority:
+                self._priority_waiting += 1
+            try:
+                while True:
+                    wait = self._try_acquire(weight, orders, priority)
+                    if not wait:
+                        break
+                    self._cond.wait(timeout=wait)
+            finally:
+                if priority:
+                    self._priority_waiting -= 1
+        return time.monotonic() - start
+
+    async def acquire_async(self, method: str, endpoint: str, params: Optional[Mapping] = None) -> float:
+        """Event-loop friendly acquire"""
+        import asyncio
+
+        weight, orders, priority = self.cost(method, endpoint, params)
+        start = time.monotonic()
+        with self._cond:
+            if priority:
+                self._priority_waiting += 1
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_acquire(weight, orders, priority)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+        finally:
+            if priority:
+                with self._cond:
+                    self._priority_waiting -= 1
+        return time.monotonic() - start
+
+    def update_from_headers(self, headers: Mapping[str, str], status: int = 200) -> None:
+        """Resync buckets from X-MBX-* headers and honour 429/418 Retry-After"""
+        now = time.monotonic()
+        with self._cond:
+            for name, value in headers.items():
+                name = name.upper()
+                if name == "X-MBX-USED-WEIGHT-1M":
+                    self.weight.resync(float(value), now)
+                elif name == "X-MBX-ORDER-COUNT-10S":
+                    self.orders_10s.resync(float(value), now)
+                elif name == "X-MBX-ORDER-COUNT-1M":
+                    self.orders_1m.resync(float(value), now)
+            if status in (418, 429):
+                retry_after = float(headers.get("Retry-After", 60))
+                self.banned_until = max(self.banned_until, now + retry_after)
+                logger.error(f"Rate limited by exchange (HTTP {status}); pausing all requests for {retry_after:.0f}s")
+            self._cond.notify_all()
+
+    def headroom(self) -> Dict[str, float]:
+        """Tokens left in each budget, so strategies can pace themselves"""
+        now = time.monotonic()
+        with self._cond:
+            for bucket in (self.weight, self.orders_10s, self.orders_1m):
+                bucket.refill(now)
+            return {
+                "weight": self.weight.tokens,
+                "orders_10s": self.orders_10s.tokens,
+                "orders_1m": self.orders_1m.tokens,
+                "banned_for": max(0.0, self.banned_until - now),
+            }
+
+limiter = RateLimiter()
+
+def acquire(method: str, endpoint: str, params: Optional[Mapping] = None) -> float:
+    return limiter.acquire(method, endpoint, params) if RATE_LIMIT_ENABLED else 0.0
+
+async def acquire_async(method: str, endpoint: str, params: Optional[Mapping] = None) -> float:
+    return await limiter.acquire_async(method, endpoint, params) if RATE_LIMIT_ENABLED else 0.0
+
+def update_from_headers(headers: Mapping[str, str], status: int = 200) -> None:
+    if RATE_LIMIT_ENABLED:
+        limiter.update_from_headers(headers, status)
+
+def headroom() -> Dict[str, float]:
+    return limiter.headroom()
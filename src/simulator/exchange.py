@@ -0,0 +1,240 @@
+"""
+Simulated Exchange
+Serves the Binance Futures REST endpoints used by src.utils.make_request from an
+in-process MatchingEngine. Usable as a requests transport adapter (in-process) or
+behind src.simulator.server (local HTTP).
+"""
+
+import json
+import threading
+import time
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .matching import MatchingEngine, SimError
+
+DEFAULT_FILTERS = {"tick_size": "0.10", "step_size": "0.001", "min_qty": "0.001", "max_qty": "1000", "min_notional": "5"}
+
+def _symbol_info(symbol: str, tick_size: str, step_size: str, min_qty: str, max_qty: str, min_notional: str) -> Dict:
+    return {
+        "symbol": symbol,
+        "status": "TRADING",
+        "filters": [
+            {"filterType": "PRICE_FILTER", "minPrice": tick_size, "maxPrice": "10000000", "tickSize": tick_size},
+            {"filterType": "LOT_SIZE", "minQty": min_qty, "maxQty": max_qty, "stepSize": step_size},
+            {"filterType": "MARKET_LOT_SIZE", "minQty": min_qty, "maxQty": max_qty, "stepSize": step_size},
+            {"filterType": "MIN_NOTIONAL", "notional": min_notional},
+        ],
+    }
+
+class SimulatedExchange:
+    def __init__(self, symbols: Optional[Dict[str, Dict]] = None):
+        self.engine = MatchingEngine()
+        self.symbols: Dict[str, Dict] = {}
+        for symbol, filters in (symbols or {"BTCUSDT": {}}).items():
+            self.add_symbol(symbol, **filters)
+        self.listen_key = "simulatedListenKey"
+        self._lock = threading.RLock()
+        self.requests_served = 0
+
+    def add_symbol(self, symbol: str, **filters) -> None:
+        self.symbols[symbol.upper()] = _symbol_info(symbol.upper(), **{**DEFAULT_FILTERS, **filters})
+
+    def add_listener(self, callback) -> None:
+        """Receive user-data-stream style ORDER_TRADE_UPDATE events"""
+        self.engine.listeners.append(callback)
+
+    def connect_order_store(self) -> None:
+        """Feed fills straight into src.order_store (and the journal), standing in for the user data stream"""
+        from .. import journal
+        from ..order_store import store
+
+        def on_event(event: Dict) -> None:
+            if journal.ENABLED:
+                journal.record_update(event["o"])
+            store.apply_order_update(event["o"])
+
+        self.add_listener(on_event)
+
+    # -------- Price feed --------
+    def on_trade(self, symbol: str, price: float, qty: Optional[float] = None) -> None:
+        with self._lock:
+            self.engine.on_trade(symbol, price, qty)
+
+    def replay(self, ticks: Iterable[Tuple[str, float, Optional[float]]], speed: Optional[float] = None, timestamps: Optional[Iterable[float]] = None) -> int:
+        """
+        Push (symbol, price, qty) ticks through the engine. With speed and timestamps
+        (seconds), sleeps to reproduce the original spacing divided by speed.
+        """
+        count = 0
+        prev = None
+        stamps = iter(timestamps) if timestamps is not None else None
+        for symbol, price, qty in ticks:
+            if speed and stamps is not None:
+                ts = next(stamps)
+                if prev is not None and ts > prev:
+                    time.sleep((ts - prev) / speed)
+                prev = ts
+            self.on_trade(symbol, price, qty)
+            count += 1
+        return count
+
+    # -------- REST --------
+    def handle(self, method: str, path: str, params: Dict[str, str]) -> Tuple[int, object]:
+        """Route one request; returns (HTTP status, JSON body)"""
+        method = method.upper()
+        route = self._routes().get((method, path))
+        if route is None:
+            return 404, {"code": -1000, "msg": f"Unsupported endpoint {method} {path}"}
+        with self._lock:
+            self.requests_served += 1
+            try:
+                return 200, route(params)
+            except SimError as e:
+                return 400, e.as_dict()
+            except (KeyError, ValueError) as e:
+                return 400, {"code": -1102, "msg": f"Malformed or missing parameter: {e}"}
+
+    def _routes(self):
+        return {
+            ("GET", "/fapi/v1/ping"): lambda p: {},
+            ("GET", "/fapi/v1/time"): lambda p: {"serverTime": int(time.time() * 1000)},
+            ("GET", "/fapi/v1/exchangeInfo"): lambda p: {"timezone": "UTC", "serverTime": int(time.time() * 1000), "symbols": list(self.symbols.values())},
+            ("GET", "/fapi/v1/ticker/price"): self._ticker,
+            ("GET", "/fapi/v1/depth"): self._depth,
+            ("POST", "/fapi/v1/order"): self._new_order,
+            ("GET", "/fapi/v1/order"): self._query_order,
+            ("DELETE", "/fapi/v1/order"): self._cancel_order,
+            ("POST", "/fapi/v1/batchOrders"): self._batch_orders,
+            ("DELETE", "/fapi/v1/batchOrders"): self._batch_cancel,
+            ("GET", "/fapi/v1/openOrders"): lambda p: [o.as_dict() for o in self.engine.open_orders(p.get("symbol"))],
+            ("DELETE", "/fapi/v1/allOpenOrders"): self._cancel_all,
+            ("GET", "/fapi/v2/positionRisk"): self._position_risk,
+            ("POST", "/fapi/v1/listenKey"): lambda p: {"listenKey": self.listen_key},
+            ("PUT", "/fapi/v1/listenKey"): lambda p: {},
+        }
+
+    def _check_symbol(self, symbol: str) -> str:
+        symbol = symbol.upper()
+        if symbol not in self.symbols:
+            raise SimError(-1121, "Invalid symbol.")
+        return symbol
+
+    def _ticker(self, p: Dict) -> Dict:
+        symbol = self._check_symbol(p["symbol"])
+        price = self.engine.book(symbol).last_price
+        if price is None:
+            raise SimError(-1121, "No price feed for symbol.")
+        return {"symbol": symbol, "price": f"{price}", "time": int(time.time() * 1000)}
+
+    def _depth(self, p: Dict) -> Dict:
+        """Resting (simulated) orders aggregated per price level"""
+        book = self.engine.book(self._check_symbol(p.get("symbol", "")))
+        limit = int(p.get("limit", 500))
+
+        def levels(side) -> List[List[str]]:
+            return [[f"{abs(key)}", f"{sum(o.remaining for o in side.levels[key])}"] for key in side.keys[:limit]]
+
+        now = int(time.time() * 1000)
+        return {"lastUpdateId": now, "E": now, "T": now, "bids": levels(book.bids), "asks": levels(book.asks)}
+
+    def _new_order(self, p: Dict) -> Dict:
+        self._check_symbol(p.get("symbol", ""))
+        return self.engine.place(p).as_dict()
+
+    def _query_order(self, p: Dict) -> Dict:
+        return self.engine.lookup(p["symbol"], p.get("orderId"), p.get("origClientOrderId")).as_dict()
+
+    def _cancel_order(self, p: Dict) -> Dict:
+        return self.engine.cancel(p["symbol"], p.get("orderId"), p.get("origClientOrderId")).as_dict()
+
+    def _batch_orders(self, p: Dict) -> List[Dict]:
+        orders = json.loads(p["batchOrders"])
+        if len(orders) > 5:
+            raise SimError(-1130, "Data sent for parameter 'batchOrders' is not valid.")
+        out = []
+        for order in orders:
+            try:
+                out.append(self._new_order(order))
+            except SimError as e:
+                out.append(e.as_dict())
+        return out
+
+    def _batch_cancel(self, p: Dict) -> List[Dict]:
+        out = []
+        ids = [(order_id, None) for order_id in json.loads(p.get("orderIdList", "[]"))]
+        ids += [(None, client_id) for client_id in json.loads(p.get("origClientOrderIdList", "[]"))]
+        for order_id, client_id in ids:
+            try:
+                out.append(self.engine.cancel(p["symbol"], order_id, client_id).as_dict())
+            except SimError as e:
+                out.append(e.as_dict())
+        return out
+
+    def _position_risk(self, p: Dict) -> List[Dict]:
+        out = []
+        for (symbol, position_side), (amount, entry) in self.engine.positions.items():
+            if p.get("symbol") and symbol != p["symbol"].upper():
+                continue
+            mark = self.engine.book(symbol).last_price or entry
+            out.append({
+                "symbol": symbol, "positionSide": position_side, "positionAmt": f"{amount}", "entryPrice": f"{entry}",
+                "markPrice": f"{mark}", "unRealizedProfit": f"{(mark - entry) * amount}", "notional": f"{mark * amount}",
+            })
+        return out
+
+    def _cancel_all(self, p: Dict) -> Dict:
+        for order in self.engine.open_orders(p["symbol"]):
+            self.engine.cancel(order.symbol, order.order_id)
+        return {"code": 200, "msg": "The operation of cancel all open order is done."}
+
+def parse_request(url: str) -> Tuple[str, Dict[str, str]]:
+    parts = urlsplit(url)
+    params = dict(parse_qsl(parts.query, keep_blank_values=True))
+    params.pop("signature", None)
+    params.pop("timestamp", None)
+    params.pop("recvWindow", None)
+    return parts.path, params
+
+class SimulatorAdapter(BaseAdapter):
+    """requests transport adapter that answers from a SimulatedExchange without any socket"""
+
+    def __init__(self, exchange: SimulatedExchange):
+        super().__init__()
+        self.exchange = exchange
+
+    def handle(self, method: str, url: str) -> Tuple[int, Dict[str, str], bytes]:
+        path, params = parse_request(url)
+        status, body = self.exchange.handle(method, path, params)
+        return status, {"Content-Type": "application/json"}, json.dumps(body).encode()
+
+    def send(self, request, **kwargs):
+        status, headers, body = self.handle(request.method, request.url)
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.raw = BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
+
+def install(exchange: Optional[SimulatedExchange] = None, base_url: str = "http://simulator.local") -> SimulatedExchange:
+    """
+    Route make_request/make_request_async for base_url through an in-process
+    simulator and make it the default API base URL.
+    """
+    from .. import utils
+
+    exchange = exchange or SimulatedExchange()
+    utils.mount_transport(base_url, SimulatorAdapter(exchange))
+    utils.API_BASE_URL = base_url
+    return exchange
@@ -0,0 +1,30 @@
+"""
+Price Feeds
+Tick sources for the simulator: recorded CSV files or a seeded random walk.
+"""
+
+import csv
+import random
+from typing import Iterator, Optional, Tuple
+
+Tick = Tuple[float, str, float, Optional[float]]  # (timestamp seconds, symbol, price, qty)
+
+def read_csv_ticks(path: str) -> Iterator[Tick]:
+    """Rows of timestamp,symbol,price[,qty]; a header row is skipped. Millisecond timestamps are accepted."""
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row or not row[0].replace(".", "", 1).isdigit():
+                continue
+            ts = float(row[0])
+            if ts > 1e11:
+                ts /= 1000
+            qty = float(row[3]) if len(row) > 3 and row[3] else None
+            yield ts, row[1].upper(), float(row[2]), qty
+
+def random_walk(symbol: str, start_price: float, steps: int, volatility: float = 0.0005, interval: float = 0.1, qty: Optional[float] = None, seed: int = 0) -> Iterator[Tick]:
+    """Reproducible geometric random walk, one tick every interval seconds"""
+    rng = random.Random(seed)
+    price = start_price
+    for i in range(steps):
+        price *= 1 + rng.gauss(0, volatility)
+        yield i * interval, symbol.upper(), round(price, 2), qty
@@ -0,0 +1,308 @@
+"""
+Matching Engine
+Price-time priority book of our own resting orders, matched against a replayed
+trade/price feed. Marketable orders take liquidity at the last feed price.
+"""
+
+import bisect
+import itertools
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+STOP_TYPES = {"STOP", "STOP_MARKET", "TAKE_PROFIT", "TAKE_PROFIT_MARKET"}
+OPEN_STATUSES = {"NEW", "PARTIALLY_FILLED"}
+
+class SimError(Exception):
+    """Rejection in Binance's {"code", "msg"} shape"""
+
+    def __init__(self, code: int, msg: str):
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
+
+    def as_dict(self) -> Dict:
+        return {"code": self.code, "msg": self.msg}
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+class SimOrder:
+    __slots__ = ("order_id", "client_order_id", "symbol", "side", "position_side", "type", "orig_type",
+                 "time_in_force", "price", "stop_price", "orig_qty", "executed_qty", "cum_quote",
+                 "status", "reduce_only", "working_type", "triggered", "seq", "update_time")
+
+    def __init__(self, order_id: int, seq: int, params: Dict):
+        self.order_id = order_id
+        self.seq = seq
+        self.client_order_id = params.get("newClientOrderId") or f"sim_{order_id}"
+        self.symbol = params["symbol"].upper()
+        self.side = params["side"].upper()
+        self.position_side = params.get("positionSide", "BOTH").upper()
+        self.type = params["type"].upper()
+        self.orig_type = self.type
+        self.time_in_force = params.get("timeInForce", "GTC").upper()
+        self.price = float(params.get("price", 0) or 0)
+        self.stop_price = float(params.get("stopPrice", 0) or 0)
+        self.orig_qty = float(params["quantity"])
+        self.executed_qty = 0.0
+        self.cum_quote = 0.0
+        self.status = "NEW"
+        self.reduce_only = str(params.get("reduceOnly", "false")).lower() == "true"
+        self.working_type = params.get("workingType", "CONTRACT_PRICE")
+        self.triggered = self.type not in STOP_TYPES
+        self.update_time = _now_ms()
+
+    @property
+    def remaining(self) -> float:
+        return self.orig_qty - self.executed_qty
+
+    def as_dict(self) -> Dict:
+        return {
+            "orderId": self.order_id,
+            "symbol": self.symbol,
+            "status": self.status,
+            "clientOrderId": self.client_order_id,
+            "price": f"{self.price}",
+            "avgPrice": f"{self.cum_quote / self.executed_qty if self.executed_qty else 0}",
+            "origQty": f"{self.orig_qty}",
+            "executedQty": f"{self.executed_qty}",
+            "cumQuote": f"{self.cum_quote}",
+            "timeInForce": self.time_in_force,
+            "type": self.type,
+            "origType": self.orig_type,
+            "reduceOnly": self.reduce_only,
+            "side": self.side,
+            "positionSide": self.position_side,
+            "stopPrice": f"{self.stop_price}",
+            "workingType": self.working_type,
+            "updateTime": self.update_time,
+        }
+
+class _Side:
+    """Resting orders on one side: sorted price levels, FIFO queue per level"""
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self.keys: List[float] = []  # sort keys (negated prices for bids)
+        self.levels: Dict[float, Deque[SimOrder]] = {}
+
+    def _key(self, price: float) -> float:
+        return -price if self.descending else price
+
+    def add(self, order: SimOrder) -> None:
+        key = self._key(order.price)
+        level = self.levels.get(key)
+        if level is None:
+            level = self.levels[key] = deque()
+            bisect.insort(self.keys, key)
+        level.append(order)
+
+    def remove(self, order: SimOrder) -> None:
+        key = self._key(order.price)
+        level = self.levels.get(key)
+        if level is None:
+            return
+        try:
+            level.remove(order)
+        except ValueError:
+            return
+        if not level:
+            del self.levels[key]
+            self.keys.pop(bisect.bisect_left(self.keys, key))
+
+    def best(self) -> Optional[float]:
+        return abs(self.keys[0]) if self.keys else None
+
+    def crossed(self, price: float) -> List[SimOrder]:
+        """Orders a trade at price reaches, in price-time priority"""
+        bound = bisect.bisect_right(self.keys, self._key(price))
+        return [o for key in self.keys[:bound] for o in self.levels[key]]
+
+class SymbolBook:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = _Side(descending=True)
+        self.asks = _Side(descending=False)
+        self.stops: List[SimOrder] = []
+        self.last_price: Optional[float] = None
+
+    def side_for(self, order: SimOrder) -> _Side:
+        return self.bids if order.side == "BUY" else self.asks
+
+class MatchingEngine:
+    def __init__(self):
+        self.books: Dict[str, SymbolBook] = {}
+        self.orders: Dict[int, SimOrder] = {}
+        self.by_client_id: Dict[Tuple[str, str], SimOrder] = {}
+        self._ids = itertools.count(1)
+        self._seq = itertools.count(1)
+        self._trade_ids = itertools.count(1)
+        self.listeners: List[Callable[[Dict], None]] = []
+        self.positions: Dict[Tuple[str, str], List[float]] = {}  # (symbol, positionSide) -> [signed amount, entry price]
+
+    def book(self, symbol: str) -> SymbolBook:
+        symbol = symbol.upper()
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = SymbolBook(symbol)
+        return book
+
+    # -------- Events --------
+    def _emit(self, order: SimOrder, execution: str, last_qty: float = 0.0, last_price: float = 0.0) -> None:
+        if not self.listeners:
+            return
+        event = {
+            "e": "ORDER_TRADE_UPDATE",
+            "E": order.update_time,
+            "T": order.update_time,
+            "o": {
+                "s": order.symbol, "c": order.client_order_id, "S": order.side, "o": order.type,
+                "f": order.time_in_force, "q": str(order.orig_qty), "p": str(order.price),
+                "ap": str(order.cum_quote / order.executed_qty if order.executed_qty else 0),
+                "sp": str(order.stop_price), "x": execution, "X": order.status, "i": order.order_id,
+                "l": str(last_qty), "z": str(order.executed_qty), "L": str(last_price), "n": "0",
+                "T": order.update_time, "t": next(self._trade_ids) if last_qty else 0,
+                "R": order.reduce_only, "ps": order.position_side, "ot": order.orig_type, "rp": "0",
+            },
+        }
+        for callback in list(self.listeners):
+            callback(event)
+
+    def _position(self, order: SimOrder, qty: float, price: float) -> None:
+        position = self.positions.setdefault((order.symbol, order.position_side), [0.0, 0.0])
+        amount, entry = position
+        signed = qty if order.side == "BUY" else -qty
+        new = amount + signed
+        if abs(new) < 1e-12:
+            position[:] = [0.0, 0.0]
+            return
+        if abs(amount) < 1e-12 or (amount > 0) == (signed > 0):
+            entry = (entry * abs(amount) + price * qty) / abs(new)
+        elif (amount > 0) != (new > 0):
+            entry = price
+        position[:] = [new, entry]
+
+    def _fill(self, order: SimOrder, qty: float, price: float) -> None:
+        self._position(order, qty, price)
+        order.executed_qty += qty
+        order.cum_quote += qty * price
+        order.status = "FILLED" if order.remaining <= 1e-12 else "PARTIALLY_FILLED"
+        order.update_time = _now_ms()
+        self._emit(order, "TRADE", qty, price)
+
+    def _finish(self, order: SimOrder, status: str) -> None:
+        order.status = status
+        order.update_time = _now_ms()
+        self._emit(order, "CANCELED" if status == "CANCELED" else "EXPIRED")
+
+    # -------- Orders --------
+    def place(self, params: Dict) -> SimOrder:
+        for field in ("symbol", "side", "type", "quantity"):
+            if field not in params:
+                raise SimError(-1102, f"Mandatory parameter '{field}' was not sent, was empty/null, or malformed.")
+        client_id = params.get("newClientOrderId")
+        if client_id and (params["symbol"].upper(), client_id) in self.by_client_id:
+            raise SimError(-4015, "Client order id is not valid.")
+        order = SimOrder(next(self._ids), next(self._seq), params)
+        if order.orig_qty <= 0:
+            raise SimError(-4003, "Quantity less than or equal to zero.")
+        if order.type in ("LIMIT", "STOP", "TAKE_PROFIT") and order.price <= 0:
+            raise SimError(-4001, "Price less than or equal to zero.")
+        book = self.book(order.symbol)
+        if book.last_price is None and order.type == "MARKET":
+            raise SimError(-1121, "No price feed for symbol.")
+        self.orders[order.order_id] = order
+        self.by_client_id[(order.symbol, order.client_order_id)] = order
+        self._emit(order, "NEW")
+        if not order.triggered:
+            book.stops.append(order)
+            if book.last_price is not None:
+                self._check_stops(book, book.last_price)
+        else:
+            self._execute(book, order)
+        return order
+
+    def _marketable(self, book: SymbolBook, order: SimOrder) -> bool:
+        if book.last_price is None:
+            return False
+        if order.type == "MARKET":
+            return True
+        return order.price >= book.last_price if order.side == "BUY" else order.price <= book.last_price
+
+    def _execute(self, book: SymbolBook, order: SimOrder) -> None:
+        """Take liquidity at the last price if marketable, otherwise rest (or expire IOC/FOK/GTX rules)"""
+        if self._marketable(book, order):
+            if order.time_in_force == "GTX" and order.type != "MARKET":
+                self._finish(order, "EXPIRED")  # post-only would have taken liquidity
+                return
+            self._fill(order, order.remaining, book.last_price)
+            return
+        if order.type == "MARKET":
+            self._finish(order, "EXPIRED")
+        elif order.time_in_force in ("IOC", "FOK"):
+            self._finish(order, "EXPIRED")
+        else:
+            book.side_for(order).add(order)
+
+    def cancel(self, symbol: str, order_id: Optional[int] = None, client_order_id: Optional[str] = None) -> SimOrder:
+        order = self.lookup(symbol, order_id, client_order_id)
+        if order.status not in OPEN_STATUSES:
+            raise SimError(-2011, "Unknown order sent.")
+        book = self.book(order.symbol)
+        if order.triggered:
+            book.side_for(order).remove(order)
+        elif order in book.stops:
+            book.stops.remove(order)
+        self._finish(order, "CANCELED")
+        return order
+
+    def lookup(self, symbol: str, order_id: Optional[int] = None, client_order_id: Optional[str] = None) -> SimOrder:
+        order = None
+        if order_id is not None:
+            order = self.orders.get(int(order_id))
+        elif client_order_id:
+            order = self.by_client_id.get((symbol.upper(), client_order_id))
+        if order is None or order.symbol != symbol.upper():
+            raise SimError(-2013, "Order does not exist.")
+        return order
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[SimOrder]:
+        return [o for o in self.orders.values() if o.status in OPEN_STATUSES and (symbol is None or o.symbol == symbol.upper())]
+
+    # -------- Price feed --------
+    def _check_stops(self, book: SymbolBook, price: float) -> None:
+        fired = []
+        for order in book.stops:
+            up = order.side == "BUY"
+            if order.type.startswith("TAKE_PROFIT"):
+                up = not up
+            if (price >= order.stop_price) if up else (price <= order.stop_price):
+                fired.append(order)
+        for order in sorted(fired, key=lambda o: o.seq):
+            book.stops.remove(order)
+            order.triggered = True
+            order.type = "MARKET" if order.type.endswith("_MARKET") else "LIMIT"
+            order.update_time = _now_ms()
+            self._emit(order, "NEW")  # like the exchange: the converted order is reported before it executes
+            self._execute(book, order)
+
+    def on_trade(self, symbol: str, price: float, qty: Optional[float] = None) -> None:
+        """
+        Apply one feed trade: trigger stops, then fill resting orders the price
+        reaches in price-time priority. qty caps the volume filled (None = unlimited).
+        """
+        book = self.book(symbol)
+        book.last_price = price
+        if book.stops:
+            self._check_stops(book, price)
+        available = float("inf") if qty is None else qty
+        for side in (book.bids, book.asks):
+            for order in side.crossed(price):
+                if available <= 0:
+                    return
+                fill = min(order.remaining, available)
+                available -= fill
+                self._fill(order, fill, order.price)
+                if order.status == "FILLED":
+                    side.remove(order)
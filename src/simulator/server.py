@@ -0,0 +1,78 @@
+"""
+Simulator HTTP Server
+Serves a SimulatedExchange on localhost so unmodified processes can point
+BINANCE_BASE_URL at it.
+"""
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from .exchange import SimulatedExchange, parse_request
+from .feed import random_walk, read_csv_ticks
+
+def make_handler(exchange: SimulatedExchange):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+        disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+        def _respond(self):
+            path, params = parse_request(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                _, body_params = parse_request("?" + self.rfile.read(length).decode())
+                params.update(body_params)
+            status, body = exchange.handle(self.command, path, params)
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def serve(exchange: SimulatedExchange, host: str = "127.0.0.1", port: int = 8080, background: bool = False) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), make_handler(exchange))
+    server.daemon_threads = True
+    if background:
+        threading.Thread(target=server.serve_forever, name="simulator", daemon=True).start()
+    else:
+        server.serve_forever()
+    return server
+
+def _replay(exchange: SimulatedExchange, path: Optional[str], symbols, start_price: float, speed: float) -> None:
+    if path:
+        ticks = list(read_csv_ticks(path))
+    else:
+        ticks = [t for s in symbols for t in random_walk(s, start_price, 100000)]
+        ticks.sort(key=lambda t: t[0])
+    exchange.replay(((s, p, q) for _, s, p, q in ticks), speed=speed, timestamps=(t[0] for t in ticks))
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local Binance Futures simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--symbols", default="BTCUSDT", help="Comma-separated symbols to list")
+    parser.add_argument("--feed", help="CSV of timestamp,symbol,price[,qty] to replay; default is a random walk")
+    parser.add_argument("--start-price", type=float, default=50000.0, help="Random walk start price")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier")
+    args = parser.parse_args()
+
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    exchange = SimulatedExchange({s: {} for s in symbols})
+    for s in symbols:
+        exchange.on_trade(s, args.start_price, 0)
+    threading.Thread(target=_replay, args=(exchange, args.feed, symbols, args.start_price, args.speed), daemon=True).start()
+    print(f"Simulator listening on http://{args.host}:{args.port} — set BINANCE_BASE_URL to use it")
+    serve(exchange, args.host, args.port)
+
+if __name__ == "__main__":
+    main()
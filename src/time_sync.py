@@ -0,0 +1,100 @@
+"""
+Server Time Sync
+Estimates the offset between the local clock and Binance server time so signed
+requests carry timestamps the exchange accepts (avoids -1021 recvWindow rejections).
+"""
+
+import sys
+import threading
+import time
+from typing import Optional
+from .config import REQUEST_TIMEOUT, TIME_SYNC_ENABLED, TIME_SYNC_INTERVAL, TIME_SYNC_SAMPLES
+from .logger import setup_logger
+
+logger = setup_logger("time_sync")
+TIME_ENDPOINT = "/fapi/v1/time"
+
+_offset_ms = 0.0
+_rtt_ms: Optional[float] = None
+_synced_at = 0.0
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+_resync = threading.Event()
+_ready = threading.Event()  # set once the first round trip is in (or failed)
+
+def server_time_ms() -> int:
+    """Local clock corrected by the current offset estimate"""
+    if TIME_SYNC_ENABLED and not _ready.is_set():
+        start(block=not _on_event_loop())
+    return int(time.time() * 1000 + _offset_ms)
+
+def offset_ms() -> float:
+    return _offset_ms
+
+def record_sample(server_ms: float, sent_ms: float, received_ms: float) -> None:
+    """Take one /time round trip; the server stamped it roughly at the RTT midpoint"""
+    global _offset_ms, _rtt_ms, _synced_at
+    rtt = received_ms - sent_ms
+    _offset_ms = server_ms - (sent_ms + rtt / 2)
+    _rtt_ms = rtt
+    _synced_at = time.monotonic()
+
+def sync(samples: int = TIME_SYNC_SAMPLES) -> bool:
+    """Measure a few round trips and keep the one with the smallest RTT"""
+    from .utils import make_request
+
+    best = None
+    for _ in range(max(1, samples)):
+        try:
+            sent = time.time() * 1000
+            server = make_request("GET", TIME_ENDPOINT)["serverTime"]
+            received = time.time() * 1000
+        except Exception as e:
+            logger.warning(f"Server time sample failed: {e}")
+            continue
+        if best is None or received - sent < best[2] - best[1]:
+            best = (server, sent, received)
+    if best is None:
+        return False
+    record_sample(*best)
+    logger.info(f"Server time offset {_offset_ms:.1f}ms (rtt {_rtt_ms:.1f}ms)")
+    return True
+
+def request_resync() -> None:
+    """Ask the background thread to resync now (e.g. after a -1021 rejection)"""
+    _resync.set()
+
+def _on_event_loop() -> bool:
+    asyncio = sys.modules.get("asyncio")  # not imported means no loop can be running
+    if asyncio is None:
+        return False
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+def _loop() -> None:
+    try:
+        sync(1)  # one round trip for the requests waiting on it; the full sample set follows
+    finally:
+        _ready.set()
+    sync()
+    while True:
+        _resync.wait(TIME_SYNC_INTERVAL)
+        _resync.clear()
+        sync()
+
+def start(block: bool = True) -> None:
+    """
+    Sync in the background, then resync every TIME_SYNC_INTERVAL seconds. With block=True
+    every caller waits for the first round trip (not the full TIME_SYNC_SAMPLES); with
+    block=False (used on an event loop) requests sign with the local clock until it is in.
+    """
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_loop, name="time-sync", daemon=True)
+            _thread.start()
+    if block:
+        _ready.wait(REQUEST_TIMEOUT)
@@ -0,0 +1,181 @@
+"""
+User Data Stream
+Consumes the listenKey WebSocket and applies ORDER_TRADE_UPDATE events to the order store.
+After every (re)connect the store is reconciled with /fapi/v1/openOrders, so fills and
+cancels missed while disconnected do not leave orders open forever.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from .config import WS_BASE_URL
+from . import journal, metrics
+from .order_store import store
+from .utils import make_request_async, setup_logger
+
+logger = setup_logger("user_stream")
+LISTEN_KEY_ENDPOINT = "/fapi/v1/listenKey"
+OPEN_ORDERS_ENDPOINT = "/fapi/v1/openOrders"
+ORDER_ENDPOINT = "/fapi/v1/order"
+KEEPALIVE_INTERVAL = 30 * 60  # listenKeys expire after 60 minutes without a keepalive
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+class UserDataStream:
+    """Runs the listenKey connection on its own event loop in a daemon thread"""
+
+    def __init__(self, url: str = WS_BASE_URL):
+        self.url = url.rstrip("/")
+        self.listen_key: Optional[str] = None
+        self._event_listeners: List[Callable[[Dict], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ws = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def add_event_listener(self, callback: Callable[[Dict], None]) -> None:
+        """Call callback(event) for every raw event, e.g. ACCOUNT_UPDATE"""
+        self._event_listeners.append(callback)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="user-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._loop and self._ws:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def handle_event(self, event: Dict) -> None:
+        if event.get("e") == "ORDER_TRADE_UPDATE":
+            _apply_update(event["o"])
+        elif event.get("e") == "listenKeyExpired":
+            logger.warning("listenKey expired; reconnecting")
+            if self._loop and self._ws:
+                asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        for callback in list(self._event_listeners):
+            try:
+                callback(event)
+            except Exception:
+                logger.exception(f"User stream listener failed on {event.get('e')}")
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._consume())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def _keepalive(self) -> None:
+        while True:
+            await asyncio.sleep(KEEPALIVE_INTERVAL)
+            try:
+                await make_request_async("PUT", LISTEN_KEY_ENDPOINT, keyed=True)
+            except Exception:
+                logger.warning("listenKey keepalive failed")
+
+    async def reconcile(self) -> int:
+        """
+        Re-read open orders and query every order the store still thinks is open but the
+        exchange no longer lists (filled or cancelled while the stream was down). Orders
+        the exchange no longer knows are marked EXPIRED. Returns how many were closed.
+        """
+        try:
+            orders = await make_request_async("GET", OPEN_ORDERS_ENDPOINT, signed=True)
+        except Exception as e:
+            logger.warning(f"Order reconcile skipped, openOrders failed: {e}")
+            return 0
+        listed = set()
+        for o in orders:
+            listed.add(int(o["orderId"]))
+            store.record_ack(o)
+        missing = [state for state in store.open_orders() if state.order_id not in listed]
+        closed = await asyncio.gather(*(_close_missing(state) for state in missing))
+        if missing:
+            logger.info(f"Reconciled order store: {len(orders)} open on the exchange, {sum(closed)} of {len(missing)} missing orders closed")
+        return sum(closed)
+
+    async def _consume(self) -> None:
+        import websockets
+
+        delay = RECONNECT_DELAY
+        while not self._stopped.is_set():
+            keepalive = None
+            try:
+                self.listen_key = (await make_request_async("POST", LISTEN_KEY_ENDPOINT, keyed=True))["listenKey"]
+                async with websockets.connect(f"{self.url}/ws/{self.listen_key}", ping_interval=20) as ws:
+                    self._ws = ws
+                    keepalive = asyncio.ensure_future(self._keepalive())
+                    logger.info("User data stream connected")
+                    delay = RECONNECT_DELAY
+                    asyncio.ensure_future(self.reconcile())  # after subscribing, so nothing falls between the two
+                    async for raw in ws:
+                        try:
+                            self.handle_event(json.loads(raw))
+                        except Exception as e:
+                            logger.warning(f"Bad user stream message: {e}")
+            except Exception as e:
+                if not self._stopped.is_set():
+                    logger.warning(f"User data stream disconnected: {e}; reconnecting in {delay:.0f}s")
+                    metrics.count_retry("user_stream", type(e).__name__)
+            finally:
+                self._ws = None
+                if keepalive:
+                    keepalive.cancel()
+            if not self._stopped.is_set():
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+def _apply_update(o: Dict) -> None:
+    if journal.ENABLED:
+        journal.record_update(o)
+    store.apply_order_update(o)
+
+def _rejected(error: BaseException) -> bool:
+    """The exchange answered 4xx (e.g. -2013 order does not exist), as opposed to a network failure"""
+    status = getattr(error, "status", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status in (400, 404) or str(error).startswith(("400 ", "404 "))
+
+async def _close_missing(state) -> bool:
+    """Query an order openOrders no longer lists; the response updates the store. True once it is final"""
+    try:
+        await make_request_async("GET", ORDER_ENDPOINT, {"symbol": state.symbol, "orderId": state.order_id}, signed=True)
+    except Exception as e:
+        if not _rejected(e):
+            logger.warning(f"Could not query missing order {state.order_id}: {e}")
+            return False
+        logger.warning(f"Order {state.order_id} is unknown to the exchange; marking it EXPIRED")
+        _apply_update({
+            "s": state.symbol, "i": state.order_id, "c": state.client_order_id, "S": state.side,
+            "ps": state.position_side, "o": state.type, "x": "EXPIRED", "X": "EXPIRED",
+            "p": state.price, "sp": state.stop_price, "q": state.orig_qty, "z": state.executed_qty,
+            "ap": state.avg_price, "T": int(time.time() * 1000), "R": state.reduce_only,
+        })
+    return not state.is_open
+
+_stream: Optional[UserDataStream] = None
+_stream_lock = threading.Lock()
+
+def start_user_stream(url: Optional[str] = None) -> UserDataStream:
+    """Start (once) the shared user data stream"""
+    global _stream
+    with _stream_lock:
+        if _stream is None:
+            _stream = UserDataStream(url or WS_BASE_URL)
+            _stream.start()
+    return _stream
+
+def stop_user_stream() -> None:
+    global _stream
+    with _stream_lock:
+        if _stream is not None:
+            _stream.stop()
+            _stream = None
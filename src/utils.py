@@ -6,65 +6,236 @@ Includes request signing, validation, and logging setup
 import time
 import hmac
 import hashlib
+import json
+import threading
 import requests
-import logging
+from requests.adapters import HTTPAdapter
 from urllib.parse import urlencode
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from .config import (
     API_KEY,
     API_SECRET,
     API_BASE_URL,
     REQUEST_TIMEOUT,
-    LOG_FILE,
-    LOG_LEVEL,
-    LOG_FORMAT,
+    HTTP_POOL_SIZE,
+    HTTP_PREWARM,
     DEFAULT_RECV_WINDOW,
+    PRICE_STREAM_ENABLED,
 )
-
-def setup_logger(name: str):
-    """Configure and return a logger"""
-    logger = logging.getLogger(name)
-    if not logger.handlers:
-        handler = logging.FileHandler(LOG_FILE)
-        formatter = logging.Formatter(LOG_FORMAT)
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        logger.setLevel(getattr(logging, LOG_LEVEL.upper(), logging.INFO))
-    return logger
+from .logger import setup_logger
+from . import market_data, metrics, order_store, rate_limiter, time_sync
 
 logger = setup_logger("utils")
 
-def _sign(params: Dict) -> Dict:
-    """Add timestamp and signature to parameters"""
-    params = params.copy()
-    params["timestamp"] = int(time.time() * 1000)
-    params["recvWindow"] = DEFAULT_RECV_WINDOW
-    query = urlencode(params, doseq=True)
-    if not API_SECRET:
+# -------- HTTP Session Pool --------
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+def _new_session(pool_size: int) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    adapter.poolmanager.pool_classes_by_scheme = metrics.TIMED_POOL_CLASSES  # connect/TLS time for metrics
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+def get_session(base_url: Optional[str] = None) -> requests.Session:
+    """Return the shared keep-alive session for a base URL, creating it on first use"""
+    base_url = (base_url or API_BASE_URL).rstrip("/")
+    session = _sessions.get(base_url)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(base_url)
+            if session is None:
+                session = _new_session(HTTP_POOL_SIZE)
+                _sessions[base_url] = session
+                if HTTP_PREWARM:
+                    threading.Thread(target=prewarm_sessions, args=([base_url],), daemon=True).start()
+    return session
+
+# In-process transports (e.g. the exchange simulator), keyed by base URL
+_local_transports: Dict[str, Any] = {}
+
+def mount_transport(base_url: str, adapter) -> None:
+    """Serve every request for base_url from a transport adapter with a handle(method, url) method"""
+    base_url = base_url.rstrip("/")
+    _local_transports[base_url] = adapter
+    get_session(base_url).mount(base_url, adapter)
+
+def _local_request(adapter, method: str, url: str) -> Any:
+    status, headers, body = adapter.handle(method.upper(), url)
+    rate_limiter.update_from_headers(headers, status)
+    _check_clock(status, body.decode() if status == 400 else "")
+    if status >= 400:
+        raise requests.HTTPError(f"{status} Error: {body.decode()} for url: {url}")
+    return json.loads(body)
+
+def prewarm_sessions(base_urls: Optional[List[str]] = None, connections: int = 1) -> None:
+    """Open connections ahead of the first order so it skips the TCP+TLS handshake"""
+    base_urls = base_urls or [API_BASE_URL]
+    connections = max(1, min(connections, HTTP_POOL_SIZE))
+    threads = []
+    for base_url in base_urls:
+        base_url = base_url.rstrip("/")
+        session = get_session(base_url)
+        for _ in range(connections):
+            t = threading.Thread(target=_ping, args=(session, base_url), daemon=True)
+            t.start()
+            threads.append(t)
+    for t in threads:
+        t.join()
+
+def _ping(session: requests.Session, base_url: str) -> None:
+    try:
+        session.get(base_url + "/fapi/v1/ping", timeout=REQUEST_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Connection pre-warm failed for {base_url}: {e}")
+
+def close_sessions() -> None:
+    """Close every pooled session (testnet and mainnet)"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+# -------- Requests --------
+JOURNAL_ENDPOINTS = ("/fapi/v1/order", "/fapi/v1/batchOrders", "/fapi/v1/allOpenOrders")  # order requests written to the journal (src/journal.py)
+
+# Keyed once; each signature works on a copy of this state
+_hmac_base = hmac.new(API_SECRET.encode(), digestmod=hashlib.sha256) if API_SECRET else None
+
+def _sign(params: Dict) -> str:
+    """Return the query string with timestamp, recvWindow and signature appended"""
+    query = urlencode(params, doseq=True) if params else ""
+    query += f"{'&' if query else ''}timestamp={time_sync.server_time_ms()}&recvWindow={DEFAULT_RECV_WINDOW}"
+    if _hmac_base is None:
         logger.warning("API_SECRET not set — request unsigned (test mode).")
-        params["signature"] = ""
-        return params
-    signature = hmac.new(API_SECRET.encode(), query.encode(), hashlib.sha256).hexdigest()
-    params["signature"] = signature
-    return params
+        return query + "&signature="
+    mac = _hmac_base.copy()
+    mac.update(query.encode())
+    return query + "&signature=" + mac.hexdigest()
 
-def make_request(method: str, endpoint: str, params: Optional[Dict] = None, signed: bool = False) -> Dict[str, Any]:
+def _journal(endpoint: str):
+    """src.journal for order endpoints while journaling is on; imported by the first order request, not at startup"""
+    if endpoint not in JOURNAL_ENDPOINTS:
+        return None
+    from . import journal
+    return journal if journal.ENABLED else None
+
+def _check_clock(status: int, body: str) -> None:
+    if status == 400 and '"code":-1021' in body.replace(" ", ""):
+        logger.warning("Timestamp outside recvWindow; resyncing server time")
+        time_sync.request_resync()
+
+def make_request(method: str, endpoint: str, params: Optional[Dict] = None, signed: bool = False, base_url: Optional[str] = None, keyed: bool = False) -> Dict[str, Any]:
     """Send HTTP request to Binance Futures API"""
-    url = API_BASE_URL.rstrip("/") + endpoint
+    base_url = (base_url or API_BASE_URL).rstrip("/")
+    url = base_url + endpoint
     params = params or {}
-    headers = {"X-MBX-APIKEY": API_KEY} if signed else {}
+    headers = {"X-MBX-APIKEY": API_KEY} if signed or keyed else {}
+    journal = _journal(endpoint)
+    start = time.perf_counter()
+    queued = 0.0
     try:
+        queued = rate_limiter.acquire(method, endpoint, params)
+        if metrics.ENABLED:
+            metrics.take_connect_time()
+        if journal:
+            journal.record_request(method, endpoint, params)
         if signed:
-            params = _sign(params)
-        if method.upper() == "GET":
-            response = requests.get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+            response = get_session(base_url).request(method.upper(), url + "?" + _sign(params), headers=headers, timeout=REQUEST_TIMEOUT)
         else:
-            response = requests.post(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+            response = get_session(base_url).request(method.upper(), url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+        rate_limiter.update_from_headers(response.headers, response.status_code)
+        _check_clock(response.status_code, response.text if response.status_code == 400 else "")
         response.raise_for_status()
         data = response.json()
-        logger.info(f"Request successful: {method} {endpoint}")
+        order_store.record_response(method, endpoint, data)
+        if journal:
+            journal.record_response(method, endpoint, data)
+        if metrics.ENABLED:
+            connect = metrics.take_connect_time()
+            metrics.observe_request(method, endpoint, response.status_code, time.perf_counter() - start, queued, connect, max(0.0, response.elapsed.total_seconds() - connect))
+        logger.info("Request successful: %s %s", method, endpoint, extra={"latency_ms": round((time.perf_counter() - start) * 1000, 3)})
         return data
     except Exception as e:
+        if metrics.ENABLED:
+            metrics.observe_error(method, endpoint, e, time.perf_counter() - start, queued)
+        if journal:
+            journal.record_error(method, endpoint, params, e)
+        logger.exception(f"API request failed: {method} {endpoint} -> {e}")
+        raise
+
+# -------- Async Transport --------
+_async_sessions: Dict[Tuple[int, str], Any] = {}
+
+def get_async_session(base_url: Optional[str] = None):
+    """Return the aiohttp session for a base URL on the running event loop"""
+    import asyncio
+    import aiohttp
+
+    base_url = (base_url or API_BASE_URL).rstrip("/")
+    key = (id(asyncio.get_running_loop()), base_url)
+    session = _async_sessions.get(key)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit=0, limit_per_host=0, keepalive_timeout=60)
+        trace_configs = [metrics.aiohttp_trace_config()] if metrics.ENABLED else None
+        session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT), trace_configs=trace_configs)
+        _async_sessions[key] = session
+    return session
+
+async def close_async_sessions() -> None:
+    """Close the aiohttp sessions opened on the running event loop"""
+    import asyncio
+
+    loop_id = id(asyncio.get_running_loop())
+    for key in [k for k in _async_sessions if k[0] == loop_id]:
+        await _async_sessions.pop(key).close()
+
+async def make_request_async(method: str, endpoint: str, params: Optional[Dict] = None, signed: bool = False, base_url: Optional[str] = None, keyed: bool = False) -> Dict[str, Any]:
+    """Send HTTP request to Binance Futures API without blocking the event loop"""
+    from yarl import URL
+
+    base_url = (base_url or API_BASE_URL).rstrip("/")
+    params = params or {}
+    headers = {"X-MBX-APIKEY": API_KEY} if signed or keyed else {}
+    journal = _journal(endpoint)
+    start = time.perf_counter()
+    queued = 0.0
+    try:
+        queued = await rate_limiter.acquire_async(method, endpoint, params)
+        if journal:
+            journal.record_request(method, endpoint, params)
+        query = _sign(params) if signed else urlencode(params, doseq=True)
+        url = base_url + endpoint + ("?" + query if query else "")
+        local = _local_transports.get(base_url)
+        trace: Dict[str, float] = {}
+        if local is not None:
+            sent = time.perf_counter()
+            data = _local_request(local, method, url)
+            status, trace["ttfb"] = 200, time.perf_counter() - sent
+        else:
+            async with get_async_session(base_url).request(method.upper(), URL(url, encoded=True), headers=headers, trace_request_ctx=trace) as response:
+                rate_limiter.update_from_headers(response.headers, response.status)
+                _check_clock(response.status, await response.text() if response.status == 400 else "")
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+                status = response.status
+        order_store.record_response(method, endpoint, data)
+        if journal:
+            journal.record_response(method, endpoint, data)
+        if metrics.ENABLED:
+            connect = trace.get("connect", 0.0)
+            ttfb = trace.get("ttfb", trace["headers"] - trace["start"] - connect if "headers" in trace else None)
+            metrics.observe_request(method, endpoint, status, time.perf_counter() - start, queued, connect, ttfb)
+        logger.info("Request successful: %s %s", method, endpoint, extra={"latency_ms": round((time.perf_counter() - start) * 1000, 3)})
+        return data
+    except Exception as e:
+        if metrics.ENABLED:
+            metrics.observe_error(method, endpoint, e, time.perf_counter() - start, queued)
+        if journal:
+            journal.record_error(method, endpoint, params, e)
         logger.exception(f"API request failed: {method} {endpoint} -> {e}")
         raise
 
@@ -95,11 +266,35 @@ def validate_price(price: float) -> bool:
         logger.error(f"Invalid price: {price}")
         return False
 
+def _cached_price(symbol: str) -> Optional[float]:
+    if PRICE_STREAM_ENABLED:
+        market_data.subscribe(symbol)
+    return market_data.get_cached_price(symbol)
+
 def get_current_price(symbol: str) -> Optional[float]:
-    """Fetch current price of a symbol"""
+    """Current price of a symbol: the streamed price while fresh, REST otherwise"""
+    price = _cached_price(symbol)
+    if price is not None:
+        return price
     try:
         data = make_request("GET", "/fapi/v1/ticker/price", {"symbol": symbol.upper()})
-        return float(data.get("price"))
+        price = float(data.get("price"))
+        market_data.update_last(symbol, price)
+        return price
+    except Exception as e:
+        logger.error(f"Failed to get current price: {e}")
+        return None
+
+async def get_current_price_async(symbol: str) -> Optional[float]:
+    """Current price of a symbol without blocking the event loop"""
+    price = _cached_price(symbol)
+    if price is not None:
+        return price
+    try:
+        data = await make_request_async("GET", "/fapi/v1/ticker/price", {"symbol": symbol.upper()})
+        price = float(data.get("price"))
+        market_data.update_last(symbol, price)
+        return price
     except Exception as e:
         logger.error(f"Failed to get current price: {e}")
         return None
@@ -0,0 +1,136 @@
+"""
+Intraday Volume Profile
+Share of a day's traded volume in each UTC minute, averaged over recent days of
+cached 1m klines, plus the average daily volume. Built once per symbol and lookback,
+kept in memory and saved next to the klines cache, so sizing a VWAP schedule is a
+prefix-sum lookup instead of a download.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+from .klines import get_klines
+from .logger import setup_logger
+from .config import BACKTEST_DATA_DIR, VWAP_PROFILE_DAYS, VWAP_PROFILE_TTL
+
+logger = setup_logger("volume_profile")
+MINUTE_MS = 60_000
+DAY_MS = 86_400_000
+MINUTES = 1440
+
+class VolumeProfile:
+    __slots__ = ("symbol", "shares", "daily_volume", "built_at", "_cumulative")
+
+    def __init__(self, symbol: str, shares: np.ndarray, daily_volume: float, built_at: int):
+        self.symbol = symbol
+        self.shares = shares  # fraction of a day's volume per minute of the day; sums to 1
+        self.daily_volume = daily_volume
+        self.built_at = built_at  # open time of the newest candle used, epoch ms
+        self._cumulative = np.concatenate(([0.0], np.cumsum(shares)))
+
+    def _days(self, t_ms: np.ndarray) -> np.ndarray:
+        """Days' worth of expected volume between the epoch and t_ms, interpolated within the minute"""
+        day, offset = np.divmod(np.asarray(t_ms, dtype=np.float64), DAY_MS)
+        minute = offset / MINUTE_MS
+        i = np.minimum(minute.astype(np.int64), MINUTES - 1)
+        return day + self._cumulative[i] + (minute - i) * self.shares[i]
+
+    def expected_volume(self, start_ms: float, end_ms: float) -> float:
+        """Volume the profile expects to trade in [start_ms, end_ms)"""
+        start, end = self._days([start_ms, end_ms])
+        return float(end - start) * self.daily_volume
+
+    def expected_volumes(self, start_ms: float, interval_ms: float, intervals: int) -> np.ndarray:
+        """Expected volume of each of intervals consecutive windows from start_ms"""
+        return np.diff(self._days(start_ms + interval_ms * np.arange(intervals + 1))) * self.daily_volume
+
+def build_profile(symbol: str, days: int = VWAP_PROFILE_DAYS, end_ms: Optional[int] = None, root: str = BACKTEST_DATA_DIR, download: bool = True) -> Optional[VolumeProfile]:
+    """Profile from the days of 1m candles before end_ms (default: now); None without data"""
+    symbol = symbol.upper()
+    end = int(end_ms or time.time() * 1000)
+    end -= end % MINUTE_MS
+    columns = get_klines(symbol, "1m", end - days * DAY_MS, end, root, download)
+    times, volumes = columns["open_time"], columns["volume"]
+    if not len(times):
+        return None
+    minutes = (times // MINUTE_MS) % MINUTES
+    # Mean per minute of the day over the days that have it, so gaps in the cache do not read as quiet minutes
+    totals = np.bincount(minutes, weights=volumes, minlength=MINUTES)
+    counts = np.bincount(minutes, minlength=MINUTES)
+    mean = totals / np.maximum(counts, 1)
+    daily = float(mean.sum())
+    if daily <= 0:
+        return None
+    return VolumeProfile(symbol, mean / daily, daily, int(times[-1]))
+
+# -------- Cache --------
+_profiles: Dict[Tuple[str, int], VolumeProfile] = {}
+_locks: Dict[Tuple[str, int], threading.Lock] = {}  # one per profile, so a download does not hold up other symbols
+_lock = threading.Lock()
+
+def _key_lock(key: Tuple[str, int]) -> threading.Lock:
+    with _lock:
+        return _locks.setdefault(key, threading.Lock())
+
+def _path(root: str, symbol: str, days: int) -> str:
+    return os.path.join(root, symbol, f"volume_profile_{days}d.npz")
+
+def _fresh(profile: Optional[VolumeProfile], end_ms: int) -> bool:
+    # a profile built after end_ms would look ahead (backtests ask for past times)
+    return profile is not None and 0 <= end_ms - profile.built_at < VWAP_PROFILE_TTL * 1000
+
+def _load(path: str, symbol: str) -> Optional[VolumeProfile]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            return VolumeProfile(symbol, data["shares"], float(data["daily_volume"]), int(data["built_at"]))
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable volume profile {path}: {e}")
+        return None
+
+def _save(path: str, profile: VolumeProfile) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, shares=profile.shares, daily_volume=profile.daily_volume, built_at=profile.built_at)
+    os.replace(tmp, path)
+
+def get_profile(symbol: str, days: int = VWAP_PROFILE_DAYS, end_ms: Optional[int] = None, root: str = BACKTEST_DATA_DIR) -> Optional[VolumeProfile]:
+    """
+    Cached profile for end_ms (default: now), rebuilt once VWAP_PROFILE_TTL old. If
+    klines cannot be downloaded, builds from whatever is cached, and falls back to
+    a stale profile before giving up.
+    """
+    symbol = symbol.upper()
+    end = int(end_ms or time.time() * 1000)
+    key = (symbol, days)
+    with _key_lock(key):
+        profile = _profiles.get(key)
+        if _fresh(profile, end):
+            return profile
+        path = _path(root, symbol, days)
+        stored = _load(path, symbol)
+        if _fresh(stored, end):
+            _profiles[key] = stored
+            return stored
+        try:
+            built = build_profile(symbol, days, end, root)
+        except Exception as e:
+            logger.warning(f"{symbol} klines download failed, building the volume profile from cache: {e}")
+            built = build_profile(symbol, days, end, root, download=False)
+        if built is None:
+            stale = profile or stored
+            if stale is not None:
+                logger.warning(f"No fresh klines for {symbol}; using a volume profile built at {stale.built_at}")
+            return stale
+        try:
+            _save(path, built)
+        except OSError as e:
+            logger.warning(f"Could not save volume profile {path}: {e}")
+        _profiles[key] = built
+        logger.info(f"Built {symbol} volume profile from {days} days: {built.daily_volume:.2f} per day")
+        return built
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Settings are read once at import: keep test runs out of bot.log and off the network
+os.environ.setdefault("LOG_FILE", os.path.join(tempfile.gettempdir(), "binance_bot_tests.log"))
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("TIME_SYNC_ENABLED", "false")
+os.environ.setdefault("JOURNAL_ENABLED", "false")
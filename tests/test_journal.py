@@ -0,0 +1,68 @@
+import pytest
+
+from src import journal
+from src.order_store import OrderStore
+
+
+@pytest.fixture
+def writer(tmp_path, monkeypatch):
+    writer = journal.JournalWriter(str(tmp_path))
+    monkeypatch.setattr(journal, "_writer", writer)
+    yield writer
+    writer.close()
+
+
+def _place(order_id, client_id, quantity="0.5", price="50000"):
+    journal.record_request("POST", "/fapi/v1/order", {"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": quantity, "price": price, "newClientOrderId": client_id})
+    journal.record_response("POST", "/fapi/v1/order", {
+        "orderId": order_id, "clientOrderId": client_id, "symbol": "BTCUSDT", "side": "BUY", "positionSide": "BOTH",
+        "type": "LIMIT", "status": "NEW", "price": price, "origQty": quantity, "executedQty": "0", "avgPrice": "0", "updateTime": 1000,
+    })
+
+
+def _fill(order_id, client_id, trade_id, last_qty, executed, status, time_ms):
+    journal.record_update({
+        "i": order_id, "c": client_id, "s": "BTCUSDT", "S": "BUY", "ps": "BOTH", "o": "LIMIT", "x": "TRADE", "X": status,
+        "p": "50000", "q": "0.5", "z": executed, "ap": "50000", "l": last_qty, "L": "50000", "n": "0.01", "rp": "0", "t": trade_id, "T": time_ms,
+    })
+
+
+def test_records_round_trip_through_query(writer, tmp_path):
+    _place(11, "a_1")
+    _fill(11, "a_1", 7, "0.2", "0.2", "PARTIALLY_FILLED", 2000)
+    journal.flush()
+
+    records = journal.Journal(str(tmp_path)).query(order_id=11)
+    rows = [journal.as_dict(r) for r in records]
+    assert [r["kind"] for r in rows] == ["ack", "fill"]
+    ack, fill = rows
+    assert (ack["symbol"], ack["side"], ack["type"], ack["status"]) == ("BTCUSDT", "BUY", "LIMIT", "NEW")
+    assert (ack["price"], ack["origQty"], ack["clientOrderId"]) == (50000.0, 0.5, "a_1")
+    assert (fill["tradeId"], fill["lastQty"], fill["executedQty"], fill["commission"]) == (7, 0.2, 0.2, 0.01)
+    assert fill["strategy"] == ack["strategy"] != ""  # the stream event is tagged with the placing strategy
+
+
+def test_restore_rebuilds_open_orders_and_fills(writer, tmp_path):
+    _place(11, "a_1")
+    _place(12, "a_2")
+    _fill(11, "a_1", 7, "0.2", "0.2", "PARTIALLY_FILLED", 2000)
+    _fill(11, "a_1", 8, "0.3", "0.5", "FILLED", 3000)
+
+    store = OrderStore()
+    assert journal.restore(store, str(tmp_path), hours=24) == 2
+    filled, resting = store.get(11), store.get(12)
+    assert (filled.status, filled.executed_qty) == ("FILLED", 0.5)
+    assert [(f.trade_id, f.quantity) for f in filled.fills] == [(7, 0.2), (8, 0.3)]
+    assert resting.is_open and resting.client_order_id == "a_2"
+    assert [o.order_id for o in store.open_orders("BTCUSDT")] == [12]
+
+
+def test_torn_tail_is_cut_before_reading(writer, tmp_path):
+    _place(11, "a_1")
+    journal.flush()
+    path = journal.journal_path(str(tmp_path))
+    with open(path, "ab") as f:
+        f.write(b"\0" * (journal.RECORD_SIZE // 2))
+
+    assert journal.repair(path) == 2
+    assert len(journal.Journal(str(tmp_path))) == 2
@@ -0,0 +1,68 @@
+import pytest
+
+from src.simulator.matching import MatchingEngine, SimError
+
+
+@pytest.fixture
+def engine():
+    engine = MatchingEngine()
+    engine.on_trade("BTCUSDT", 105.0, 0)  # a last price, so limit orders below it rest
+    return engine
+
+
+def _limit(engine, side, price, quantity=1.0, **extra):
+    return engine.place({"symbol": "BTCUSDT", "side": side, "type": "LIMIT", "quantity": quantity, "price": price, "timeInForce": "GTC", **extra})
+
+
+def test_better_price_fills_first_then_earlier_order(engine):
+    first = _limit(engine, "BUY", 100.0)
+    better = _limit(engine, "BUY", 101.0)
+    later = _limit(engine, "BUY", 100.0)
+
+    engine.on_trade("BTCUSDT", 100.0, 2.5)
+
+    assert (better.status, better.executed_qty) == ("FILLED", 1.0)
+    assert (first.status, first.executed_qty) == ("FILLED", 1.0)
+    assert (later.status, later.executed_qty) == ("PARTIALLY_FILLED", 0.5)
+
+
+def test_trade_only_reaches_crossed_levels(engine):
+    near = _limit(engine, "BUY", 102.0)
+    far = _limit(engine, "BUY", 99.0)
+
+    engine.on_trade("BTCUSDT", 101.0)
+
+    assert near.status == "FILLED"
+    assert far.status == "NEW" and far.executed_qty == 0.0
+
+
+def test_fills_are_reported_in_priority_order(engine):
+    events = []
+    engine.listeners.append(lambda event: events.append(event))
+    ids = [_limit(engine, "SELL", price).order_id for price in (110.0, 108.0, 108.0)]
+    engine.on_trade("BTCUSDT", 110.0)
+
+    trades = [e["o"]["i"] for e in events if e["o"]["x"] == "TRADE"]
+    assert trades == [ids[1], ids[2], ids[0]]
+
+
+def test_cancelled_order_leaves_the_queue(engine):
+    first = _limit(engine, "BUY", 100.0)
+    second = _limit(engine, "BUY", 100.0)
+    engine.cancel("BTCUSDT", order_id=first.order_id)
+
+    engine.on_trade("BTCUSDT", 100.0, 1.0)
+
+    assert first.status == "CANCELED" and first.executed_qty == 0.0
+    assert second.status == "FILLED"
+    with pytest.raises(SimError):
+        engine.cancel("BTCUSDT", order_id=first.order_id)
+
+
+def test_stop_triggers_then_executes(engine):
+    stop = engine.place({"symbol": "BTCUSDT", "side": "SELL", "type": "STOP_MARKET", "quantity": 1.0, "stopPrice": 100.0})
+    engine.on_trade("BTCUSDT", 101.0)
+    assert stop.status == "NEW"
+
+    engine.on_trade("BTCUSDT", 99.5)
+    assert (stop.type, stop.status, stop.executed_qty) == ("MARKET", "FILLED", 1.0)
@@ -0,0 +1,64 @@
+from src import order_store
+from src.order_store import OrderStore
+
+
+def _ack(order_id=1, status="NEW", executed="0", update_time=1000, **extra):
+    return {"orderId": order_id, "symbol": "BTCUSDT", "clientOrderId": f"c{order_id}", "side": "BUY", "type": "LIMIT",
+            "status": status, "price": "50000", "origQty": "1", "executedQty": executed, "updateTime": update_time, **extra}
+
+
+def _event(order_id=1, status="PARTIALLY_FILLED", executed="0.4", last="0.4", time_ms=2000):
+    return {"i": order_id, "s": "BTCUSDT", "c": f"c{order_id}", "S": "BUY", "o": "LIMIT", "x": "TRADE", "X": status,
+            "p": "50000", "q": "1", "z": executed, "ap": "50000", "l": last, "L": "50000", "t": 1, "T": time_ms}
+
+
+def test_older_ack_does_not_undo_a_stream_update():
+    store = OrderStore()
+    store.apply_order_update(_event(time_ms=2000))
+    store.record_ack(_ack(status="NEW", update_time=1000))  # the placement response, delivered late
+
+    state = store.get(1)
+    assert (state.status, state.executed_qty, state.update_time) == ("PARTIALLY_FILLED", 0.4, 2000)
+    assert len(state.fills) == 1
+
+
+def test_newer_ack_moves_the_order_forward():
+    store = OrderStore()
+    store.record_ack(_ack(status="NEW", update_time=1000))
+    store.record_ack(_ack(status="CANCELED", executed="0.2", update_time=3000))
+
+    state = store.get(1)
+    assert (state.status, state.executed_qty, state.update_time) == ("CANCELED", 0.2, 3000)
+    assert store.open_orders("BTCUSDT") == []
+    assert store.get_by_client_id("c1") is state
+
+
+def test_ack_never_lowers_executed_quantity():
+    store = OrderStore()
+    store.apply_order_update(_event(executed="0.4", time_ms=2000))
+    store.record_ack(_ack(status="PARTIALLY_FILLED", executed="0.1", update_time=2000))
+
+    assert store.get(1).executed_qty == 0.4
+
+
+def test_listeners_see_every_update():
+    store = OrderStore()
+    seen = []
+    store.add_listener(lambda state, fill: seen.append((state.status, fill.quantity if fill else None)))
+    store.record_ack(_ack())
+    store.apply_order_update(_event())
+
+    assert seen == [("NEW", None), ("PARTIALLY_FILLED", 0.4)]
+
+
+def test_oldest_final_orders_are_dropped_past_the_cap(monkeypatch):
+    monkeypatch.setattr(order_store, "FINAL_KEPT", 2)
+    store = OrderStore()
+    for order_id in range(1, 5):
+        store.record_ack(_ack(order_id))
+    for order_id in range(1, 4):
+        store.apply_order_update(_event(order_id, status="FILLED", executed="1", last="1"))
+
+    assert sorted(o.order_id for o in store.all_orders()) == [2, 3, 4]
+    assert store.get_by_client_id("c1") is None
+    assert [o.order_id for o in store.open_orders()] == [4]
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from src.rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def limiter():
+    return RateLimiter(weight_per_min=2400, orders_per_10s=300, orders_per_min=1200, info_reserve=0.1)
+
+
+def test_used_weight_header_takes_the_exchange_count(limiter):
+    limiter.update_from_headers({"X-MBX-USED-WEIGHT-1M": "2000"})
+
+    assert limiter.headroom()["weight"] == pytest.approx(400, abs=1)
+
+
+def test_header_names_are_case_insensitive(limiter):
+    limiter.update_from_headers({"x-mbx-order-count-10s": "290", "x-mbx-order-count-1m": "100"})
+
+    headroom = limiter.headroom()
+    assert headroom["orders_10s"] == pytest.approx(10, abs=1)
+    assert headroom["orders_1m"] == pytest.approx(1100, abs=1)
+
+
+def test_headers_never_hand_back_tokens(limiter):
+    limiter.acquire("GET", "/fapi/v1/ticker/price")
+    limiter.update_from_headers({"X-MBX-USED-WEIGHT-1M": "2000"})
+    limiter.update_from_headers({"X-MBX-USED-WEIGHT-1M": "5"})  # a stale or lower count is ignored
+
+    assert limiter.headroom()["weight"] == pytest.approx(400, abs=1)
+
+
+@pytest.mark.parametrize("status", [418, 429])
+def test_ban_status_pauses_for_retry_after(limiter, status):
+    limiter.update_from_headers({"Retry-After": "30"}, status)
+
+    assert limiter.headroom()["banned_for"] == pytest.approx(30, abs=1)
+    assert limiter._try_acquire(1, 0, True) == pytest.approx(30, abs=1)
+
+
+def test_ok_status_does_not_ban(limiter):
+    limiter.update_from_headers({"Retry-After": "30"}, 200)
+
+    assert limiter.headroom()["banned_for"] == 0.0
+
+
+def test_info_requests_leave_the_reserve_for_orders(limiter):
+    limiter.update_from_headers({"X-MBX-USED-WEIGHT-1M": "2200"})  # 200 left, 240 reserved
+
+    assert limiter._try_acquire(1, 0, False) > 0
+    assert limiter._try_acquire(1, 1, True) == 0.0
+
+
+def test_batch_orders_count_each_order():
+    batch = {"batchOrders": json.dumps([{"symbol": "BTCUSDT"}] * 5)}
+
+    assert RateLimiter.cost("POST", "/fapi/v1/batchOrders", batch)[1:] == (5, True)
+    assert RateLimiter.cost("DELETE", "/fapi/v1/order", {})[1:] == (0, True)
+    assert RateLimiter.cost("GET", "/fapi/v1/ticker/price")[1:] == (0, False)